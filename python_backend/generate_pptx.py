@@ -11,48 +11,61 @@ import sys
 import io
 import os
 import traceback
-import urllib.request
-import tempfile
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Any
 from pathlib import Path
 from pptx import Presentation
-from pptx.util import Pt, Inches
+from pptx.util import Inches
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
 from pptx.dml.color import RGBColor
 import logging
 import hashlib
 from copy import deepcopy
 
+# テキストノード索引は src/lib/pptx にあるためパスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'lib', 'pptx'))
+
+from cpu_profile import PROFILE_CPU_ENV, start_cpu_profile
+from http_fetch import DOWNLOADED, DownloadCache, download
+from incremental_save import save_presentation
+from metrics import BYTES_IN, BYTES_OUT, CELLS, RUNS, SHAPES, SLIDES, enable_memory_profiling, enable_metrics, new_metrics
+from remote_zip import RANGE, RangeNotSupported, RemotePresentation
+from run_format import clone_run_properties, has_font_size, run_properties, set_default_font_size
+from script_fonts import FONT_FALLBACKS, JAPANESE, LATIN, detect_script, ensure_script_font, han_script_for_language
+from stdio_frames import new_payload, read_frame, read_frame_bytes, write_frame, write_frame_from
+from string_table import is_string_keyed, to_edited_slides
+from text_fit import fit_text_frame
+from text_index import KIND_CELL, KIND_NOTES, KIND_SHAPE, TextIndex, TextNode, index_slide
+from xml_extractor import to_slide_xfrm
+
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 日本語フォントのリスト（優先順位順）
-JAPANESE_FONTS = [
-    "游ゴシック",
-    "Yu Gothic",
-    "メイリオ",
-    "Meiryo",
-    "ＭＳ ゴシック",
-    "MS Gothic",
-    "ヒラギノ角ゴ Pro",
-    "Hiragino Kaku Gothic Pro",
-    "Noto Sans CJK JP",
-    "源ノ角ゴシック",
-]
+# 日本語フォントのリスト（優先順位順）。他の文字体系を含むフォント表は script_fonts.FONT_FALLBACKS
+JAPANESE_FONTS = list(FONT_FALLBACKS[JAPANESE])
 
 # 英語フォントのリスト（フォールバック用）
-ENGLISH_FONTS = [
-    "Calibri",
-    "Arial",
-    "Helvetica",
-    "Segoe UI",
-]
+ENGLISH_FONTS = list(FONT_FALLBACKS[LATIN])
+
+# 1つのPPTXTranslatorで共有するスタイルの数の上限（超えた分は共有せずにそのまま使う）
+MAX_INTERNED_STYLES = 4096
+
+# 置換した段落のスタイルを保持する数（診断用、0なら保持しない）を指定する環境変数
+STYLE_CACHE_ENV = 'PPTX_STYLE_CACHE'
 
-@dataclass
-class TextStyle:
-    """テキストスタイル情報を保持するクラス"""
+def style_cache_size_from_env() -> int:
+    """環境変数 PPTX_STYLE_CACHE の値（未設定・不正な値なら0）"""
+    try:
+        return max(0, int(os.environ.get(STYLE_CACHE_ENV, '0')))
+    except ValueError:
+        return 0
+
+class TextStyle(NamedTuple):
+    """テキストスタイル情報（不変・__dict__ なし、PPTXTranslator.intern_style() で共有する）"""
     font_name: Optional[str] = None
     font_size: Optional[int] = None
     bold: Optional[bool] = None
@@ -90,9 +103,8 @@ class TextStyle:
             except:
                 pass
 
-@dataclass
-class ParagraphStyle:
-    """段落スタイル情報を保持するクラス"""
+class ParagraphStyle(NamedTuple):
+    """段落スタイル情報（不変・__dict__ なし、PPTXTranslator.intern_style() で共有する）"""
     alignment: Optional[int] = None
     level: Optional[int] = None
     line_spacing: Optional[float] = None
@@ -130,32 +142,72 @@ class ParagraphStyle:
 class PPTXTranslator:
     """PPTXファイルの翻訳処理を行うクラス"""
     
-    def __init__(self, original_file_path: str):
+    def __init__(self, original_file_path: str, download_cache_dir: Optional[str] = None, fit_text: bool = True,
+                 style_cache_size: Optional[int] = None, language: Optional[str] = None):
         """
         コンストラクタ
         
         Args:
-            original_file_path: 元のPPTXファイルのパス（URLも可）
+            original_file_path: 元のPPTXファイルのパス（URLも可）、またはシーク可能なファイルオブジェクト
+            download_cache_dir: URLのダウンロードキャッシュのディレクトリ（Noneならキャッシュしない）
+            fit_text: 訳文が枠からあふれるテキストフレームのフォントサイズを縮小するか
+            style_cache_size: 置換前のスタイルを保持する段落数（診断用。0なら保持せず抽出もしない、
+                              Noneなら環境変数 PPTX_STYLE_CACHE に従う）
+            language: 翻訳先の言語コード（漢字だけの訳文を中国語・日本語のどちらのフォントにするかに使う）
         """
         self.original_file_path = original_file_path
+        self.download_cache_dir = download_cache_dir
+        self.fit_text = fit_text
+        self.set_language(language)
         self.presentation = None
         self.text_replacements = {}
-        self.style_cache = {}
+        self.located_replacements = []  # (ロケーター, 翻訳テキスト) のリスト
+        # (スライド, シェイプ, 段落) -> 置換前のスタイル（新しいものから style_cache_size 件）
+        self.style_cache_size = style_cache_size_from_env() if style_cache_size is None else max(0, style_cache_size)
+        self.style_cache: 'OrderedDict[Tuple[int, int, int], Dict[str, Any]]' = OrderedDict()
+        # 同じ内容のスタイル -> 共有するオブジェクト（このインスタンス＝1ジョブの間だけ保持）
+        self.interned_styles: Dict[Any, Any] = {}
         self.error_log = []
         self.temp_file = None
+        self.cached_file = None  # キャッシュ上の元ファイル（読み込み中に別プロセスが更新しても同じ内容を読めるよう開いたまま保持）
+        self.download_status = None
+        self.remote_presentation = None  # Range リクエストで開いたリモートのプレゼンテーション
+        self.remote_stats = None  # リモートから取得したリクエスト数・バイト数
         self.processed_shapes = set()  # 処理済みシェイプを追跡
+        self.source_path = None  # 読み込んだローカルファイルのパスまたはファイルオブジェクト（差分保存用）
+        self.dirty_parts = set()  # 変更したスライド・ノートのパート名
+        self.save_mode = None
+        self.pristine_parts = {}  # パート名 -> (シェイプツリー, 翻訳前の複製)（多言語出力用）
+        self.fit_nodes = {}  # 置換したテキストフレームのノード（ノードID -> ノード）
+        self.fitted_count = 0  # フォントサイズを縮小したテキストフレームの数
+        self.metrics = new_metrics()  # フェーズごとの所要時間・カウンター（PPTX_METRICS=1 で有効）
+        
+    def set_language(self, language: Optional[str]):
+        """翻訳先の言語を設定（漢字だけの訳文の文字体系を言語から決める）"""
+        self.language = language
+        self.han_script = han_script_for_language(language)
+    
+    def download_if_url(self, file_path: str):
+        """
+        URLの場合はファイルをダウンロード
+        （接続はプロセス内で使い回し、キャッシュがあれば条件付きリクエストで更新を確認する）
         
-    def download_if_url(self, file_path: str) -> str:
-        """URLの場合はファイルをダウンロード"""
-        if file_path.startswith(('http://', 'https://')):
+        Returns:
+            ローカルファイルのパス、またはキャッシュ上のファイルを開いたファイルオブジェクト
+        """
+        if isinstance(file_path, str) and file_path.startswith(('http://', 'https://')):
             try:
                 logger.info(f"Downloading file from URL: {file_path}")
-                with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as tmp_file:
-                    with urllib.request.urlopen(file_path) as response:
-                        tmp_file.write(response.read())
-                    self.temp_file = tmp_file.name
+                cache = DownloadCache(self.download_cache_dir) if self.download_cache_dir else None
+                local_path, self.download_status = download(file_path, cache)
+                if self.download_status == DOWNLOADED:
+                    self.temp_file = local_path
                     logger.info(f"Downloaded to temporary file: {self.temp_file}")
                     return self.temp_file
+                
+                logger.info(f"Using cached file ({self.download_status}): {local_path}")
+                self.cached_file = open(local_path, 'rb')
+                return self.cached_file
             except Exception as e:
                 error_msg = f"Failed to download file from URL: {str(e)}"
                 logger.error(error_msg)
@@ -163,8 +215,39 @@ class PPTXTranslator:
                 raise
         return file_path
         
+    def open_remote_if_url(self, file_path: str) -> bool:
+        """
+        URLを Range リクエストで開く（画像・動画は保存時にリモートから直接転送する）
+        
+        Returns:
+            開けた場合True（キャッシュを使う場合・URLでない場合・サーバーが Range に対応していない場合はFalse）
+        """
+        if self.download_cache_dir or not (isinstance(file_path, str) and file_path.startswith(('http://', 'https://'))):
+            return False
+        try:
+            logger.info(f"Opening remote PPTX with range requests: {file_path}")
+            self.remote_presentation = RemotePresentation(file_path)
+        except RangeNotSupported as e:
+            logger.info(f"Falling back to full download: {str(e)}")
+            return False
+        
+        self.presentation = self.remote_presentation.presentation
+        self.source_path = self.remote_presentation.remote
+        self.download_status = RANGE
+        stats = self.remote_presentation.stats()
+        logger.info(f"Fetched {stats['bytes_fetched']:,} of {stats['size']:,} bytes in {stats['requests']} requests; "
+                    f"loaded presentation with {len(self.presentation.slides)} slides")
+        return True
+    
     def cleanup_temp_file(self):
         """一時ファイルをクリーンアップ"""
+        if self.remote_presentation is not None:
+            self.remote_stats = self.remote_presentation.stats()
+            self.remote_presentation.close()
+            self.remote_presentation = None
+        if self.cached_file is not None:
+            self.cached_file.close()
+            self.cached_file = None
         if self.temp_file and os.path.exists(self.temp_file):
             try:
                 os.unlink(self.temp_file)
@@ -175,11 +258,22 @@ class PPTXTranslator:
     def load_presentation(self) -> bool:
         """プレゼンテーションファイルを読み込む"""
         try:
+            # キャッシュを使わないURLは、Range リクエストでXMLパートだけを取得して開く
+            with self.metrics.phase('download'):
+                opened_remote = self.open_remote_if_url(self.original_file_path)
+            if opened_remote:
+                self.metrics.count(BYTES_IN, self.remote_presentation.remote.size)
+                return True
+            
             # URLの場合はダウンロード
-            file_path = self.download_if_url(self.original_file_path)
+            with self.metrics.phase('download'):
+                file_path = self.download_if_url(self.original_file_path)
             
-            logger.info(f"Loading original PPTX: {file_path}")
-            self.presentation = Presentation(file_path)
+            logger.info(f"Loading original PPTX: {file_path if isinstance(file_path, str) else getattr(file_path, 'name', '<stdin>')}")
+            self.metrics.count_size(BYTES_IN, file_path)
+            with self.metrics.phase('load'):
+                self.presentation = Presentation(file_path)
+            self.source_path = file_path
             logger.info(f"Successfully loaded presentation with {len(self.presentation.slides)} slides")
             return True
         except Exception as e:
@@ -188,117 +282,207 @@ class PPTXTranslator:
             self.error_log.append(error_msg)
             return False
     
-    def is_japanese_text(self, text: str) -> bool:
-        """テキストが日本語を含むか判定"""
-        if not text:
-            return False
-        # 日本語文字の範囲をチェック
-        for char in text:
-            code = ord(char)
-            # ひらがな、カタカナ、漢字の範囲
-            if (0x3040 <= code <= 0x309F) or \
-               (0x30A0 <= code <= 0x30FF) or \
-               (0x4E00 <= code <= 0x9FFF) or \
-               (0x3400 <= code <= 0x4DBF):
-                return True
-        return False
+    def snapshot(self):
+        """
+        翻訳前のスライド・ノートのシェイプツリー（p:spTree）を保存する
+        1回の読み込みから複数の言語を出力する場合、言語ごとに reset() でここまで戻す
+        （テキストの置換で書き換わるのはシェイプツリーの中だけ）
+        """
+        self.pristine_parts = {}
+        for slide in self.presentation.slides:
+            parts = [slide.part]
+            if slide.has_notes_slide:
+                parts.append(slide.notes_slide.part)
+            for part in parts:
+                sp_tree = part._element.cSld.spTree
+                self.pristine_parts[str(part.partname)] = (sp_tree, deepcopy(sp_tree))
+    
+    def reset(self):
+        """
+        変更したパートを翻訳前の状態に戻し、置換の状態をクリアする
+        （p:spTree 自体は入れ替えずに中身だけ戻すので、python-pptxがキャッシュしているシェイプコレクションも有効なまま）
+        """
+        for part_name in self.dirty_parts:
+            sp_tree, pristine = self.pristine_parts[part_name]
+            sp_tree[:] = list(deepcopy(pristine))
+        self.dirty_parts.clear()
+        self.processed_shapes.clear()
+        self.style_cache.clear()
+        self.error_log = []
+        self.save_mode = None
+    
+    def intern_style(self, style):
+        """
+        同じ内容のスタイルは1つのオブジェクトを共有する（数十万ランのデッキでも種類はわずかなため）
+
+        Args:
+            style: TextStyle または ParagraphStyle
+
+        Returns:
+            共有しているスタイル（上限に達していて未登録なら style のまま）
+        """
+        # 同じ値のタプルでも型が違えば別のスタイルとして扱う
+        key = (type(style), style)
+        shared = self.interned_styles.get(key)
+        if shared is not None:
+            return shared
+        if len(self.interned_styles) < MAX_INTERNED_STYLES:
+            self.interned_styles[key] = style
+        return style
     
     def extract_text_style(self, run) -> TextStyle:
-        """ランからテキストスタイルを抽出"""
-        style = TextStyle()
+        """ランからテキストスタイルを抽出（各プロパティは1回だけ読む。元のXMLは変更しない）"""
+        font_name = font_size = bold = italic = underline = color_rgb = None
         
         try:
-            # フォント名を取得
-            if run.font.name:
-                style.font_name = run.font.name
-            
-            # フォントサイズを確実に取得（継承されている場合も考慮）
-            if run.font.size:
-                style.font_size = run.font.size
-            elif hasattr(run, '_element'):
-                # XMLから直接サイズを取得する試み
-                try:
-                    rPr = run._element.get_or_add_rPr()
-                    sz = rPr.find('.//a:sz', namespaces={'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-                    if sz is not None and 'val' in sz.attrib:
-                        # PowerPointのフォントサイズは100倍で保存されている
-                        style.font_size = Pt(int(sz.attrib['val']) / 100)
-                except:
-                    pass
-            
-            if run.font.bold is not None:
-                style.bold = run.font.bold
-            if run.font.italic is not None:
-                style.italic = run.font.italic
-            if run.font.underline is not None:
-                style.underline = run.font.underline
-            
-            # カラー情報の取得（エラーになる可能性があるため注意深く処理）
+            font = run.font
+            font_name = font.name or None
+            font_size = font.size or None
+            bold = font.bold
+            italic = font.italic
+            underline = font.underline
+            
+            # カラー情報の取得（テーマカラーなどRGBを持たない色はエラーになるため注意深く処理）
             try:
-                if hasattr(run.font.color, 'rgb') and run.font.color.rgb:
-                    style.color_rgb = (
-                        run.font.color.rgb[0],
-                        run.font.color.rgb[1],
-                        run.font.color.rgb[2]
-                    )
-            except:
+                rgb = font.color.rgb
+                if rgb:
+                    color_rgb = (rgb[0], rgb[1], rgb[2])
+            except Exception:
                 pass
                 
         except Exception as e:
-            logger.debug(f"Could not extract some style properties: {e}")
+            logger.debug("Could not extract some style properties: %s", e)
             
-        return style
+        return self.intern_style(TextStyle(font_name=font_name, font_size=font_size, bold=bold, italic=italic,
+                                            underline=underline, color_rgb=color_rgb))
     
     def extract_paragraph_style(self, paragraph) -> ParagraphStyle:
         """段落からスタイルを抽出"""
-        style = ParagraphStyle()
+        alignment = level = line_spacing = space_before = space_after = None
         
         try:
-            if hasattr(paragraph, 'alignment') and paragraph.alignment is not None:
-                style.alignment = paragraph.alignment
-            if hasattr(paragraph, 'level') and paragraph.level is not None:
-                style.level = paragraph.level
-            if hasattr(paragraph, 'line_spacing') and paragraph.line_spacing is not None:
-                style.line_spacing = paragraph.line_spacing
-            if hasattr(paragraph, 'space_before') and paragraph.space_before is not None:
-                style.space_before = paragraph.space_before
-            if hasattr(paragraph, 'space_after') and paragraph.space_after is not None:
-                style.space_after = paragraph.space_after
+            alignment = paragraph.alignment
+            level = paragraph.level
+            line_spacing = paragraph.line_spacing
+            space_before = paragraph.space_before
+            space_after = paragraph.space_after
         except Exception as e:
-            logger.debug(f"Could not extract some paragraph properties: {e}")
+            logger.debug("Could not extract some paragraph properties: %s", e)
             
-        return style
+        return self.intern_style(ParagraphStyle(alignment=alignment, level=level, line_spacing=line_spacing,
+                                                 space_before=space_before, space_after=space_after))
+    
+    def remember_styles(self, paragraph, slide_idx: int, shape_idx: int, para_idx: int):
+        """
+        置換前の段落・ランのスタイルを診断用に保持（style_cache_size 件を超えたら古いものから捨てる）
+        
+        Args:
+            paragraph: 置換前の段落
+            slide_idx: スライドインデックス
+            shape_idx: シェイプインデックス
+            para_idx: 段落インデックス
+        """
+        with self.metrics.phase('style'):
+            styles = {
+                'paragraph': self.extract_paragraph_style(paragraph),
+                'runs': [(run.text, self.extract_text_style(run)) for run in paragraph.runs]
+            }
+        
+        key = (slide_idx, shape_idx, para_idx)
+        self.style_cache[key] = styles
+        self.style_cache.move_to_end(key)
+        while len(self.style_cache) > self.style_cache_size:
+            self.style_cache.popitem(last=False)
     
     def prepare_text_replacements(self, edited_slides_data: List[Dict]) -> int:
         """
         翻訳マップを準備する
         
         Args:
-            edited_slides_data: 編集済みスライドデータ
+            edited_slides_data: 編集済みスライドデータ（各テキストに抽出時の "locator" があれば位置で置換）
             
         Returns:
             準備された置換の数
         """
         self.text_replacements.clear()
+        self.located_replacements.clear()
         self.processed_shapes.clear()  # 処理済みシェイプをリセット
+        self.fit_nodes.clear()
+        self.fitted_count = 0
         
         for slide_data in edited_slides_data:
             for text_data in slide_data.get('texts', []):
                 original = text_data.get('original', '').strip()
                 translated = text_data.get('translated', '').strip()
+                locator = text_data.get('locator')
+                
+                # ロケーターがある場合は位置で直接置換する（解決できなければテキスト一致にフォールバック）
+                if locator and translated and original != translated:
+                    self.located_replacements.append((locator, translated, original))
+                    continue
                 
                 if original and translated and original != translated:
                     self.text_replacements[original] = translated
-                    logger.debug(f"Added replacement: '{original[:50]}...' -> '{translated[:50]}...'")
+                    logger.debug("Added replacement: '%.50s...' -> '%.50s...'", original, translated)
         
-        logger.info(f"Prepared {len(self.text_replacements)} text replacements")
+        logger.info(f"Prepared {len(self.text_replacements)} text replacements, {len(self.located_replacements)} located replacements")
         if logger.isEnabledFor(logging.DEBUG):
             for orig, trans in list(self.text_replacements.items())[:3]:
-                logger.debug(f"Sample replacement: '{orig}' -> '{trans}'")
+                logger.debug("Sample replacement: '%s' -> '%s'", orig, trans)
         
-        return len(self.text_replacements)
+        return len(self.text_replacements) + len(self.located_replacements)
     
-    def replace_text_in_shape(self, shape, slide_idx: int, shape_idx: int) -> int:
+    def replace_paragraph(self, paragraph, new_text: str, slide_idx: int, shape_idx: int, para_idx: int):
+        """
+        段落のテキストを置換する（最初のランと段落のスタイルを保持）
+        
+        Args:
+            paragraph: 処理対象の段落
+            new_text: 置換後のテキスト
+            slide_idx: スライドインデックス
+            shape_idx: シェイプインデックス
+            para_idx: 段落インデックス
+        """
+        # 文字体系に合わせてフォントを補う（日本語以外の訳文にも対応）
+        script = detect_script(new_text, self.han_script)
+        self.dirty_parts.add(paragraph.part.partname)
+        
+        # 書式は a:rPr の複製で引き継ぐため、スタイルの抽出は診断用に保持する場合だけ行う
+        if self.style_cache_size:
+            self.remember_styles(paragraph, slide_idx, shape_idx, para_idx)
+        
+        # テキストを置換（重複を防ぐため一度だけ処理）
+        if paragraph.runs:
+            # 最初のランの a:rPr を保持（段落をクリアしても要素への参照は有効）
+            source_rPr = run_properties(paragraph.runs[0])
+            
+            # すべてのランをクリアして新しいテキストを設定（複数行は段落内改行でつなぐ）
+            paragraph.clear()
+            for line_idx, line in enumerate(new_text.split('\n')):
+                if line_idx:
+                    paragraph.add_line_break()
+                new_run = paragraph.add_run()
+                new_run.text = line
+                self.metrics.count(RUNS)
+                
+                # 元の書式を要素ごと複製（テーマカラーや latin/ea フォントも保持）
+                clone_run_properties(source_rPr, new_run)
+                ensure_script_font(new_run, script)
+                
+                # フォントサイズが設定されていない場合はデフォルトを設定
+                if not has_font_size(source_rPr):
+                    set_default_font_size(new_run)
+                
+        else:
+            # ランがない場合は新しく作成
+            paragraph.text = new_text
+            if paragraph.runs:
+                # 文字体系に合ったフォントを設定
+                ensure_script_font(paragraph.runs[0], script)
+        
+        # 段落の a:pPr は paragraph.clear() / paragraph.text で保持されるため復元は不要
+    
+    def replace_text_in_shape(self, shape, slide_idx: int, shape_idx: int, para_texts: Optional[Tuple[str, ...]] = None) -> int:
         """
         シェイプ内のテキストを置換する（スタイル保持）
         
@@ -306,6 +490,7 @@ class PPTXTranslator:
             shape: 処理対象のシェイプ
             slide_idx: スライドインデックス
             shape_idx: シェイプインデックス
+            para_texts: 索引で取得済みの段落テキスト（省略時は段落から取得）
             
         Returns:
             置換されたテキストの数
@@ -317,67 +502,25 @@ class PPTXTranslator:
         
         try:
             text_frame = shape.text_frame
-            
-            # テキストフレームの自動サイズ調整を無効化（サイズ保持のため）
-            try:
-                text_frame.auto_size = MSO_AUTO_SIZE.NONE
-            except:
-                pass
                 
             for para_idx, paragraph in enumerate(text_frame.paragraphs):
-                original_text = paragraph.text.strip()
+                original_text = (para_texts[para_idx] if para_texts is not None else paragraph.text).strip()
                 
                 if original_text in self.text_replacements:
                     new_text = self.text_replacements[original_text]
-                    is_japanese = self.is_japanese_text(new_text)
-                    
-                    logger.debug(f"Processing text shape paragraph {para_idx}: '{original_text}' -> '{new_text}'")
-                    
-                    # スタイルをキャッシュ
-                    cache_key = f"{slide_idx}_{shape_idx}_{para_idx}"
+                    logger.debug("Processing text shape paragraph %d: '%s' -> '%s'", para_idx, original_text, new_text)
                     
-                    # 段落スタイルを保存
-                    para_style = self.extract_paragraph_style(paragraph)
+                    # テキストフレームの自動サイズ調整を無効化（サイズ保持のため）
+                    # 置換しないシェイプは変更しない（差分保存で未変更のスライドをそのままコピーできるように）
+                    try:
+                        text_frame.auto_size = MSO_AUTO_SIZE.NONE
+                    except:
+                        pass
                     
-                    # ランのスタイルを保存
-                    run_styles = []
-                    for run in paragraph.runs:
-                        run_styles.append((run.text, self.extract_text_style(run)))
-                    
-                    self.style_cache[cache_key] = {
-                        'paragraph': para_style,
-                        'runs': run_styles
-                    }
-                    
-                    # テキストを置換（重複を防ぐため一度だけ処理）
-                    if paragraph.runs:
-                        # 最初のランのスタイルを保持
-                        first_run_style = self.extract_text_style(paragraph.runs[0])
-                        
-                        # すべてのランをクリアして新しいテキストを設定
-                        paragraph.clear()
-                        new_run = paragraph.add_run()
-                        new_run.text = new_text
-                        
-                        # スタイルを適用
-                        first_run_style.apply_to_run(new_run, is_japanese)
-                        
-                        # フォントサイズが設定されていない場合はデフォルトを設定
-                        if not new_run.font.size and not first_run_style.font_size:
-                            new_run.font.size = Pt(11)  # デフォルトサイズ
-                            
-                    else:
-                        # ランがない場合は新しく作成
-                        paragraph.text = new_text
-                        if paragraph.runs and is_japanese:
-                            # 日本語フォントを設定
-                            paragraph.runs[0].font.name = JAPANESE_FONTS[0]
-                    
-                    # 段落スタイルを復元
-                    para_style.apply_to_paragraph(paragraph)
+                    self.replace_paragraph(paragraph, new_text, slide_idx, shape_idx, para_idx)
                     
                     replaced_count += 1
-                    logger.debug(f"Successfully replaced text in slide {slide_idx + 1}, shape {shape_idx + 1}, paragraph {para_idx + 1}")
+                    logger.debug("Successfully replaced text in slide %d, shape %d, paragraph %d", slide_idx + 1, shape_idx + 1, para_idx + 1)
                     
                     # 同じテキストの重複処理を防ぐため、処理済みをマークする
                     # (同一スライド内で同じoriginal_textの重複処理を避ける)
@@ -390,106 +533,231 @@ class PPTXTranslator:
         
         return replaced_count
     
-    def replace_text_in_table(self, shape, slide_idx: int) -> int:
-        """テーブル内のテキストを置換"""
-        if not shape.has_table:
-            return 0
+    def replace_text_in_cell(self, cell, slide_idx: int, row_idx: int, col_idx: int, cell_text: str, new_text: Optional[str] = None) -> int:
+        """
+        テーブルセル内のテキストを置換する（スタイル保持）
         
-        replaced_count = 0
+        Args:
+            cell: 処理対象のセル
+            slide_idx: スライドインデックス
+            row_idx: 行インデックス
+            col_idx: 列インデックス
+            cell_text: セルのテキスト（前後の空白を除去済み）
+            new_text: 置換後のテキスト（省略時は翻訳マップから取得）
+            
+        Returns:
+            置換されたテキストの数
+        """
+        if new_text is None:
+            if cell_text not in self.text_replacements:
+                return 0
+            new_text = self.text_replacements[cell_text]
         
         try:
-            for row_idx, row in enumerate(shape.table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    cell_text = cell.text.strip()
+            script = detect_script(new_text, self.han_script)
+            self.dirty_parts.add(cell.part.partname)
+            
+            logger.debug("Processing table cell [%d,%d]: '%s' -> '%s'", row_idx, col_idx, cell_text, new_text)
+            
+            # セルのテキストフレームが存在する場合の処理
+            if cell.text_frame and cell.text_frame.paragraphs:
+                # 最初の段落のみを使用して重複を防ぐ
+                first_para = cell.text_frame.paragraphs[0]
+                
+                # 元の a:rPr を保持（段落をクリアしても要素への参照は有効）
+                source_rPr = run_properties(first_para.runs[0]) if first_para.runs else None
+                
+                # 全ての段落をクリアしてから最初の段落にのみテキストを設定
+                for para in cell.text_frame.paragraphs:
+                    para.clear()
+                
+                # 空の段落がある場合は削除（最初の段落は残す）
+                while len(cell.text_frame.paragraphs) > 1:
+                    try:
+                        # 2番目以降の段落を削除
+                        cell.text_frame._element.remove(cell.text_frame.paragraphs[1]._element)
+                    except:
+                        break
+                
+                # 最初の段落に新しいテキストを設定
+                new_run = first_para.add_run()
+                new_run.text = new_text
+                self.metrics.count(RUNS)
+                
+                # 元の書式を要素ごと複製
+                clone_run_properties(source_rPr, new_run)
+                ensure_script_font(new_run, script)
+                    
+                # フォントサイズが未設定の場合はデフォルトを適用
+                if not has_font_size(source_rPr):
+                    set_default_font_size(new_run)
                     
-                    if cell_text in self.text_replacements:
-                        new_text = self.text_replacements[cell_text]
-                        is_japanese = self.is_japanese_text(new_text)
-                        
-                        logger.debug(f"Processing table cell [{row_idx},{col_idx}]: '{cell_text}' -> '{new_text}'")
-                        
-                        # セルのテキストフレームが存在する場合の処理
-                        if cell.text_frame and cell.text_frame.paragraphs:
-                            # 最初の段落のみを使用して重複を防ぐ
-                            first_para = cell.text_frame.paragraphs[0]
-                            
-                            # 元のスタイルを保存
-                            original_style = None
-                            if first_para.runs:
-                                original_style = self.extract_text_style(first_para.runs[0])
-                            
-                            # 全ての段落をクリアしてから最初の段落にのみテキストを設定
-                            for para in cell.text_frame.paragraphs:
-                                para.clear()
-                            
-                            # 空の段落がある場合は削除（最初の段落は残す）
-                            while len(cell.text_frame.paragraphs) > 1:
-                                try:
-                                    # 2番目以降の段落を削除
-                                    cell.text_frame._element.remove(cell.text_frame.paragraphs[1]._element)
-                                except:
-                                    break
-                            
-                            # 最初の段落に新しいテキストを設定
-                            new_run = first_para.add_run()
-                            new_run.text = new_text
-                            
-                            # スタイルを適用
-                            if original_style:
-                                original_style.apply_to_run(new_run, is_japanese)
-                            elif is_japanese:
-                                new_run.font.name = JAPANESE_FONTS[0]
-                                
-                            # フォントサイズが未設定の場合はデフォルトを適用
-                            if not new_run.font.size:
-                                new_run.font.size = Pt(11)
-                                
-                        else:
-                            # テキストフレームがない場合は直接設定
-                            cell.text = new_text
-                        
-                        replaced_count += 1
-                        logger.debug(f"Replaced text in table cell [{row_idx},{col_idx}] on slide {slide_idx + 1}")
-                        
+            else:
+                # テキストフレームがない場合は直接設定
+                cell.text = new_text
+            
+            logger.debug("Replaced text in table cell [%d,%d] on slide %d", row_idx, col_idx, slide_idx + 1)
+            self.metrics.count(CELLS)
+            return 1
+            
         except Exception as e:
             error_msg = f"Error replacing text in table (slide {slide_idx + 1}): {str(e)}"
             logger.warning(error_msg)
             self.error_log.append(error_msg)
         
+        return 0
+    
+    def replace_located_text(self, node: TextNode, new_text: str, para_idx: Optional[int] = None) -> int:
+        """
+        ロケーターで特定したノードのテキストを置換する（テキスト照合なし）
+        
+        Args:
+            node: 処理対象のテキストノード
+            new_text: 置換後のテキスト
+            para_idx: 段落インデックス（省略時はノード全体を置換）
+            
+        Returns:
+            置換されたテキストの数
+        """
+        if node.kind == KIND_CELL:
+            return self.replace_text_in_cell(node.cell, node.slide_idx, node.row, node.col, node.text, new_text)
+        
+        try:
+            text_frame = node.text_frame
+            paragraphs = text_frame.paragraphs
+            if para_idx is not None and not 0 <= para_idx < len(paragraphs):
+                return 0
+            
+            # テキストフレームの自動サイズ調整を無効化（サイズ保持のため）
+            try:
+                text_frame.auto_size = MSO_AUTO_SIZE.NONE
+            except:
+                pass
+            
+            self.fit_nodes[node.node_id] = node
+            self.metrics.count(SHAPES)
+            if para_idx is not None:
+                self.replace_paragraph(paragraphs[para_idx], new_text, node.slide_idx, node.shape_idx, para_idx)
+                return 1
+            
+            # ノード全体の訳文は空でない段落に1行ずつ割り当て、余った行は最後の段落に改行でつなぐ
+            targets = [idx for idx, text in enumerate(node.para_texts) if text.strip()]
+            lines = new_text.split('\n')
+            for position, target_idx in enumerate(targets):
+                paragraph = paragraphs[target_idx]
+                if position >= len(lines):
+                    # 訳文の行が足りない場合は残りの段落を削除
+                    paragraph._p.getparent().remove(paragraph._p)
+                    continue
+                line = '\n'.join(lines[position:]) if position == len(targets) - 1 else lines[position]
+                self.replace_paragraph(paragraph, line, node.slide_idx, node.shape_idx, target_idx)
+            return 1
+            
+        except Exception as e:
+            error_msg = f"Error replacing located text ({node.node_id}): {str(e)}"
+            logger.warning(error_msg)
+            self.error_log.append(error_msg)
+            return 0
+    
+    def apply_located_replacements(self, index: TextIndex) -> int:
+        """
+        ロケーター付きの置換を適用する（解決できないものはテキスト一致の置換に回す）
+        
+        Args:
+            index: プレゼンテーションのテキストノード索引
+            
+        Returns:
+            置換されたテキストの数
+        """
+        replaced_count = 0
+        
+        for locator, translated, original in self.located_replacements:
+            node = index.find(locator)
+            if node is None:
+                if original:
+                    self.text_replacements.setdefault(original, translated)
+                continue
+            
+            para_idx = locator.get('para') if isinstance(locator.get('para'), int) else None
+            replaced = self.replace_located_text(node, translated, para_idx)
+            if replaced:
+                # テキスト一致の処理で再度置換しないよう処理済みにする
+                self.processed_shapes.add(node.node_id)
+                replaced_count += replaced
+        
         return replaced_count
     
-    def process_slide(self, slide, slide_idx: int) -> int:
+    def process_slide(self, slide, slide_idx: int, nodes: Optional[List[TextNode]] = None) -> int:
         """
         スライドを処理する
         
         Args:
             slide: 処理対象のスライド
             slide_idx: スライドインデックス
+            nodes: スライドのテキストノード（省略時はここで索引を作成）
             
         Returns:
             置換されたテキストの数
         """
         replaced_count = 0
         
-        logger.info(f"Processing slide {slide_idx + 1}")
+        logger.debug("Processing slide %d", slide_idx + 1)
+        self.metrics.count(SLIDES)
+        
+        if nodes is None:
+            nodes = index_slide(slide, slide_idx, include_notes=False)
         
-        for shape_idx, shape in enumerate(slide.shapes):
+        # グループ内のシェイプ・テーブルセルも索引に文書順で含まれている
+        for node in nodes:
+            # ロケーターで置換済みのノードはスキップ
+            if node.node_id in self.processed_shapes:
+                continue
+            
             # テキストフレームの処理
-            replaced_count += self.replace_text_in_shape(shape, slide_idx, shape_idx)
+            if node.kind == KIND_SHAPE:
+                replaced = self.replace_text_in_shape(node.shape, slide_idx, node.shape_idx, node.para_texts)
+                if replaced:
+                    self.fit_nodes[node.node_id] = node
+                    self.metrics.count(SHAPES)
+                replaced_count += replaced
             
             # テーブルの処理
-            replaced_count += self.replace_text_in_table(shape, slide_idx)
-            
-            # グループシェイプの処理
-            if shape.shape_type == 6:  # GROUP
-                try:
-                    for sub_shape in shape.shapes:
-                        replaced_count += self.replace_text_in_shape(sub_shape, slide_idx, shape_idx)
-                except:
-                    pass
+            elif node.kind == KIND_CELL:
+                replaced_count += self.replace_text_in_cell(node.cell, slide_idx, node.row, node.col, node.text)
         
         return replaced_count
     
+    def fit_replaced_frames(self) -> int:
+        """
+        置換したテキストフレームのうち、訳文が枠からあふれるもののフォントサイズを縮小する
+        （大きさは抽出時と同じくグループ内のシェイプもスライド座標に変換して使う）
+        
+        Returns:
+            縮小したテキストフレームの数
+        """
+        fitted_count = 0
+        for node in self.fit_nodes.values():
+            try:
+                shape = node.shape
+                xfrm = (shape.left, shape.top, shape.width, shape.height)
+                if node.groups:
+                    xfrm = to_slide_xfrm(xfrm, [group._element for group in reversed(node.groups)])
+                _, _, width, height = xfrm
+                if not width or not height:
+                    continue
+                scale = fit_text_frame(node.text_frame, int(width), int(height))
+                if scale is not None:
+                    fitted_count += 1
+                    logger.debug("Shrank text to %.0f%% in slide %d, shape %d", scale * 100, node.slide_idx + 1, node.shape_idx + 1)
+            except Exception as e:
+                error_msg = f"Error fitting text ({node.node_id}): {str(e)}"
+                logger.warning(error_msg)
+                self.error_log.append(error_msg)
+        
+        if fitted_count:
+            logger.info(f"Shrank {fitted_count} overflowing text frames")
+        return fitted_count
+    
     def translate(self, edited_slides_data: List[Dict]) -> Tuple[bool, int]:
         """
         翻訳処理を実行する
@@ -502,26 +770,37 @@ class PPTXTranslator:
         """
         try:
             # 翻訳マップを準備
-            if self.prepare_text_replacements(edited_slides_data) == 0:
+            with self.metrics.phase('prepare'):
+                prepared = self.prepare_text_replacements(edited_slides_data)
+            if prepared == 0:
                 logger.warning("No text replacements found")
                 return True, 0
             
-            # 各スライドを処理
-            total_replaced = 0
-            for slide_idx, slide in enumerate(self.presentation.slides):
-                replaced = self.process_slide(slide, slide_idx)
-                total_replaced += replaced
-            
-            logger.info(f"Total replacements: {total_replaced}")
+            # 各スライドを処理（テキストノード索引はスライドごとに一度だけ作成）
+            with self.metrics.phase('index'):
+                index = TextIndex(self.presentation)
             
-            # スライドノートの処理（オプション）
-            for slide_idx, slide in enumerate(self.presentation.slides):
-                if slide.has_notes_slide and slide.notes_slide.notes_text_frame:
-                    notes_text = slide.notes_slide.notes_text_frame.text.strip()
-                    if notes_text in self.text_replacements:
-                        slide.notes_slide.notes_text_frame.text = self.text_replacements[notes_text]
+            with self.metrics.phase('replace'):
+                # ロケーター付きの置換を先に位置で直接適用
+                total_replaced = self.apply_located_replacements(index)
+                for slide_idx, slide in enumerate(self.presentation.slides):
+                    replaced = self.process_slide(slide, slide_idx, index.slide_nodes(slide_idx))
+                    total_replaced += replaced
+                
+                logger.info(f"Total replacements: {total_replaced}")
+                
+                # スライドノートの処理（オプション）
+                for node in index:
+                    if node.kind == KIND_NOTES and node.node_id not in self.processed_shapes and node.text in self.text_replacements:
+                        node.text_frame.text = self.text_replacements[node.text]
+                        self.dirty_parts.add(node.part_name)
                         total_replaced += 1
-                        logger.debug(f"Replaced notes text on slide {slide_idx + 1}")
+                        logger.debug("Replaced notes text on slide %d", node.slide_idx + 1)
+            
+            # 訳文があふれるテキストフレームを枠に収まるサイズまで縮小
+            if self.fit_text:
+                with self.metrics.phase('fit'):
+                    self.fitted_count = self.fit_replaced_frames()
             
             return True, total_replaced
             
@@ -531,28 +810,38 @@ class PPTXTranslator:
             self.error_log.append(error_msg)
             return False, 0
     
-    def save(self, output_path: str) -> bool:
+    def save(self, output_path: str, cleanup: bool = True) -> bool:
         """
         プレゼンテーションを保存する
         
         Args:
-            output_path: 出力ファイルのパス
+            output_path: 出力ファイルのパス、または書き込み先のファイルオブジェクト
+            cleanup: 保存後にダウンロードした一時ファイルを削除するか（続けて別の言語を保存する場合はFalse）
             
         Returns:
             成功した場合True
         """
         try:
             # 出力ディレクトリが存在しない場合は作成
-            output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            if isinstance(output_path, str):
+                output_dir = os.path.dirname(output_path)
+                if output_dir and not os.path.exists(output_dir):
+                    os.makedirs(output_dir)
             
-            logger.info(f"Saving translated PPTX to: {output_path}")
-            self.presentation.save(output_path)
-            logger.info("Translation completed successfully!")
+            logger.info(f"Saving translated PPTX to: {output_path if isinstance(output_path, str) else '<stdout>'}")
+            # 変更していないパート（画像・動画など）は元のzipから再圧縮せずにコピー
+            # 差分保存できない場合は、読み込んでいないリモートのパートを取得してから保存し直す
+            before_full_save = self.remote_presentation.hydrate if self.remote_presentation else None
+            with self.metrics.phase('save'):
+                self.save_mode = save_presentation(
+                    self.presentation, output_path, self.source_path, self.dirty_parts, before_full_save
+                )
+            self.metrics.count_size(BYTES_OUT, output_path)
+            logger.info(f"Translation completed successfully! (save mode: {self.save_mode})")
             
             # 一時ファイルをクリーンアップ
-            self.cleanup_temp_file()
+            if cleanup:
+                self.cleanup_temp_file()
             
             return True
         except Exception as e:
@@ -570,15 +859,21 @@ class PPTXTranslator:
 def generate_translated_pptx(
     original_file_path: str,
     edited_slides_data: List[Dict],
-    output_path: str
+    output_path: str,
+    download_cache_dir: Optional[str] = None,
+    fit_text: bool = True,
+    language: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     翻訳済みPPTXファイルを生成する（メイン関数）
     
     Args:
-        original_file_path: 元のPPTXファイルのパス（URLも可）
-        edited_slides_data: 編集済みスライドデータ
-        output_path: 出力ファイルのパス
+        original_file_path: 元のPPTXファイルのパス（URLも可）、またはシーク可能なファイルオブジェクト
+        edited_slides_data: 編集済みスライドデータ（文字列テーブルの番号で指定した翻訳データも可）
+        output_path: 出力ファイルのパス、または書き込み先のファイルオブジェクト
+        download_cache_dir: URLのダウンロードキャッシュのディレクトリ（Noneならキャッシュしない）
+        fit_text: 訳文が枠からあふれるテキストフレームのフォントサイズを縮小するか
+        language: 翻訳先の言語コード（"zh" なら漢字だけの訳文に中国語のフォントを使う。Noneなら日本語扱い）
     
     Returns:
         結果を含む辞書
@@ -591,77 +886,454 @@ def generate_translated_pptx(
     }
     
     # URLの場合も処理可能
-    if not original_file_path.startswith(('http://', 'https://')) and not os.path.exists(original_file_path):
+    is_local_path = isinstance(original_file_path, str) and not original_file_path.startswith(('http://', 'https://'))
+    if is_local_path and not os.path.exists(original_file_path):
         error_msg = f"Original file not found: {original_file_path}"
         logger.error(error_msg)
         result["errors"].append(error_msg)
         return result
     
     # トランスレーターを初期化
-    translator = PPTXTranslator(original_file_path)
+    translator = PPTXTranslator(original_file_path, download_cache_dir, fit_text, language=language)
     
     # プレゼンテーションを読み込む
     if not translator.load_presentation():
         result["errors"] = translator.error_log
-        return result
+        return translator.metrics.attach(result)
+    if translator.download_status:
+        result["download"] = translator.download_status
     
     # 翻訳処理を実行
-    success, replacements = translator.translate(edited_slides_data)
+    success, replacements = translator.translate(_edited_slides(edited_slides_data))
     result["replacements"] = replacements
+    result["fitted"] = translator.fitted_count
     
     if not success:
         result["errors"] = translator.error_log
-        return result
+        return translator.metrics.attach(result)
     
     # ファイルを保存
     if translator.save(output_path):
         result["success"] = True
-        result["output"] = output_path
+        result["output"] = output_path if isinstance(output_path, str) else None
+        result["save_mode"] = translator.save_mode
         
         # 出力ファイルのサイズを確認
-        if os.path.exists(output_path):
+        file_size = None
+        if not isinstance(output_path, str):
+            output_path.seek(0, os.SEEK_END)
+            file_size = output_path.tell()
+        elif os.path.exists(output_path):
             file_size = os.path.getsize(output_path)
+        if file_size is not None:
             result["file_size"] = file_size
             logger.info(f"Output file size: {file_size:,} bytes")
     else:
         result["errors"] = translator.error_log
     
+    translator.cleanup_temp_file()
+    if translator.remote_stats:
+        result["remote"] = translator.remote_stats
+    
     # 警告やエラーがあれば追加
     if translator.error_log:
         result["warnings"] = translator.error_log
     
+    return translator.metrics.attach(result)
+
+def generate_translated_pptx_multi(
+    original_file_path: str,
+    edited_slides_by_lang: Dict[str, List[Dict]],
+    output_template: str,
+    download_cache_dir: Optional[str] = None,
+    fit_text: bool = True
+) -> Dict[str, Any]:
+    """
+    1つの元ファイルから複数言語の翻訳済みPPTXを生成する
+    元ファイルのダウンロードと読み込みは1回だけ行い、言語ごとに翻訳前のスライドへ戻して再利用する
+    
+    Args:
+        original_file_path: 元のPPTXファイルのパス（URLも可）
+        edited_slides_by_lang: 言語コードをキーにした編集済みスライドデータ（言語コードはフォントの判定にも使う）
+        output_template: 出力ファイルのパス（"{lang}" が言語コードに置き換わる）
+        download_cache_dir: URLのダウンロードキャッシュのディレクトリ（Noneならキャッシュしない）
+        fit_text: 訳文が枠からあふれるテキストフレームのフォントサイズを縮小するか
+    
+    Returns:
+        言語ごとの置換数・所要時間を含む辞書
+    """
+    result = {
+        "success": False,
+        "languages": {},
+        "errors": []
+    }
+    
+    if '{lang}' not in output_template:
+        result["errors"].append("Output path must contain {lang}")
+        return result
+    
+    if not original_file_path.startswith(('http://', 'https://')) and not os.path.exists(original_file_path):
+        error_msg = f"Original file not found: {original_file_path}"
+        logger.error(error_msg)
+        result["errors"].append(error_msg)
+        return result
+    
+    translator = PPTXTranslator(original_file_path, download_cache_dir, fit_text)
+    
+    # 読み込みは1回だけ
+    started = time.perf_counter()
+    if not translator.load_presentation():
+        result["errors"] = translator.error_log
+        return result
+    translator.snapshot()
+    result["load_seconds"] = round(time.perf_counter() - started, 4)
+    translator.metrics.attach(result)
+    
+    try:
+        for lang, edited_slides_data in edited_slides_by_lang.items():
+            started = time.perf_counter()
+            output_path = output_template.replace('{lang}', lang)
+            lang_result = {
+                "success": False,
+                "output": None,
+                "replacements": 0,
+                "errors": []
+            }
+            logger.info(f"Generating {lang}: {output_path}")
+            translator.metrics = new_metrics()
+            translator.set_language(lang)
+            
+            success, replacements = translator.translate(_edited_slides(edited_slides_data))
+            lang_result["replacements"] = replacements
+            lang_result["fitted"] = translator.fitted_count
+            
+            if success and translator.save(output_path, cleanup=False):
+                lang_result["success"] = True
+                lang_result["output"] = output_path
+                lang_result["save_mode"] = translator.save_mode
+                if os.path.exists(output_path):
+                    lang_result["file_size"] = os.path.getsize(output_path)
+            
+            # 1つの言語の失敗で他の言語を止めない
+            lang_result["errors"] = translator.error_log
+            lang_result["seconds"] = round(time.perf_counter() - started, 4)
+            translator.metrics.attach(lang_result)
+            result["languages"][lang] = lang_result
+            
+            # 次の言語のために翻訳前の状態に戻す
+            translator.reset()
+    finally:
+        translator.cleanup_temp_file()
+    
+    result["success"] = bool(result["languages"]) and all(
+        lang_result["success"] for lang_result in result["languages"].values()
+    )
     return result
 
+def _edited_slides(translation_data) -> List[Dict]:
+    """
+    翻訳データからスライドの配列を取り出す（slidesキーがある場合はその中身、
+    文字列テーブルの番号で指定した翻訳は出現箇所ごとに展開）
+    """
+    if is_string_keyed(translation_data):
+        return to_edited_slides(translation_data)
+    if isinstance(translation_data, dict) and 'slides' in translation_data:
+        return translation_data['slides']
+    return translation_data
+
+def main_stdio():
+    """
+    標準入出力モード
+    入力: PPTXのフレーム + 翻訳データJSONのフレーム
+    出力: 結果JSONのフレーム + （成功時）翻訳後PPTXのフレーム
+    ログは標準エラー出力に出るので標準出力のフレームとは混ざらない
+    """
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    
+    def fail(error: str):
+        write_frame(stdout, json.dumps({"success": False, "error": error}, ensure_ascii=False).encode('utf-8'))
+        sys.exit(1)
+    
+    try:
+        deck = read_frame(stdin)
+        translations_frame = read_frame_bytes(stdin) if deck is not None else None
+    except EOFError as e:
+        fail(str(e))
+    if deck is None or translations_frame is None:
+        fail("Expected a PPTX frame and a translations JSON frame on stdin")
+    
+    try:
+        edited_slides = _edited_slides(json.loads(translations_frame.decode('utf-8')))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        fail(f"Invalid JSON: {str(e)}")
+    
+    output = new_payload()
+    result = generate_translated_pptx(deck, edited_slides, output)
+    write_frame(stdout, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+    if not result["success"]:
+        sys.exit(1)
+    write_frame_from(stdout, output)
+
+def run_manifest_job(job: Dict[str, Any], download_cache_dir: Optional[str] = None,
+                     fit_text: bool = True) -> Dict[str, Any]:
+    """
+    マニフェストの1ジョブを実行する（ワーカープロセスで呼ばれる）
+    
+    Args:
+        job: "input" と "output" に加えて、"translations"（翻訳データJSONファイルパス）、
+             "slides"（翻訳データ）、"languages"（言語コードをキーにした翻訳データ）のいずれか。
+             "fit_text" を指定するとそのジョブだけ引数の fit_text より優先する。
+             "language"（翻訳先の言語コード）は "languages" 以外のジョブでフォントの判定に使う
+        download_cache_dir: URLのダウンロードキャッシュのディレクトリ（Noneならキャッシュしない）
+        fit_text: 訳文が枠からあふれるテキストフレームのフォントサイズを縮小するか
+    
+    Returns:
+        結果を含む辞書（例外も結果に変換し、他のジョブに影響させない）
+    """
+    try:
+        fit_text = bool(job.get('fit_text', fit_text))
+        if 'languages' in job:
+            languages = job['languages']
+            if isinstance(languages, str):
+                with open(languages, 'r', encoding='utf-8') as f:
+                    languages = json.load(f)
+            return generate_translated_pptx_multi(job['input'], languages, job['output'], download_cache_dir, fit_text)
+        
+        if 'slides' in job:
+            translation_data = job['slides']
+        else:
+            with open(job['translations'], 'r', encoding='utf-8') as f:
+                translation_data = json.load(f)
+        return generate_translated_pptx(job['input'], _edited_slides(translation_data), job['output'], download_cache_dir,
+                                        fit_text, job.get('language'))
+        
+    except KeyError as e:
+        return {"success": False, "error": f"Missing job field: {e.args[0]}"}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }
+
+def read_manifest(manifest_path: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """マニフェスト（JSON Lines）を1行ずつ読む。(行番号, ジョブ, エラー) を返す"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(job, dict):
+                yield line_no, None, "Job must be a JSON object"
+                continue
+            yield line_no, job, None
+
+class ManifestWriter:
+    """マニフェストの結果を1ジョブ1行で書き出し、成否を集計する"""
+    
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.summary = {"total": 0, "succeeded": 0, "failed": 0}
+    
+    def emit(self, line_no: int, job: Optional[Dict[str, Any]], result: Dict[str, Any]):
+        """1ジョブの結果を書き出す"""
+        record = {"line": line_no}
+        if job and 'id' in job:
+            record["id"] = job['id']
+        record.update(result)
+        self.out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.out.flush()
+        self.summary["total"] += 1
+        self.summary["succeeded" if result.get("success") else "failed"] += 1
+    
+    def finish(self) -> Dict[str, int]:
+        """集計を返す"""
+        logger.info(f"Manifest finished: {self.summary['succeeded']}/{self.summary['total']} jobs succeeded")
+        return self.summary
+
+def run_manifest(manifest_path: str, workers: int, out=None,
+                 download_cache_dir: Optional[str] = None, fit_text: bool = True) -> Dict[str, int]:
+    """
+    マニフェストの全ジョブをプロセスプールで実行し、終わったジョブから1行ずつ結果を書き出す
+    
+    Args:
+        manifest_path: ジョブを1行1件で記述したJSON Linesファイルのパス
+        workers: ワーカープロセス数
+        out: 結果の書き出し先（省略時は標準出力）
+        download_cache_dir: URLのダウンロードキャッシュのディレクトリ（Noneならキャッシュしない）
+        fit_text: 訳文が枠からあふれるテキストフレームのフォントサイズを縮小するか（ジョブの "fit_text" が優先）
+    
+    Returns:
+        ジョブ数の集計（total / succeeded / failed）
+    """
+    writer = ManifestWriter(out)
+    emit = writer.emit
+    
+    def collect(executor, return_when):
+        """終わったジョブの結果を書き出す（ワーカーが落ちたらプールを作り直す）"""
+        done, _ = wait(pending, return_when=return_when)
+        broken = False
+        for future in done:
+            line_no, job, submitted_to = pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # 壊れたプールのジョブは複数回の collect に分かれて返ることがあるので、
+                # 作り直すのは現在のプールが壊れたときだけ（作り直した新しいプールは捨てない）
+                broken = broken or submitted_to is executor
+                result = {"success": False, "error": f"Worker process terminated: {str(e)}"}
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            emit(line_no, job, result)
+        if broken:
+            executor.shutdown(wait=False)
+            executor = ProcessPoolExecutor(max_workers=workers)
+        return executor
+    
+    def submit(executor, line_no, job):
+        """ジョブを投入する（結果を回収する前にプールが壊れていたら作り直してから投入する）"""
+        try:
+            future = executor.submit(run_manifest_job, job, download_cache_dir, fit_text)
+        except BrokenProcessPool:
+            executor.shutdown(wait=False)
+            executor = ProcessPoolExecutor(max_workers=workers)
+            future = executor.submit(run_manifest_job, job, download_cache_dir, fit_text)
+        pending[future] = (line_no, job, executor)
+        return executor
+    
+    # マニフェストが大きくてもメモリを使いすぎないよう、投入済みのジョブ数を制限する
+    max_pending = workers * 2
+    pending = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for line_no, job, error in read_manifest(manifest_path):
+            if error:
+                emit(line_no, job, {"success": False, "error": error})
+                continue
+            while len(pending) >= max_pending:
+                executor = collect(executor, FIRST_COMPLETED)
+            executor = submit(executor, line_no, job)
+        while pending:
+            executor = collect(executor, FIRST_COMPLETED)
+    finally:
+        executor.shutdown()
+    
+    return writer.finish()
+
+def main_languages(input_path: str, languages_path: str, output_template: str,
+                   download_cache_dir: Optional[str] = None, fit_text: bool = True):
+    """多言語モード（言語コードをキーにした翻訳データから言語ごとのPPTXを生成）"""
+    try:
+        with open(languages_path, 'r', encoding='utf-8') as f:
+            languages_data = json.load(f)
+        if not isinstance(languages_data, dict):
+            raise ValueError("Languages JSON must be an object keyed by language code")
+        
+        result = generate_translated_pptx_multi(input_path, languages_data, output_template, download_cache_dir, fit_text)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(0 if result["success"] else 1)
+        
+    except (json.JSONDecodeError, ValueError) as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid JSON: {str(e)}"
+        }, ensure_ascii=False))
+        sys.exit(1)
+
 def main():
     """
     メイン処理
     コマンドライン引数：
         --input: 元のPPTXファイルパス（URLも可）
         --translations: 翻訳データJSONファイルパス
-        --output: 出力ファイルパス
+        --output: 出力ファイルパス（--languages の場合は "{lang}" を含める）
+        --languages: 言語コードをキーにした翻訳データJSONファイルパス（1回の読み込みで全言語を出力）
+        --stdio: PPTXと翻訳データを標準入力から読み、結果と翻訳後PPTXを標準出力に書く
+                 （長さプレフィックス付きフレーム。一時ファイルを経由しない）
+        --manifest: ジョブを1行1件で記述したJSON Linesファイルパス（1プロセスで多数のデッキを生成）
+        --workers: --manifest のワーカープロセス数
+        --pipeline: --manifest のジョブをasyncioパイプラインで実行（ダウンロードと翻訳・保存を重ね合わせる）
+        --fetch-concurrency: --pipeline で同時にダウンロードするジョブ数
+        --download-cache-dir: URLのダウンロードキャッシュのディレクトリ（ETag / Last-Modified で再検証）
+        --no-fit: 訳文が枠からあふれてもフォントサイズを縮小しない
+        --language: 翻訳先の言語コード（--translations の場合。"zh" なら漢字だけの訳文に中国語のフォントを使う）
+        --metrics: フェーズごとの所要時間・カウンターを結果の "metrics" に出力
+        --profile-memory: フェーズごとのメモリ（tracemalloc・RSS・確保の多い行）を結果の "metrics" に出力
+        --profile-cpu: CPUをサンプリングし、collapsed stack 形式（flamegraph の入力）で書き出すファイルパス
+                       （--manifest のワーカープロセスは対象外）
     """
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate translated PPTX file')
-    parser.add_argument('--input', required=True, help='Input PPTX file path or URL')
-    parser.add_argument('--translations', required=True, help='Translation data JSON file path')
-    parser.add_argument('--output', required=True, help='Output PPTX file path')
+    parser.add_argument('--input', help='Input PPTX file path or URL')
+    parser.add_argument('--translations', help='Translation data JSON file path')
+    parser.add_argument('--output', help='Output PPTX file path ({lang} is replaced with the language code when --languages is given)')
+    parser.add_argument('--languages', help='JSON file mapping language codes to translation data; parses the input once and writes one output per language')
+    parser.add_argument('--stdio', action='store_true', help='Exchange the PPTX and translations over stdin/stdout as length-prefixed frames')
+    parser.add_argument('--manifest', help='JSON Lines file with one job per line; prints one JSON result line per finished job')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes for --manifest')
+    parser.add_argument('--pipeline', action='store_true', help='Run --manifest jobs through an asyncio pipeline that overlaps downloads with processing')
+    parser.add_argument('--fetch-concurrency', type=int, default=4, help='Concurrent downloads for --pipeline')
+    parser.add_argument('--download-cache-dir', default=os.environ.get('PPTX_DOWNLOAD_CACHE_DIR'), help='Cache directory for URL inputs (revalidated with ETag/Last-Modified)')
+    parser.add_argument('--language', help='Target language code for --translations (e.g. zh-CN); picks Chinese rather than Japanese fonts for Han-only text')
+    parser.add_argument('--no-fit', dest='fit_text', action='store_false', help='Keep the original font sizes even when a translation overflows its text frame')
+    parser.add_argument('--metrics', action='store_true', help='Add per-phase timings and element counters to the result as "metrics"')
+    parser.add_argument('--profile-memory', action='store_true', help='Report tracemalloc/RSS peaks and top allocation sites per phase in the result metrics')
+    parser.add_argument('--profile-cpu', metavar='PATH', default=os.environ.get(PROFILE_CPU_ENV), help='Sample the CPU while running and write collapsed stacks (flamegraph input) to PATH')
     
     args = parser.parse_args()
     
+    if args.metrics:
+        enable_metrics()
+    if args.profile_memory:
+        enable_memory_profiling()
+    start_cpu_profile(args.profile_cpu)
+    if args.stdio:
+        main_stdio()
+        return
+    if args.manifest:
+        if args.workers < 1 or args.fetch_concurrency < 1:
+            parser.error('--workers and --fetch-concurrency must be at least 1')
+        try:
+            if args.pipeline:
+                from pipeline import run_manifest_pipeline
+                summary = run_manifest_pipeline(args.manifest, args.workers, download_cache_dir=args.download_cache_dir,
+                                                fetch_concurrency=args.fetch_concurrency, fit_text=args.fit_text)
+            else:
+                summary = run_manifest(args.manifest, args.workers, download_cache_dir=args.download_cache_dir,
+                                       fit_text=args.fit_text)
+        except OSError as e:
+            print(json.dumps({
+                "success": False,
+                "error": f"Failed to read manifest: {str(e)}"
+            }, ensure_ascii=False))
+            sys.exit(1)
+        sys.exit(0 if summary["failed"] == 0 else 1)
+    if args.languages:
+        if not (args.input and args.output):
+            parser.error('--input and --output are required with --languages')
+        main_languages(args.input, args.languages, args.output, args.download_cache_dir, args.fit_text)
+        return
+    if not (args.input and args.translations and args.output):
+        parser.error('--input, --translations and --output are required unless --stdio is given')
+    
     try:
         # JSONデータを読み込む
         with open(args.translations, 'r', encoding='utf-8') as f:
             translation_data = json.load(f)
         
         # slidesキーがある場合はその中身を使用
-        if 'slides' in translation_data:
-            edited_slides = translation_data['slides']
-        else:
-            edited_slides = translation_data
+        edited_slides = _edited_slides(translation_data)
         
         # PPTXファイルを生成
-        result = generate_translated_pptx(args.input, edited_slides, args.output)
+        result = generate_translated_pptx(args.input, edited_slides, args.output, args.download_cache_dir, args.fit_text,
+                                          args.language)
         
         # 結果を出力
         print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+マニフェストのジョブを重ね合わせて実行するasyncioパイプライン
+ダウンロード・一時ファイルの削除はイベントループ側（I/O用スレッド）で、
+python-pptxによる読み込み・置換・保存はプロセスプールで実行し、
+各段を上限付きキューでつないで前段が先行しすぎないようにする
+
+    マニフェスト → [取得] → キュー → [翻訳・保存（プロセスプール）] → キュー → [後処理・結果出力]
+
+各ジョブの結果の "timings" には段ごとの所要時間（"fetch" / "process"）と、
+パイプライン開始からの開始時刻（"fetch_started" / "process_started"）を秒で記録する
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from generate_pptx import ManifestWriter, logger, read_manifest, run_manifest_job
+from http_fetch import DOWNLOADED, DownloadCache, download
+
+# 同時にダウンロードするジョブ数のデフォルト
+DEFAULT_FETCH_CONCURRENCY = 4
+
+
+def _fetch_input(input_path: str, cache: Optional[DownloadCache]) -> Tuple[str, Optional[str]]:
+    """URLならローカルに取得する（I/O用スレッドで実行）。(ローカルパス, ダウンロード結果) を返す"""
+    if isinstance(input_path, str) and input_path.startswith(('http://', 'https://')):
+        return download(input_path, cache)
+    return input_path, None
+
+
+def _remove_file(path: str):
+    """一時ファイルを削除（I/O用スレッドで実行）"""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+async def _run_pipeline(manifest_path: str, workers: int, writer: ManifestWriter,
+                        download_cache_dir: Optional[str], fetch_concurrency: int, fit_text: bool):
+    """パイプライン本体"""
+    loop = asyncio.get_running_loop()
+    origin = time.perf_counter()
+    cache = DownloadCache(download_cache_dir) if download_cache_dir else None
+
+    # 各段の間のキュー（上限で背圧をかける）
+    fetch_queue: asyncio.Queue = asyncio.Queue(maxsize=fetch_concurrency)
+    process_queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    done_queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+
+    pools = {"process": ProcessPoolExecutor(max_workers=workers)}
+    io_pool = ThreadPoolExecutor(max_workers=fetch_concurrency)
+
+    async def produce():
+        for item in read_manifest(manifest_path):
+            await fetch_queue.put(item)
+        for _ in range(fetch_concurrency):
+            await fetch_queue.put(None)
+
+    async def fetch():
+        while True:
+            item = await fetch_queue.get()
+            if item is None:
+                return
+            line_no, job, error = item
+            if error:
+                await done_queue.put((line_no, job, {"success": False, "error": error}, None))
+                continue
+
+            started = time.perf_counter()
+            try:
+                local_path, status = await loop.run_in_executor(io_pool, _fetch_input, job.get('input'), cache)
+            except Exception as e:
+                result = {"success": False, "error": f"Failed to download file from URL: {str(e)}"}
+                await done_queue.put((line_no, job, result, None))
+                continue
+            timings = {"fetch_started": round(started - origin, 4), "fetch": round(time.perf_counter() - started, 4)}
+            await process_queue.put((line_no, job, local_path, status, timings))
+
+    async def process():
+        while True:
+            item = await process_queue.get()
+            if item is None:
+                return
+            line_no, job, local_path, status, timings = item
+
+            # ワーカーにはダウンロード済みのローカルパスを渡す（ワーカー内でネットワークを待たない）
+            local_job = dict(job, input=local_path) if status else job
+            pool = pools["process"]
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(pool, run_manifest_job, local_job, None, fit_text)
+            except BrokenProcessPool as e:
+                # ワーカーが落ちたらプールを作り直して次のジョブに進む
+                # （実行中の全ジョブが同じ例外を受け取るので、作り直すのは壊れたプールごとに1回だけ）
+                if pools["process"] is pool:
+                    pool.shutdown(wait=False)
+                    pools["process"] = ProcessPoolExecutor(max_workers=workers)
+                result = {"success": False, "error": f"Worker process terminated: {str(e)}"}
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            timings["process_started"] = round(started - origin, 4)
+            timings["process"] = round(time.perf_counter() - started, 4)
+
+            if status:
+                result["download"] = status
+            result["timings"] = timings
+            cleanup_path = local_path if status == DOWNLOADED else None
+            await done_queue.put((line_no, job, result, cleanup_path))
+
+    # 結果の書き出しに失敗した例外（途中で止めると前段が done_queue で待ち続けるため、最後まで受け取ってから送出する）
+    emit_errors = []
+
+    async def finish():
+        while True:
+            item = await done_queue.get()
+            if item is None:
+                return
+            line_no, job, result, cleanup_path = item
+            if cleanup_path:
+                await loop.run_in_executor(io_pool, _remove_file, cleanup_path)
+            try:
+                writer.emit(line_no, job, result)
+            except Exception as e:
+                logger.error(f"Failed to write the result of line {line_no}: {str(e)}")
+                emit_errors.append(e)
+
+    try:
+        finisher = asyncio.create_task(finish())
+        fetchers = [asyncio.create_task(fetch()) for _ in range(fetch_concurrency)]
+        processors = [asyncio.create_task(process()) for _ in range(workers)]
+
+        await produce()
+        await asyncio.gather(*fetchers)
+        for _ in range(workers):
+            await process_queue.put(None)
+        await asyncio.gather(*processors)
+        await done_queue.put(None)
+        await finisher
+    finally:
+        pools["process"].shutdown()
+        io_pool.shutdown()
+    if emit_errors:
+        raise emit_errors[0]
+
+
+def run_manifest_pipeline(manifest_path: str, workers: int, out=None,
+                          download_cache_dir: Optional[str] = None,
+                          fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+                          fit_text: bool = True) -> Dict[str, int]:
+    """
+    マニフェストの全ジョブをパイプラインで実行し、終わったジョブから1行ずつ結果を書き出す
+    （ダウンロード待ちの間も他のジョブの翻訳・保存を進める）
+
+    Args:
+        manifest_path: ジョブを1行1件で記述したJSON Linesファイルのパス
+        workers: 翻訳・保存を行うワーカープロセス数
+        out: 結果の書き出し先（省略時は標準出力）
+        download_cache_dir: URLのダウンロードキャッシュのディレクトリ（Noneならキャッシュしない）
+        fetch_concurrency: 同時にダウンロードするジョブ数
+        fit_text: 訳文が枠からあふれるテキストフレームのフォントサイズを縮小するか（ジョブの "fit_text" が優先）
+
+    Returns:
+        ジョブ数の集計（total / succeeded / failed）
+
+    Raises:
+        結果の書き出しに失敗した場合、全ジョブを処理したあとに最初の例外を送出する
+    """
+    writer = ManifestWriter(out)
+    logger.info(f"Running manifest pipeline with {workers} workers and {fetch_concurrency} fetchers")
+    asyncio.run(_run_pipeline(manifest_path, workers, writer, download_cache_dir, fetch_concurrency, fit_text))
+    return writer.finish()
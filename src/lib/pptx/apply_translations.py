@@ -4,29 +4,149 @@
 import json
 import sys
 import os
+from collections import defaultdict
 from pptx import Presentation
 from typing import Dict, List, Any
 
-def apply_translations_to_pptx(input_path: str, output_path: str, translations_json: str) -> Dict[str, Any]:
+from cpu_profile import start_cpu_profile, take_cpu_profile_flag
+from incremental_save import save_presentation
+from metrics import BYTES_IN, BYTES_OUT, CELLS, RUNS, SHAPES, SLIDES, new_metrics, take_profile_flags
+from stdio_frames import new_payload, read_frame, read_frame_bytes, write_frame, write_frame_from
+from string_table import is_string_keyed, to_apply_translations
+from text_index import KIND_CELL, KIND_SHAPE, TextIndex, TextNode
+
+def _apply_to_shape(shape, translated_text: str):
+    """シェイプのテキストを置換（最初のrunのフォントを保持）"""
+    # フォーマットを保持するため、最初の段落のフォーマットを維持
+    if shape.text_frame.paragraphs:
+        # 元のフォーマットを保存
+        first_paragraph = shape.text_frame.paragraphs[0]
+        if first_paragraph.runs:
+            # フォント設定を保存
+            font_name = first_paragraph.runs[0].font.name
+            font_size = first_paragraph.runs[0].font.size
+            font_bold = first_paragraph.runs[0].font.bold
+            font_italic = first_paragraph.runs[0].font.italic
+            
+            # テキストを置換
+            shape.text = translated_text
+            
+            # フォーマットを復元（可能な場合）
+            if shape.text_frame.paragraphs[0].runs:
+                run = shape.text_frame.paragraphs[0].runs[0]
+                if font_name:
+                    run.font.name = font_name
+                if font_size:
+                    run.font.size = font_size
+                if font_bold is not None:
+                    run.font.bold = font_bold
+                if font_italic is not None:
+                    run.font.italic = font_italic
+        else:
+            # 単純に置換
+            shape.text = translated_text
+    else:
+        shape.text = translated_text
+
+def _apply_to_cell(cell, translated_text: str):
+    """テーブルセルのテキストを置換（各段落の最初のrunのフォントを保持）"""
+    # 元のフォーマットを保存
+    original_font_properties = []
+    if cell.text_frame and cell.text_frame.paragraphs:
+        for paragraph in cell.text_frame.paragraphs:
+            para_props = []
+            for run in paragraph.runs:
+                # フォント色の安全な取得
+                font_color = None
+                try:
+                    if run.font.color and hasattr(run.font.color, 'rgb'):
+                        font_color = run.font.color.rgb
+                except:
+                    font_color = None
+                
+                para_props.append({
+                    'font_name': run.font.name,
+                    'font_size': run.font.size,
+                    'font_bold': run.font.bold,
+                    'font_italic': run.font.italic,
+                    'font_color': font_color
+                })
+            if para_props:  # 少なくとも1つのrunがある場合のみ保存
+                original_font_properties.append(para_props[0])  # 段落の最初のrunのプロパティを保存
+    
+    # テキストを置換
+    cell.text = translated_text
+    
+    # フォーマットを復元
+    if original_font_properties and cell.text_frame and cell.text_frame.paragraphs:
+        for i, paragraph in enumerate(cell.text_frame.paragraphs):
+            if i < len(original_font_properties) and paragraph.runs:
+                props = original_font_properties[i]
+                for run in paragraph.runs:
+                    if props['font_name']:
+                        run.font.name = props['font_name']
+                    if props['font_size']:
+                        run.font.size = props['font_size']
+                    if props['font_bold'] is not None:
+                        run.font.bold = props['font_bold']
+                    if props['font_italic'] is not None:
+                        run.font.italic = props['font_italic']
+                    if props['font_color']:
+                        try:
+                            run.font.color.rgb = props['font_color']
+                        except:
+                            pass  # フォント色の設定に失敗した場合はスキップ
+
+def build_text_node_map(nodes: List[TextNode]) -> Dict[str, List[TextNode]]:
+    """
+    正規化した元テキストからテキストノードへのマルチマップを作成
+    
+    Args:
+        nodes: スライドのテキストノード（文書順）
+        
+    Returns:
+        元テキスト（前後の空白を除去）をキーに、文書順のノードリストを持つ辞書
+    """
+    text_node_map: Dict[str, List[TextNode]] = defaultdict(list)
+    for node in nodes:
+        # 空のセルはスキップ
+        if node.kind in (KIND_SHAPE, KIND_CELL) and node.text:
+            text_node_map[node.text].append(node)
+    return text_node_map
+
+def apply_translations_to_pptx(input_path: str, output_path: str, translations_json: str, metrics=None) -> Dict[str, Any]:
     """
     PowerPointファイルに翻訳文を適用
     
     Args:
-        input_path: 入力PPTXファイルのパス
-        output_path: 出力PPTXファイルのパス
+        input_path: 入力PPTXファイルのパス（またはシーク可能なファイルオブジェクト）
+        output_path: 出力PPTXファイルのパス（または書き込み先のファイルオブジェクト）
         translations_json: 翻訳データのJSON文字列
+        metrics: フェーズごとの所要時間・カウンターの記録先（Noneなら環境変数 PPTX_METRICS に従って作成）
         
     Returns:
-        処理結果を含む辞書
+        処理結果を含む辞書（計測が有効なら "metrics" を含む）
     """
+    if metrics is None:
+        metrics = new_metrics()
+    
     try:
         # 翻訳データをパース
-        translations_data = json.loads(translations_json)
+        with metrics.phase('parse'):
+            translations_data = json.loads(translations_json)
+            # 文字列テーブルの番号で指定した翻訳は出現箇所ごとに展開
+            if is_string_keyed(translations_data):
+                translations_data = to_apply_translations(translations_data)
         
         # PowerPointファイルを開く
-        prs = Presentation(input_path)
+        metrics.count_size(BYTES_IN, input_path)
+        with metrics.phase('load'):
+            prs = Presentation(input_path)
+        with metrics.phase('index'):
+            index = TextIndex(prs, include_notes=False)
         
         applied_count = 0
+        dirty_parts = set()  # 変更したスライドのパート名（差分保存用）
         
         # 各スライドの処理
         for slide_data in translations_data.get('slides', []):
@@ -36,150 +156,73 @@ def apply_translations_to_pptx(input_path: str, output_path: str, translations_j
             if slide_number <= 0 or slide_number > len(prs.slides):
                 continue
                 
-            slide = prs.slides[slide_number - 1]
             translations = slide_data.get('translations', [])
+            metrics.count(SLIDES)
             
-            # シェイプとテキストのマッピングを作成
-            shape_text_map = []
-            for shape in slide.shapes:
-                if hasattr(shape, 'text_frame') and shape.has_text_frame and shape.text.strip():
-                    shape_text_map.append({
-                        'shape': shape,
-                        'original_text': shape.text.strip(),
-                        'type': 'text'
-                    })
-                elif shape.has_table:
-                    # テーブルの各セルを個別に管理
-                    table_cells = []
-                    for row_idx, row in enumerate(shape.table.rows):
-                        for col_idx, cell in enumerate(row.cells):
-                            cell_text = cell.text.strip()
-                            if cell_text:  # 空のセルはスキップ
-                                table_cells.append({
-                                    'cell': cell,
-                                    'original_text': cell_text,
-                                    'row': row_idx,
-                                    'col': col_idx
-                                })
-                    shape_text_map.append({
-                        'shape': shape,
-                        'table_cells': table_cells,
-                        'type': 'table'
-                    })
+            # 元テキストごとに未適用のノードを文書順に保持する
+            text_node_map = build_text_node_map(index.slide_nodes(slide_number - 1))
+            next_positions: Dict[str, int] = {}
+            consumed_ids = set()  # 適用先に決まったノード（1つのノードには1件の翻訳だけを適用する）
+            matched = []  # (ノード, 翻訳テキスト)
+            text_matched = []  # (元テキスト, 翻訳テキスト)
             
-            # 各翻訳を適用
+            # ロケーターで位置を指定した翻訳を先に対応付け、テキストの照合ではそのノードを使わない
             for translation in translations:
                 original_text = translation.get('original', '').strip()
                 translated_text = translation.get('translated', '').strip()
+                if not translated_text:
+                    continue
                 
-                if not translated_text or not original_text:
+                node = index.find(translation.get('locator'))
+                if node is not None:
+                    if node.node_id not in consumed_ids:
+                        consumed_ids.add(node.node_id)
+                        matched.append((node, translated_text))
+                elif original_text:
+                    # ロケーターがなければ（解決できなければ）元テキストで照合する
+                    text_matched.append((original_text, translated_text))
+            
+            # 同じテキストが複数あれば文書順に1対1で対応付ける
+            for original_text, translated_text in text_matched:
+                candidates = text_node_map.get(original_text, ())
+                position = next_positions.get(original_text, 0)
+                while position < len(candidates) and candidates[position].node_id in consumed_ids:
+                    position += 1
+                next_positions[original_text] = position + 1
+                # ノードを使い切った余りの翻訳は適用しない（適用済みのノードを上書きしない）
+                if position >= len(candidates):
                     continue
+                node = candidates[position]
+                consumed_ids.add(node.node_id)
+                matched.append((node, translated_text))
+            
+            for node, translated_text in matched:
+                with metrics.phase('apply'):
+                    if node.kind == KIND_SHAPE:
+                        _apply_to_shape(node.shape, translated_text)
+                        metrics.count(SHAPES)
+                    else:
+                        _apply_to_cell(node.cell, translated_text)
+                        metrics.count(CELLS)
+                # テキストの設定で段落（改行）ごとに1つのランが作られる
+                metrics.count(RUNS, translated_text.count('\n') + 1)
                 
-                # 一致するシェイプを探す
-                for shape_info in shape_text_map:
-                    if shape_info['type'] == 'text':
-                        # テキストが一致する場合
-                        if shape_info['original_text'] == original_text:
-                            shape = shape_info['shape']
-                            # フォーマットを保持するため、最初の段落のフォーマットを維持
-                            if shape.text_frame.paragraphs:
-                                # 元のフォーマットを保存
-                                first_paragraph = shape.text_frame.paragraphs[0]
-                                if first_paragraph.runs:
-                                    # フォント設定を保存
-                                    font_name = first_paragraph.runs[0].font.name
-                                    font_size = first_paragraph.runs[0].font.size
-                                    font_bold = first_paragraph.runs[0].font.bold
-                                    font_italic = first_paragraph.runs[0].font.italic
-                                    
-                                    # テキストを置換
-                                    shape.text = translated_text
-                                    
-                                    # フォーマットを復元（可能な場合）
-                                    if shape.text_frame.paragraphs[0].runs:
-                                        run = shape.text_frame.paragraphs[0].runs[0]
-                                        if font_name:
-                                            run.font.name = font_name
-                                        if font_size:
-                                            run.font.size = font_size
-                                        if font_bold is not None:
-                                            run.font.bold = font_bold
-                                        if font_italic is not None:
-                                            run.font.italic = font_italic
-                                else:
-                                    # 単純に置換
-                                    shape.text = translated_text
-                            else:
-                                shape.text = translated_text
-                            
-                            applied_count += 1
-                            break
-                    
-                    elif shape_info['type'] == 'table':
-                        # テーブルセルの場合
-                        for cell_info in shape_info['table_cells']:
-                            if cell_info['original_text'] == original_text:
-                                cell = cell_info['cell']
-                                
-                                # 元のフォーマットを保存
-                                original_font_properties = []
-                                if cell.text_frame and cell.text_frame.paragraphs:
-                                    for paragraph in cell.text_frame.paragraphs:
-                                        para_props = []
-                                        for run in paragraph.runs:
-                                            # フォント色の安全な取得
-                                            font_color = None
-                                            try:
-                                                if run.font.color and hasattr(run.font.color, 'rgb'):
-                                                    font_color = run.font.color.rgb
-                                            except:
-                                                font_color = None
-                                            
-                                            para_props.append({
-                                                'font_name': run.font.name,
-                                                'font_size': run.font.size,
-                                                'font_bold': run.font.bold,
-                                                'font_italic': run.font.italic,
-                                                'font_color': font_color
-                                            })
-                                        if para_props:  # 少なくとも1つのrunがある場合のみ保存
-                                            original_font_properties.append(para_props[0])  # 段落の最初のrunのプロパティを保存
-                                
-                                # テキストを置換
-                                cell.text = translated_text
-                                
-                                # フォーマットを復元
-                                if original_font_properties and cell.text_frame and cell.text_frame.paragraphs:
-                                    for i, paragraph in enumerate(cell.text_frame.paragraphs):
-                                        if i < len(original_font_properties) and paragraph.runs:
-                                            props = original_font_properties[i]
-                                            for run in paragraph.runs:
-                                                if props['font_name']:
-                                                    run.font.name = props['font_name']
-                                                if props['font_size']:
-                                                    run.font.size = props['font_size']
-                                                if props['font_bold'] is not None:
-                                                    run.font.bold = props['font_bold']
-                                                if props['font_italic'] is not None:
-                                                    run.font.italic = props['font_italic']
-                                                if props['font_color']:
-                                                    try:
-                                                        run.font.color.rgb = props['font_color']
-                                                    except:
-                                                        pass  # フォント色の設定に失敗した場合はスキップ
-                                
-                                applied_count += 1
-                                break
+                dirty_parts.add(node.part_name)
+                # 従来どおり翻訳を書き込んだ箇所（ノード）の数を数える
+                applied_count += 1
         
-        # ファイルを保存
-        prs.save(output_path)
+        # ファイルを保存（変更していないパートは元のzipからそのままコピー）
+        with metrics.phase('save'):
+            save_mode = save_presentation(prs, output_path, input_path, dirty_parts)
+        metrics.count_size(BYTES_OUT, output_path)
         
-        return {
+        return metrics.attach({
             "success": True,
             "applied_count": applied_count,
-            "output_path": output_path,
+            "output_path": output_path if isinstance(output_path, str) else None,
+            "save_mode": save_mode,
             "message": f"翻訳を{applied_count}箇所に適用しました"
-        }
+        })
         
     except Exception as e:
         return {
@@ -188,17 +231,50 @@ def apply_translations_to_pptx(input_path: str, output_path: str, translations_j
             "message": f"翻訳の適用中にエラーが発生しました: {str(e)}"
         }
 
+def main_stdio():
+    """
+    標準入出力モード
+    入力: PPTXのフレーム + 翻訳JSONのフレーム
+    出力: 結果JSONのフレーム + （成功時）翻訳後PPTXのフレーム
+    """
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    
+    try:
+        deck = read_frame(stdin)
+        translations_frame = read_frame_bytes(stdin) if deck is not None else None
+    except EOFError as e:
+        deck, translations_frame = None, None
+        error = str(e)
+    else:
+        error = "Expected a PPTX frame and a translations JSON frame on stdin"
+    if deck is None or translations_frame is None:
+        write_frame(stdout, json.dumps({"success": False, "error": error}).encode('utf-8'))
+        sys.exit(1)
+    
+    output = new_payload()
+    result = apply_translations_to_pptx(deck, output, translations_frame.decode('utf-8'))
+    write_frame(stdout, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+    if not result["success"]:
+        sys.exit(1)
+    write_frame_from(stdout, output)
+
 def main():
-    if len(sys.argv) != 4:
+    argv = take_profile_flags(sys.argv[1:])
+    argv, profile_path = take_cpu_profile_flag(argv)
+    start_cpu_profile(profile_path)
+    if argv == ['--stdio']:
+        main_stdio()
+        return
+    
+    if len(argv) != 3:
         print(json.dumps({
             "success": False,
-            "error": "Usage: python apply_translations.py <input_pptx> <output_pptx> <translations_json_file>"
+            "error": "Usage: python apply_translations.py <input_pptx> <output_pptx> <translations_json_file> | --stdio [--metrics] [--profile-memory] [--profile-cpu <out.folded>]"
         }))
         sys.exit(1)
     
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
-    translations_json_path = sys.argv[3]
+    input_path, output_path, translations_json_path = argv
     
     # JSONファイルを読み込む
     try:
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+サンプリング方式のCPUプロファイラー
+一定間隔で対象スレッドのスタックを取得し、flamegraph.pl / speedscope などで読める
+collapsed stack 形式（"関数;関数;関数 サンプル数" を1行ずつ）で出力する
+
+--profile-cpu 出力先（または環境変数 PPTX_PROFILE_CPU）を指定したときだけ動作し、
+指定しない場合はプロファイラーのスレッドも作らない
+"""
+
+import atexit
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 出力先のパスを指定する環境変数
+PROFILE_CPU_ENV = 'PPTX_PROFILE_CPU'
+PROFILE_CPU_FLAG = '--profile-cpu'
+
+# サンプリング間隔（秒）
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(code, labels: Dict[Any, str]) -> str:
+    """スタックの1段の表示（"関数名 (ファイル:行)"、コードオブジェクトごとにキャッシュ）"""
+    label = labels.get(code)
+    if label is None:
+        name = getattr(code, 'co_qualname', code.co_name)
+        filename = '/'.join(code.co_filename.replace('\\', '/').rsplit('/', 2)[-2:])
+        # collapsed stack 形式の区切り文字は使えないので置き換える
+        label = labels[code] = f"{name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+    return label
+
+
+class SamplingProfiler:
+    """別スレッドから一定間隔で対象スレッドのスタックを数える"""
+
+    def __init__(self, thread_ids: Optional[Tuple[int, ...]] = None, interval: float = DEFAULT_INTERVAL):
+        """
+        コンストラクタ
+
+        Args:
+            thread_ids: 対象のスレッドID（Noneならプロファイラー以外の全スレッド）
+            interval: サンプリング間隔（秒）
+        """
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[Any, str] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='cpu-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if self.thread_ids is None else None
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                self.stacks[self._collapse(frame, names.get(thread_id) if names else None)] += 1
+            self.samples += 1
+
+    def _collapse(self, frame, thread_name: Optional[str]) -> str:
+        """フレームを外側から順に ";" でつなぐ（全スレッドが対象ならスレッド名を先頭に付ける）"""
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code, self._labels))
+            frame = frame.f_back
+        if thread_name is not None:
+            labels.append(f"thread {thread_name}")
+        return ';'.join(reversed(labels))
+
+    def collapsed(self) -> List[str]:
+        """collapsed stack 形式の行（サンプル数の多い順）"""
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.collapsed():
+                f.write(line + '\n')
+
+
+@contextmanager
+def profile_cpu(output_path: Optional[str], interval: float = DEFAULT_INTERVAL) -> Iterator[Optional[SamplingProfiler]]:
+    """
+    with ブロックを実行するスレッドをプロファイルし、終了時に output_path へ書き出す
+
+    Args:
+        output_path: collapsed stack の出力先（Noneなら何もしない）
+        interval: サンプリング間隔（秒）
+    """
+    if not output_path:
+        yield None
+        return
+    profiler = SamplingProfiler((threading.get_ident(),), interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write(output_path)
+
+
+def start_cpu_profile(output_path: Optional[str], interval: float = DEFAULT_INTERVAL) -> Optional[SamplingProfiler]:
+    """
+    コマンドライン用：プロセス終了まで全スレッドをプロファイルし、終了時に output_path へ書き出す
+    （sys.exit() で終了する場合も書き出す）
+
+    Args:
+        output_path: collapsed stack の出力先（Noneなら何もしない）
+        interval: サンプリング間隔（秒）
+
+    Returns:
+        開始したプロファイラー（output_path がNoneならNone）
+    """
+    if not output_path:
+        return None
+    profiler = SamplingProfiler(None, interval)
+    profiler.start()
+
+    def finish():
+        profiler.stop()
+        profiler.write(output_path)
+
+    atexit.register(finish)
+    return profiler
+
+
+def take_cpu_profile_flag(argv: List[str]) -> Tuple[List[str], Optional[str]]:
+    """
+    位置引数だけを受け取るスクリプト用に、引数から "--profile-cpu 出力先" を取り除く
+
+    Args:
+        argv: コマンドライン引数（sys.argv[1:]）
+
+    Returns:
+        (--profile-cpu を除いた引数, 出力先（指定がなければ環境変数 PPTX_PROFILE_CPU、なければNone）)
+    """
+    output_path = os.environ.get(PROFILE_CPU_ENV) or None
+    remaining = []
+    args = iter(argv)
+    for arg in args:
+        if arg == PROFILE_CPU_FLAG:
+            output_path = next(args, None)
+        elif arg.startswith(PROFILE_CPU_FLAG + '='):
+            output_path = arg.split('=', 1)[1]
+        else:
+            remaining.append(arg)
+    return remaining, output_path
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+抽出結果のコンテンツアドレス型ディスクキャッシュ
+入力ファイルのSHA-256と抽出器のバージョンをキーに、結果JSONをローカルディレクトリへ保存する
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+# デフォルトのキャッシュ上限（バイト）
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# ハッシュ計算時の読み込み単位
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 書き込みのたびにディレクトリを走査せず、推定サイズで判定する
+# （他のプロセスが同じディレクトリに書いた分を反映するため、この回数ごとに実際のサイズを数え直す）
+RESCAN_INTERVAL = 256
+
+
+def file_sha256(file_path) -> str:
+    """ファイル内容のSHA-256（大きなファイルでも一定メモリで計算、ファイルオブジェクトも可）"""
+    digest = hashlib.sha256()
+    if not isinstance(file_path, str):
+        file_path.seek(0)
+        for chunk in iter(lambda: file_path.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        file_path.seek(0)
+        return digest.hexdigest()
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """サイズ上限付きLRUの抽出結果キャッシュ"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        コンストラクタ
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+            max_bytes: キャッシュ全体のサイズ上限（超えたら古いものから削除）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.total_bytes: Optional[int] = None  # キャッシュ全体の推定サイズ（未走査ならNone）
+        self.puts_since_scan = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, file_path: str, version: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        キャッシュキーを生成
+
+        Args:
+            file_path: 入力ファイルのパス（またはファイルオブジェクト）
+            version: 抽出器のバージョン（出力形式が変わったら上げる）
+            options: 出力に影響するオプション
+
+        Returns:
+            キャッシュキー（16進文字列）
+        """
+        key_source = json.dumps({
+            "sha256": file_sha256(file_path),
+            "version": version,
+            "options": options or {}
+        }, sort_keys=True)
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        """キーに対応するファイルパス（先頭2文字でディレクトリを分ける）"""
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """キャッシュから結果を取得（なければNone）"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # LRUのためにアクセス時刻を更新
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """結果をアトミックに書き込み、上限を超えていれば古いエントリを削除"""
+        path = self._entry_path(key)
+        entry_dir = os.path.dirname(path)
+        os.makedirs(entry_dir, exist_ok=True)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+
+        # 一時ファイルに書いてからリネームすることで、読み込み側が途中の内容を見ないようにする
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+                f.flush()
+                new_size = os.fstat(f.fileno()).st_size
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        # 推定サイズが上限以内なら走査しない（初回と RESCAN_INTERVAL 回ごとは走査して数え直す）
+        with self.lock:
+            self.puts_since_scan += 1
+            if self.total_bytes is not None and self.puts_since_scan < RESCAN_INTERVAL:
+                self.total_bytes += new_size - old_size
+                if self.total_bytes <= self.max_bytes:
+                    return
+        self.evict()
+
+    def evict(self):
+        """ディレクトリを走査してサイズ上限を超えた分を最終アクセスの古い順に削除し、推定サイズを更新"""
+        entries = []
+        total_bytes = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        if total_bytes > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total_bytes -= size
+                if total_bytes <= self.max_bytes:
+                    break
+
+        with self.lock:
+            self.total_bytes = total_bytes
+            self.puts_since_scan = 0
+
+    def stats(self, hit: bool) -> Dict[str, Any]:
+        """結果JSONに付与するキャッシュ情報"""
+        with self.lock:
+            return {
+                "hit": hit,
+                "hits": self.hits,
+                "misses": self.misses
+            }
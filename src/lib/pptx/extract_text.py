@@ -1,115 +1,315 @@
 #!/usr/bin/env python3
 """PowerPointファイルからテキストを抽出するスクリプト"""
 
+import argparse
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, repeat
 from pptx import Presentation
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Sequence, TextIO, Tuple
 
-def extract_text_from_pptx(file_path: str) -> Dict[str, Any]:
+from cpu_profile import PROFILE_CPU_ENV, start_cpu_profile
+from extract_cache import DEFAULT_MAX_BYTES, ExtractionCache
+from metrics import (BYTES_IN, CELLS, NULL_METRICS, SHAPES, SLIDES, enable_memory_profiling, enable_metrics, new_metrics,
+                     timed)
+from stdio_frames import read_frame, write_frame
+from string_table import dedupe_result
+from text_index import KIND_CELL, KIND_SHAPE, TextNode, index_slide, node_locator
+from xml_extractor import count_slides, extract_slides_xml, iter_slides_xml, position_px, to_slide_xfrm
+
+# 抽出エンジン（pptx: python-pptxのオブジェクトモデル / xml: zipを直接ストリーミング解析）
+ENGINES = ('pptx', 'xml')
+
+# 出力形式（json: 全体を1つのJSON / ndjson: スライドごとに1行）
+OUTPUT_FORMATS = ('json', 'ndjson')
+
+# 抽出器のバージョン（出力形式を変えたら上げてキャッシュを無効化する）
+EXTRACTOR_VERSION = '3'
+
+# 並列抽出を行う最小スライド数（これ未満は直列で処理）
+PARALLEL_MIN_SLIDES = 50
+
+def _shape_position(node: TextNode) -> Dict[str, int]:
     """
-    PowerPointファイルからテキストを抽出
+    シェイプの位置情報（EMUからピクセルに変換）
+    PowerPointのEMU (English Metric Units) を ピクセルに変換
+    1インチ = 914400 EMU = 96ピクセル
+    """
+    shape = node.shape
+    xfrm = (shape.left, shape.top, shape.width, shape.height)
+    if node.groups:
+        # グループ内のシェイプはグループの子座標系なのでスライド座標に変換
+        xfrm = to_slide_xfrm(xfrm, [group._element for group in reversed(node.groups)])
+    return position_px(xfrm)
+
+def extract_slide_texts(slide, slide_idx: int = 0) -> List[Dict[str, Any]]:
+    """
+    1枚のスライドからテキスト情報を抽出
     
     Args:
-        file_path: PPTXファイルのパス
+        slide: python-pptxのスライド
+        slide_idx: スライドインデックス（0始まり）
         
     Returns:
-        スライドごとのテキスト情報を含む辞書
+        テキスト情報のリスト
     """
-    try:
-        prs = Presentation(file_path)
-        slides_data = []
+    slide_texts = []
+    title = slide.shapes.title
+    
+    # テキストノード索引を文書順に走査（テーブルのセルは連続して並ぶ）
+    nodes = index_slide(slide, slide_idx, include_notes=False)
+    for (kind, _), group in groupby(nodes, key=lambda node: (node.kind, id(node.shape))):
+        if kind == KIND_SHAPE:
+            node = next(group)
+            shape = node.shape
+            text_data = {
+                "shape_type": shape.shape_type.name if hasattr(shape, 'shape_type') else "unknown",
+                "text": node.text,
+                "position": _shape_position(node),
+                "locator": node_locator(node)
+            }
+            
+            # タイトルかどうかの判定
+            if not node.groups and shape == title:
+                text_data["is_title"] = True
+            
+            slide_texts.append(text_data)
         
-        for slide_num, slide in enumerate(prs.slides, 1):
-            slide_texts = []
+        # テーブルの場合
+        elif kind == KIND_CELL:
+            cell_nodes = list(group)
+            table = cell_nodes[0].shape.table
+            rows_count = len(table.rows)
+            cols_count = len(table.columns)
+            
+            # テーブル全体の位置情報
+            table_position = _shape_position(cell_nodes[0])
             
-            # スライド内のすべてのシェイプからテキストを抽出
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    text_data = {
-                        "shape_type": shape.shape_type.name if hasattr(shape, 'shape_type') else "unknown",
-                        "text": shape.text.strip()
-                    }
-                    
-                    # 位置情報を追加（EMUからピクセルに変換）
-                    # PowerPointのEMU (English Metric Units) を ピクセルに変換
-                    # 1インチ = 914400 EMU = 96ピクセル
-                    if hasattr(shape, 'left') and hasattr(shape, 'top') and hasattr(shape, 'width') and hasattr(shape, 'height'):
-                        text_data["position"] = {
-                            "x": int(shape.left * 96 / 914400) if shape.left else 0,
-                            "y": int(shape.top * 96 / 914400) if shape.top else 0,
-                            "width": int(shape.width * 96 / 914400) if shape.width else 0,
-                            "height": int(shape.height * 96 / 914400) if shape.height else 0
-                        }
-                    
-                    # タイトルかどうかの判定
-                    if shape == slide.shapes.title:
-                        text_data["is_title"] = True
-                    
-                    slide_texts.append(text_data)
-                    
-                # テーブルの場合
-                elif shape.has_table:
-                    table = shape.table
-                    rows_count = len(table.rows)
-                    cols_count = len(table.columns)
-                    
-                    # テーブル全体の位置情報
-                    table_x = int(shape.left * 96 / 914400) if shape.left else 0
-                    table_y = int(shape.top * 96 / 914400) if shape.top else 0
-                    table_width = int(shape.width * 96 / 914400) if shape.width else 0
-                    table_height = int(shape.height * 96 / 914400) if shape.height else 0
-                    
-                    # 各セルの幅と高さを計算（均等割りで簡易計算）
-                    cell_width = table_width // cols_count if cols_count > 0 else 0
-                    cell_height = table_height // rows_count if rows_count > 0 else 0
-                    
-                    # セルごとのデータを構築
-                    cells_data = []
-                    for row_idx, row in enumerate(table.rows):
-                        for col_idx, cell in enumerate(row.cells):
-                            cell_text = cell.text.strip()
-                            if cell_text:  # 空のセルはスキップ
-                                cell_data = {
-                                    "text": cell_text,
-                                    "row": row_idx,
-                                    "col": col_idx,
-                                    "position": {
-                                        "x": table_x + (col_idx * cell_width),
-                                        "y": table_y + (row_idx * cell_height),
-                                        "width": cell_width,
-                                        "height": cell_height
-                                    }
-                                }
-                                cells_data.append(cell_data)
-                    
-                    if cells_data:
-                        table_text_data = {
-                            "shape_type": "TABLE",
-                            "table_info": {
-                                "rows": rows_count,
-                                "cols": cols_count,
-                                "position": {
-                                    "x": table_x,
-                                    "y": table_y,
-                                    "width": table_width,
-                                    "height": table_height
-                                }
-                            },
-                            "cells": cells_data  # 各セルの個別データ
-                        }
-                        
-                        slide_texts.append(table_text_data)
+            # 各セルの幅と高さを計算（均等割りで簡易計算）
+            cell_width = table_position["width"] // cols_count if cols_count > 0 else 0
+            cell_height = table_position["height"] // rows_count if rows_count > 0 else 0
             
-            if slide_texts:
-                slides_data.append({
-                    "slide_number": slide_num,
-                    "texts": slide_texts
+            # セルごとのデータを構築（空のセルはスキップ）
+            cells_data = [
+                {
+                    "text": node.text,
+                    "row": node.row,
+                    "col": node.col,
+                    "position": {
+                        "x": table_position["x"] + (node.col * cell_width),
+                        "y": table_position["y"] + (node.row * cell_height),
+                        "width": cell_width,
+                        "height": cell_height
+                    },
+                    "locator": node_locator(node)
+                }
+                for node in cell_nodes if node.text
+            ]
+            
+            if cells_data:
+                slide_texts.append({
+                    "shape_type": "TABLE",
+                    "table_info": {
+                        "rows": rows_count,
+                        "cols": cols_count,
+                        "position": table_position
+                    },
+                    "cells": cells_data,  # 各セルの個別データ
+                    "locator": {"slide": slide_idx + 1, "shape_id": cell_nodes[0].shape_id}
                 })
+    
+    return slide_texts
+
+def _extract_slides(file_path: str, engine: str, slide_numbers: List[int]) -> List[Dict[str, Any]]:
+    """
+    指定したスライドだけを抽出（並列抽出のシャード単位、ワーカープロセスで実行）
+    
+    Args:
+        file_path: PPTXファイルのパス
+        engine: 抽出エンジン
+        slide_numbers: 1始まりのスライド番号
+        
+    Returns:
+        テキストを含むスライドのデータのリスト
+    """
+    if engine == 'xml':
+        return extract_slides_xml(file_path, slide_numbers)
+    
+    slides = Presentation(file_path).slides
+    slides_data = []
+    for slide_num in slide_numbers:
+        slide_texts = extract_slide_texts(slides[slide_num - 1], slide_num - 1)
+        if slide_texts:
+            slides_data.append({
+                "slide_number": slide_num,
+                "texts": slide_texts
+            })
+    return slides_data
+
+def _iter_parallel(file_path: str, engine: str, slide_numbers: Sequence[int], workers: int) -> Iterator[Dict[str, Any]]:
+    """
+    スライドをシャードに分割してプロセスプールで並列に抽出
+    
+    Args:
+        file_path: PPTXファイルのパス
+        engine: 抽出エンジン
+        slide_numbers: 抽出するスライド番号（昇順）
+        workers: ワーカープロセス数
+        
+    Yields:
+        slide_number順のスライドデータ（シャードが完了した順に先頭から返す）
+    """
+    # python-pptx版はシャードごとにPresentationを読み込むため、シャード数はワーカー数に合わせる
+    shard_count = workers if engine == 'pptx' else workers * 4
+    shard_count = min(shard_count, len(slide_numbers))
+    shard_size = -(-len(slide_numbers) // shard_count)
+    shards = [
+        list(slide_numbers[first:first + shard_size])
+        for first in range(0, len(slide_numbers), shard_size)
+    ]
+    
+    # シャードは連続した昇順の範囲なので、map の順序のまま返せば slide_number 順になる
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_result in executor.map(_extract_slides, repeat(file_path), repeat(engine), shards):
+            yield from shard_result
+
+def iter_slides(
+    file_path: str,
+    engine: str = 'pptx',
+    workers: int = 1,
+    slide_numbers: Optional[Sequence[int]] = None,
+    metrics=NULL_METRICS
+) -> Iterator[Dict[str, Any]]:
+    """
+    テキストを含むスライドのデータを処理した順に1枚ずつ返す
+    
+    Args:
+        file_path: PPTXファイルのパス
+        engine: 抽出エンジン（'pptx' または 'xml'）
+        workers: 並列抽出のワーカープロセス数（1で直列）
+        slide_numbers: 抽出する1始まりのスライド番号（Noneですべて）
+        metrics: フェーズごとの所要時間の記録先（python-pptx版は読み込みと抽出を分けて記録）
+        
+    Yields:
+        {"slide_number": ..., "texts": [...]} 形式のスライドデータ
+    """
+    # 並列モード（小さなデッキはプロセス起動のコストの方が大きいので直列で処理）
+    # 標準入力から読んだデッキはワーカープロセスに渡せないので直列で処理
+    if workers > 1 and isinstance(file_path, str):
+        targets = slide_numbers if slide_numbers is not None else range(1, count_slides(file_path) + 1)
+        if len(targets) >= PARALLEL_MIN_SLIDES:
+            yield from timed(_iter_parallel(file_path, engine, targets, workers), metrics, 'extract')
+            return
+    
+    if engine == 'xml':
+        yield from timed(iter_slides_xml(file_path, slide_numbers), metrics, 'extract')
+        return
+    
+    with metrics.phase('load'):
+        slides = Presentation(file_path).slides
+    if slide_numbers is None:
+        slide_numbers = range(1, len(slides) + 1)
+    
+    for slide_num in slide_numbers:
+        with metrics.phase('extract'):
+            slide_texts = extract_slide_texts(slides[slide_num - 1], slide_num - 1)
+        
+        if slide_texts:
+            yield {
+                "slide_number": slide_num,
+                "texts": slide_texts
+            }
+
+def parse_slide_range(spec: str) -> Tuple[int, Optional[int]]:
+    """
+    スライド範囲の指定を (開始番号, 枚数) に変換
+    
+    Args:
+        spec: "1-20"（1〜20枚目）、"5"（5枚目のみ）、"5-"（5枚目以降）
+        
+    Returns:
+        (1始まりの開始番号, 枚数)（枚数がNoneなら最後まで）
+    """
+    first, sep, last = spec.partition('-')
+    start = int(first)
+    if not sep:
+        return start, 1
+    if not last:
+        return start, None
+    return start, max(0, int(last) - start + 1)
+
+def _select_slides(file_path: str, start: int, count: Optional[int]) -> Tuple[Optional[range], int]:
+    """
+    抽出対象のスライド番号を決定（presentation.xml だけを読む）
+    
+    Returns:
+        (スライド番号の範囲（全スライドならNone）, 総スライド数)
+    """
+    if start < 1:
+        raise ValueError(f"start must be 1 or greater: {start}")
+    if count is not None and count < 0:
+        raise ValueError(f"count must not be negative: {count}")
+    
+    total_slides = count_slides(file_path)
+    if start == 1 and count is None:
+        return None, total_slides
+    
+    end = total_slides if count is None else min(total_slides, start + count - 1)
+    return range(start, end + 1), total_slides
+
+def _range_info(slide_numbers: Optional[range]) -> Optional[Dict[str, int]]:
+    """結果JSONに付与する抽出範囲（全スライドならNone）"""
+    if slide_numbers is None:
+        return None
+    return {
+        "start": slide_numbers.start,
+        "count": len(slide_numbers)
+    }
+
+def _cache_options(start: int, count: Optional[int]) -> Optional[Dict[str, Any]]:
+    """キャッシュキーに含める抽出範囲（全スライドならNone）"""
+    if start == 1 and count is None:
+        return None
+    return {"start": start, "count": count}
+
+def _count_slide(metrics, slide_data: Dict[str, Any]):
+    """抽出したスライドのシェイプ・セルの数をカウンターに加算"""
+    metrics.count(SLIDES)
+    for text_data in slide_data["texts"]:
+        if "cells" in text_data:
+            metrics.count(CELLS, len(text_data["cells"]))
+        else:
+            metrics.count(SHAPES)
+
+def _count_extracted(metrics, slides_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """抽出結果のスライド・シェイプ・セルの数をカウンターに加算"""
+    if metrics.enabled:
+        for slide_data in slides_data:
+            _count_slide(metrics, slide_data)
+    return slides_data
+
+def _extract_text(file_path: str, engine: str, workers: int, start: int, count: Optional[int],
+                  metrics=NULL_METRICS) -> Dict[str, Any]:
+    """キャッシュを使わずにテキストを抽出"""
+    try:
+        if start == 1 and count is None:
+            # 全スライドの場合はエラーメッセージを抽出エンジンに任せるため、先に抽出する
+            slides_data = _count_extracted(metrics, list(iter_slides(file_path, engine, workers, metrics=metrics)))
+            return {
+                "success": True,
+                "total_slides": count_slides(file_path),
+                "slides": slides_data
+            }
+        
+        slide_numbers, total_slides = _select_slides(file_path, start, count)
+        slides_data = _count_extracted(metrics, list(iter_slides(file_path, engine, workers, slide_numbers, metrics)))
         
         return {
             "success": True,
-            "total_slides": len(prs.slides),
+            "total_slides": total_slides,
+            "slide_range": _range_info(slide_numbers),
             "slides": slides_data
         }
         
@@ -119,17 +319,258 @@ def extract_text_from_pptx(file_path: str) -> Dict[str, Any]:
             "error": str(e)
         }
 
-def main():
-    if len(sys.argv) != 2:
-        print(json.dumps({
+def extract_text_from_pptx(
+    file_path: str,
+    engine: str = 'pptx',
+    workers: int = 1,
+    cache: Optional[ExtractionCache] = None,
+    start: int = 1,
+    count: Optional[int] = None,
+    metrics=None,
+    strings: bool = False
+) -> Dict[str, Any]:
+    """
+    PowerPointファイルからテキストを抽出
+    
+    Args:
+        file_path: PPTXファイルのパス（またはシーク可能なファイルオブジェクト）
+        engine: 抽出エンジン（'pptx' または 'xml'）
+        workers: 並列抽出のワーカープロセス数（1で直列）
+        cache: 抽出結果キャッシュ（Noneでキャッシュしない）
+        start: 抽出を開始する1始まりのスライド番号
+        count: 抽出するスライド枚数（Noneで最後まで）
+        metrics: フェーズごとの所要時間・カウンターの記録先（Noneなら環境変数 PPTX_METRICS に従って作成）
+        strings: テキストを重複のない "strings" テーブルにまとめ、各テキストは番号 "string" で参照する
+        
+    Returns:
+        スライドごとのテキスト情報を含む辞書（計測が有効なら "metrics" を含む）
+    """
+    if metrics is None:
+        metrics = new_metrics()
+    
+    def finish(result: Dict[str, Any]) -> Dict[str, Any]:
+        # キャッシュには元の形式で保存し、返す直前に変換する
+        if strings:
+            with metrics.phase('strings'):
+                dedupe_result(result)
+        return metrics.attach(result)
+    
+    if engine not in ENGINES:
+        return {
+            "success": False,
+            "error": f"Unknown engine: {engine}"
+        }
+    
+    metrics.count_size(BYTES_IN, file_path)
+    if cache is None:
+        return finish(_extract_text(file_path, engine, workers, start, count, metrics))
+    
+    # 同じ内容のファイルは前回の結果を返す（エンジンによらず出力は同一）
+    try:
+        with metrics.phase('cache'):
+            cache_key = cache.make_key(file_path, EXTRACTOR_VERSION, _cache_options(start, count))
+            result = cache.get(cache_key)
+    except OSError as e:
+        return {
             "success": False,
-            "error": "Usage: python extract_text.py <pptx_file_path>"
-        }))
-        sys.exit(1)
+            "error": str(e)
+        }
+    
+    if result is not None:
+        _count_extracted(metrics, result["slides"])
+        result["cache"] = cache.stats(hit=True)
+        return finish(result)
+    
+    result = _extract_text(file_path, engine, workers, start, count, metrics)
+    if result["success"]:
+        try:
+            with metrics.phase('cache'):
+                cache.put(cache_key, result)
+        except OSError as e:
+            # キャッシュへの書き込み失敗で抽出自体は失敗させない
+            print(f"Failed to write extraction cache: {e}", file=sys.stderr)
+    result["cache"] = cache.stats(hit=False)
+    return finish(result)
+
+def write_ndjson(
+    file_path: str,
+    out: TextIO,
+    engine: str = 'pptx',
+    workers: int = 1,
+    cache: Optional[ExtractionCache] = None,
+    start: int = 1,
+    count: Optional[int] = None,
+    metrics=None
+) -> bool:
+    """
+    スライドを処理するたびに1行のJSONとして書き出し、最後にサマリー行を書き出す
+    
+    Args:
+        file_path: PPTXファイルのパス
+        out: 出力先
+        engine: 抽出エンジン（'pptx' または 'xml'）
+        workers: 並列抽出のワーカープロセス数（1で直列）
+        cache: 抽出結果キャッシュ（Noneでキャッシュしない）
+        start: 抽出を開始する1始まりのスライド番号
+        count: 抽出するスライド枚数（Noneで最後まで）
+        metrics: フェーズごとの所要時間・カウンターの記録先（サマリー行の "metrics" に出力）
+        
+    Returns:
+        成功した場合True
+    """
+    if metrics is None:
+        metrics = new_metrics()
+    
+    def write_line(data: Dict[str, Any]):
+        out.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')) + "\n")
+        out.flush()
+    
+    summary: Dict[str, Any] = {"type": "summary"}
+    slides_written = 0
+    
+    try:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        
+        metrics.count_size(BYTES_IN, file_path)
+        cached = None
+        if cache is not None:
+            with metrics.phase('cache'):
+                cache_key = cache.make_key(file_path, EXTRACTOR_VERSION, _cache_options(start, count))
+                cached = cache.get(cache_key)
+        
+        if cached is not None:
+            slides = iter(cached["slides"])
+            total_slides = cached["total_slides"]
+            slide_range = cached.get("slide_range")
+        else:
+            slide_numbers, total_slides = _select_slides(file_path, start, count)
+            slide_range = _range_info(slide_numbers)
+            slides = iter_slides(file_path, engine, workers, slide_numbers, metrics)
+        
+        # キャッシュに保存する場合のみスライドを保持する
+        collected = [] if cache is not None and cached is None else None
+        for slide_data in slides:
+            write_line({"type": "slide", **slide_data})
+            slides_written += 1
+            if metrics.enabled:
+                _count_slide(metrics, slide_data)
+            if collected is not None:
+                collected.append(slide_data)
+        
+        summary.update({
+            "success": True,
+            "total_slides": total_slides,
+            "slides_with_text": slides_written
+        })
+        if slide_range is not None:
+            summary["slide_range"] = slide_range
+        
+        if cache is not None:
+            if collected is not None:
+                cached_result: Dict[str, Any] = {
+                    "success": True,
+                    "total_slides": total_slides,
+                    "slides": collected
+                }
+                if slide_range is not None:
+                    cached_result["slide_range"] = slide_range
+                try:
+                    with metrics.phase('cache'):
+                        cache.put(cache_key, cached_result)
+                except OSError as e:
+                    print(f"Failed to write extraction cache: {e}", file=sys.stderr)
+            summary["cache"] = cache.stats(hit=cached is not None)
+    
+    except Exception as e:
+        summary.update({
+            "success": False,
+            "error": str(e),
+            "slides_with_text": slides_written
+        })
+    
+    write_line(metrics.attach(summary))
+    return summary["success"]
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract text from PPTX file')
+    parser.add_argument('file_path', nargs='?', help='PPTX file path')
+    parser.add_argument('--engine', choices=ENGINES, default='pptx', help='Extraction engine')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for parallel extraction')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json', help='Output format')
+    parser.add_argument('--slides', help='Slide range to extract, e.g. 1-20, 5 or 5-')
+    parser.add_argument('--total-slides', action='store_true', help='Only report the number of slides')
+    parser.add_argument('--cache-dir', default=os.environ.get('PPTX_EXTRACT_CACHE_DIR'), help='Extraction cache directory')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='Extraction cache size limit (MB)')
+    parser.add_argument('--stdio', action='store_true', help='Read the deck from stdin and write the JSON result to stdout as length-prefixed frames')
+    parser.add_argument('--strings', action='store_true', help='Emit a table of unique texts with occurrence counts and reference it by index from each text')
+    parser.add_argument('--metrics', action='store_true', help='Add per-phase timings and element counters to the result as "metrics"')
+    parser.add_argument('--profile-memory', action='store_true', help='Report tracemalloc/RSS peaks and top allocation sites per phase in the result metrics')
+    parser.add_argument('--profile-cpu', metavar='PATH', default=os.environ.get(PROFILE_CPU_ENV), help='Sample the CPU while running and write collapsed stacks (flamegraph input) to PATH')
+    
+    args = parser.parse_args()
+    
+    if args.metrics:
+        enable_metrics()
+    if args.profile_memory:
+        enable_memory_profiling()
+    start_cpu_profile(args.profile_cpu)
+    if args.stdio and args.format == 'ndjson':
+        parser.error('--format ndjson cannot be combined with --stdio')
+    if args.strings and args.format == 'ndjson':
+        parser.error('--strings cannot be combined with --format ndjson')
+    if not args.stdio and not args.file_path:
+        parser.error('file_path is required unless --stdio is given')
+    
+    def emit(result: Dict[str, Any]):
+        if args.stdio:
+            write_frame(sys.stdout.buffer, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        else:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+    
+    # 標準入力モードではデッキを一時ファイルに書かずにメモリ上で処理する
+    source = args.file_path
+    if args.stdio:
+        try:
+            source = read_frame(sys.stdin.buffer)
+        except EOFError as e:
+            source = None
+            error = str(e)
+        else:
+            error = "No PPTX frame on stdin"
+        if source is None:
+            emit({"success": False, "error": error})
+            sys.exit(1)
+    
+    if args.total_slides:
+        # presentation.xml だけを読むので巨大なデッキでもすぐに返る
+        try:
+            result = {"success": True, "total_slides": count_slides(source)}
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        emit(result)
+        return
+    
+    start, count = 1, None
+    if args.slides:
+        try:
+            start, count = parse_slide_range(args.slides)
+        except ValueError:
+            emit({
+                "success": False,
+                "error": f"Invalid slide range: {args.slides}"
+            })
+            sys.exit(1)
+    
+    cache = ExtractionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024) if args.cache_dir else None
+    
+    if args.format == 'ndjson':
+        write_ndjson(source, sys.stdout, engine=args.engine, workers=args.workers, cache=cache, start=start, count=count)
+        return
     
-    file_path = sys.argv[1]
-    result = extract_text_from_pptx(file_path)
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    result = extract_text_from_pptx(source, engine=args.engine, workers=args.workers, cache=cache, start=start, count=count,
+                                    strings=args.strings)
+    emit(result)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
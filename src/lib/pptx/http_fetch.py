@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+URLからのPPTXダウンロード
+keep-aliveの接続プールで接続を使い回し、レスポンスを一定サイズずつディスクへ書き出す
+キャッシュディレクトリを指定すると ETag / Last-Modified で条件付きリクエストを送り、
+更新されていなければ再ダウンロードせずにキャッシュを使う
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# 接続・読み込みのタイムアウト（秒）
+DEFAULT_TIMEOUT = 30.0
+
+# ディスクへ書き出す単位
+CHUNK_SIZE = 1024 * 1024
+
+# ホストごとに保持するアイドル接続の上限
+MAX_IDLE_PER_HOST = 4
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# デフォルトのダウンロードキャッシュ上限（バイト）
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# download() の結果
+DOWNLOADED = 'downloaded'      # 一時ファイルに保存（呼び出し側で削除する）
+STORED = 'stored'              # ダウンロードしてキャッシュに保存
+NOT_MODIFIED = 'not_modified'  # 304 でキャッシュを再利用
+
+# 接続が切れていた場合に新しい接続でやり直す例外（keep-aliveの接続はサーバー側で閉じられていることがある）
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class DownloadError(Exception):
+    """ダウンロードに失敗（HTTPエラー・途中切断など）"""
+
+
+class ConnectionPool:
+    """ホストごとのkeep-alive接続プール"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_idle_per_host: int = MAX_IDLE_PER_HOST):
+        """
+        コンストラクタ
+
+        Args:
+            timeout: 接続・読み込みのタイムアウト（秒）
+            max_idle_per_host: ホストごとに保持するアイドル接続の上限
+        """
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.connections_opened = 0
+        self.lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+
+    def _connect(self, key: Tuple[str, str, int]) -> http.client.HTTPConnection:
+        """新しい接続を作成"""
+        with self.lock:
+            self.connections_opened += 1
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        """アイドル接続を取り出す（なければ新しく作る）。(接続, 再利用か) を返す"""
+        with self.lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse):
+        """レスポンスを読み切っていれば接続をプールに戻し、そうでなければ閉じる"""
+        if response.isclosed() and not response.will_close:
+            with self.lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def _send(self, key: Tuple[str, str, int], method: str, target: str,
+              headers: Dict[str, str]) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """リクエストを送信（再利用した接続が切れていれば1回だけ新しい接続でやり直す）"""
+        conn, reused = self._acquire(key)
+        try:
+            conn.request(method, target, headers=headers)
+            return conn, conn.getresponse()
+        except STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+        conn = self._connect(key)
+        try:
+            conn.request(method, target, headers=headers)
+            return conn, conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+
+    @contextmanager
+    def open(self, url: str, headers: Optional[Dict[str, str]] = None,
+             method: str = 'GET') -> Iterator[http.client.HTTPResponse]:
+        """
+        リクエストを送ってレスポンスを返す（リダイレクトは追跡する）
+
+        Args:
+            url: http:// または https:// のURL
+            headers: 追加のリクエストヘッダー
+            method: HTTPメソッド
+
+        Yields:
+            レスポンス（読み切ってから抜けると接続がプールに戻る）
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise DownloadError(f"Unsupported URL: {url}")
+            key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+            target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+            conn, response = self._send(key, method, target, dict(headers or {}))
+            location = response.getheader('Location')
+            if response.status in REDIRECT_STATUSES and location:
+                response.read()
+                self._release(key, conn, response)
+                url = urljoin(url, location)
+                continue
+
+            try:
+                yield response
+            finally:
+                self._release(key, conn, response)
+            return
+
+        raise DownloadError(f"Too many redirects: {url}")
+
+    def close(self):
+        """アイドル接続をすべて閉じる"""
+        with self.lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool() -> ConnectionPool:
+    """プロセス共通の接続プール（マニフェストのワーカーではジョブをまたいで接続を使い回す）"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
+
+
+class DownloadCache:
+    """ETag / Last-Modified 付きのダウンロードキャッシュ（サイズ上限付きLRU）"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        """
+        コンストラクタ
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+            max_bytes: キャッシュ全体のサイズ上限（超えたら古いものから削除）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_paths(self, url: str) -> Tuple[str, str]:
+        """URLに対応する本体とメタデータのパス"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        entry_dir = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(entry_dir, key + '.pptx'), os.path.join(entry_dir, key + '.meta.json')
+
+    def lookup(self, url: str) -> Optional[Dict[str, str]]:
+        """
+        キャッシュ済みのエントリを取得
+
+        Returns:
+            {"path", "etag", "last_modified"} の辞書（なければNone）
+        """
+        body_path, meta_path = self._entry_paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            # 本体とメタデータの組み合わせが壊れていないか（別プロセスが書き換え中など）
+            if meta.get('url') != url or os.path.getsize(body_path) != meta.get('size'):
+                return None
+        except (OSError, ValueError):
+            return None
+        meta['path'] = body_path
+        return meta
+
+    def touch(self, entry: Dict[str, str]):
+        """LRUのためにアクセス時刻を更新"""
+        try:
+            os.utime(entry['path'], None)
+        except OSError:
+            pass
+
+    def store(self, url: str, response: http.client.HTTPResponse) -> str:
+        """
+        レスポンス本体をキャッシュに書き込む
+
+        Returns:
+            キャッシュ上の本体のパス
+        """
+        body_path, meta_path = self._entry_paths(url)
+        entry_dir = os.path.dirname(body_path)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        # 一時ファイルに書いてからリネームすることで、読み込み側が途中の内容を見ないようにする
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                size = _copy_body(response, f)
+            os.replace(tmp_path, body_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        meta = {
+            "url": url,
+            "etag": response.getheader('ETag'),
+            "last_modified": response.getheader('Last-Modified'),
+            "size": size
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+        self.evict()
+        return body_path
+
+    def evict(self):
+        """サイズ上限を超えた分を最終アクセスの古い順に削除"""
+        entries = []
+        total_bytes = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.pptx'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+                os.unlink(path[:-len('.pptx')] + '.meta.json')
+            except OSError:
+                pass
+            total_bytes -= size
+            if total_bytes <= self.max_bytes:
+                break
+
+
+def _copy_body(response: http.client.HTTPResponse, out) -> int:
+    """レスポンス本体を一定サイズずつ書き出し、途中で切れていないか確認する"""
+    size = 0
+    while True:
+        chunk = response.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        out.write(chunk)
+        size += len(chunk)
+
+    expected = response.getheader('Content-Length')
+    if expected is not None and expected.isdigit() and int(expected) != size:
+        raise DownloadError(f"Incomplete download ({size}/{expected} bytes)")
+    return size
+
+
+def _check_status(url: str, response: http.client.HTTPResponse):
+    """2xx以外はエラー"""
+    if not 200 <= response.status < 300:
+        raise DownloadError(f"HTTP {response.status} {response.reason}: {url}")
+
+
+def download(url: str, cache: Optional[DownloadCache] = None,
+             pool: Optional[ConnectionPool] = None) -> Tuple[str, str]:
+    """
+    URLのファイルをディスクにダウンロード
+
+    Args:
+        url: ダウンロードするURL
+        cache: ダウンロードキャッシュ（Noneなら毎回一時ファイルにダウンロード）
+        pool: 接続プール（省略時はプロセス共通のプール）
+
+    Returns:
+        (ファイルパス, 結果)。結果が DOWNLOADED の場合だけ一時ファイルなので呼び出し側で削除する
+    """
+    pool = pool or default_pool()
+
+    headers = {}
+    entry = cache.lookup(url) if cache else None
+    if entry:
+        # 条件付きリクエストで更新の有無だけを確認する
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if not headers:
+            entry = None
+
+    with pool.open(url, headers) as response:
+        if entry and response.status == 304:
+            response.read()
+            cache.touch(entry)
+            return entry['path'], NOT_MODIFIED
+
+        _check_status(url, response)
+
+        # 検証子がなければ再検証できないのでキャッシュしない
+        if cache and (response.getheader('ETag') or response.getheader('Last-Modified')):
+            return cache.store(url, response), STORED
+
+        with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as tmp_file:
+            try:
+                _copy_body(response, tmp_file)
+            except Exception:
+                tmp_file.close()
+                os.unlink(tmp_file.name)
+                raise
+        return tmp_file.name, DOWNLOADED
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+zipレベルの差分保存
+変更したパート（スライド・ノートのXML）だけを再シリアライズし、
+それ以外のzipエントリ（画像・動画を含む）は圧縮済みのバイト列をそのままコピーする
+"""
+
+import io
+import os
+import posixpath
+import struct
+import tempfile
+import zipfile
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+
+# 中央ディレクトリのレコード（zipfile と同じ定義）
+CENTRAL_DIR_STRUCT = struct.Struct(zipfile.structCentralDir)
+CENTRAL_DIR_OFFSET_FIELD = 42  # ローカルヘッダーのオフセットの位置
+END_RECORD_STRUCT = struct.Struct(zipfile.structEndArchive)
+
+# 32bitのzipで表現できる上限（これを超えるならzip64なので通常保存にフォールバック）
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP32_MAX_ENTRIES = 0xFFFF
+
+# 再シリアライズしたパートの圧縮レベル（python-pptxと同じDEFLATE）
+DIRTY_COMPRESSION = zipfile.ZIP_DEFLATED
+
+# 生データをコピーする単位
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class _Record:
+    """
+    zipの1エントリ分の生データ
+    ローカルヘッダー＋圧縮データは source の offset から length バイト（コピー時まで読み込まない）
+    """
+
+    __slots__ = ('name', 'central', 'source', 'offset', 'length')
+
+    def __init__(self, name: str, central: bytes, source, offset: int, length: int):
+        self.name = name
+        self.central = central
+        self.source = source
+        self.offset = offset
+        self.length = length
+
+
+def _read_records(fp, zf: zipfile.ZipFile) -> Dict[str, _Record]:
+    """
+    zipの各エントリの生データを読み出す
+
+    Args:
+        fp: zipファイルのファイルオブジェクト
+        zf: fp を開いたZipFile
+
+    Returns:
+        エントリ名をキーにした生データの辞書（zip64などコピーできない場合は例外）
+    """
+    infos = sorted(zf.infolist(), key=lambda info: info.header_offset)
+    if len(infos) >= ZIP32_MAX_ENTRIES:
+        raise ValueError("zip64 archives are not supported")
+
+    # 中央ディレクトリを順番に読み、エントリ名ごとのレコードを取得
+    fp.seek(zf.start_dir)
+    central_records: Dict[str, bytes] = {}
+    for _ in infos:
+        header = fp.read(CENTRAL_DIR_STRUCT.size)
+        fields = CENTRAL_DIR_STRUCT.unpack(header)
+        if fields[0] != zipfile.stringCentralDir:
+            raise ValueError("Broken central directory")
+        name_len, extra_len, comment_len = fields[12], fields[13], fields[14]
+        rest = fp.read(name_len + extra_len + comment_len)
+        flag_bits = fields[5]
+        raw_name = rest[:name_len]
+        name = raw_name.decode('utf-8' if flag_bits & 0x800 else 'cp437')
+        if fields[10] >= ZIP32_LIMIT or fields[11] >= ZIP32_LIMIT or fields[-1] >= ZIP32_LIMIT:
+            raise ValueError("zip64 archives are not supported")
+        central_records[name] = header + rest
+
+    # ローカルレコードは次のエントリの先頭（最後は中央ディレクトリ）まで
+    # （データディスクリプタもそのまま含まれる）
+    records: Dict[str, _Record] = {}
+    for position, info in enumerate(infos):
+        end = infos[position + 1].header_offset if position + 1 < len(infos) else zf.start_dir
+        records[info.filename] = _Record(
+            info.filename, central_records[info.filename], fp, info.header_offset, end - info.header_offset
+        )
+    return records
+
+
+def _serialize_records(blobs: List[Tuple[str, bytes, zipfile.ZipInfo]]) -> Dict[str, _Record]:
+    """再シリアライズしたパートを圧縮し、生データとして取り出す"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', DIRTY_COMPRESSION) as zf:
+        for name, blob, source_info in blobs:
+            info = zipfile.ZipInfo(name, date_time=source_info.date_time)
+            info.compress_type = DIRTY_COMPRESSION
+            info.external_attr = source_info.external_attr
+            zf.writestr(info, blob)
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as zf:
+        return _read_records(buffer, zf)
+
+
+def _copy_span(source, offset: int, length: int, out):
+    """source の offset から length バイトを一定サイズずつ書き出す"""
+    # HTTP Range で読むリモートファイルは1回のリクエストでまとめて転送する
+    copy_range = getattr(source, 'copy_range', None)
+    if copy_range is not None:
+        copy_range(offset, length, out)
+        return
+
+    source.seek(offset)
+    remaining = length
+    while remaining > 0:
+        chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("Source archive ended unexpectedly")
+        out.write(chunk)
+        remaining -= len(chunk)
+
+
+def _write_archive(out, records: Iterable[_Record], comment: bytes):
+    """生データを連結し、オフセットを付け替えた中央ディレクトリを書き出す"""
+    central_dir = io.BytesIO()
+    count = 0
+    offset = 0
+
+    # 同じソース上で連続しているレコードはまとめてコピーする
+    run_source, run_start, run_length = None, 0, 0
+    for record in records:
+        if record.source is run_source and record.offset == run_start + run_length:
+            run_length += record.length
+        else:
+            if run_length:
+                _copy_span(run_source, run_start, run_length, out)
+            run_source, run_start, run_length = record.source, record.offset, record.length
+
+        central = bytearray(record.central)
+        struct.pack_into('<L', central, CENTRAL_DIR_OFFSET_FIELD, offset)
+        central_dir.write(central)
+        offset += record.length
+        count += 1
+    if run_length:
+        _copy_span(run_source, run_start, run_length, out)
+
+    if offset >= ZIP32_LIMIT:
+        raise ValueError("zip64 archives are not supported")
+
+    central_bytes = central_dir.getvalue()
+    out.write(central_bytes)
+    out.write(END_RECORD_STRUCT.pack(
+        zipfile.stringEndArchive, 0, 0, count, count,
+        len(central_bytes), offset, len(comment)
+    ))
+    out.write(comment)
+
+
+def _package_members(prs) -> Dict[str, object]:
+    """パッケージ内のパートをzipのエントリ名で取得"""
+    return {part.partname.membername: part for part in prs.part.package.iter_parts()}
+
+
+def _presentation_targets_unchanged(zf: zipfile.ZipFile, prs) -> bool:
+    """
+    presentation.xml のリレーション先が元ファイルと同じか
+    （prs.slides にアクセスすると python-pptx がスライドのパート名を文書順に付け直すため、
+    入れ替わっていれば差分保存できない）
+    """
+    presentation_part = prs.part
+    base_uri = presentation_part.partname.baseURI
+    try:
+        source_rels = etree.fromstring(zf.read(presentation_part.partname.rels_uri.membername))
+    except KeyError:
+        return False
+
+    source_targets = {}
+    for rel in source_rels:
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if not target.startswith('/'):
+            target = posixpath.normpath(posixpath.join(base_uri, target))
+        source_targets[rel.get('Id')] = target
+
+    current_targets = {
+        rId: str(rel.target_part.partname)
+        for rId, rel in presentation_part.rels.items()
+        if not rel.is_external
+    }
+    return source_targets == current_targets
+
+
+def save_incremental(prs, source_path, output_path, dirty_parts: Iterable[str]):
+    """
+    変更したパートだけを再シリアライズして保存
+
+    Args:
+        prs: python-pptxのプレゼンテーション（source_path から読み込んだもの）
+        source_path: 元のPPTXファイルのパス、またはシーク可能なファイルオブジェクト
+        output_path: 出力ファイルのパス（source_path と同じでもよい）、または書き込み先のファイルオブジェクト
+        dirty_parts: 変更したパート名（例: /ppt/slides/slide1.xml）
+
+    Raises:
+        ValueError: パートの追加・削除やzip64など、差分保存できない場合
+    """
+    members = _package_members(prs)
+    dirty_members = sorted({str(partname).lstrip('/') for partname in dirty_parts})
+
+    with ExitStack() as stack:
+        if isinstance(source_path, str):
+            fp = stack.enter_context(open(source_path, 'rb'))
+        else:
+            fp = source_path
+            fp.seek(0)
+        zf = stack.enter_context(zipfile.ZipFile(fp))
+
+        records = _read_records(fp, zf)
+        order = [info.filename for info in sorted(zf.infolist(), key=lambda info: info.header_offset)]
+
+        # パートが追加・削除されていればリレーションや[Content_Types].xmlも変わるため差分保存しない
+        source_parts = {name for name in order if not name.endswith('.rels') and name != '[Content_Types].xml'}
+        if not set(members) <= source_parts:
+            raise ValueError("Package parts were added; incremental save is not possible")
+        if not _presentation_targets_unchanged(zf, prs):
+            raise ValueError("Slide parts were renamed; incremental save is not possible")
+
+        missing = [name for name in dirty_members if name not in records]
+        if missing:
+            raise ValueError(f"Dirty parts not found in source: {missing}")
+
+        dirty_records = _serialize_records([
+            (name, members[name].blob, zf.getinfo(name)) for name in dirty_members
+        ])
+        output_records = [dirty_records.get(name, records[name]) for name in order]
+
+        # 変更していないエントリは元のアーカイブから直接コピーするので、開いている間に書き出す
+        if not isinstance(output_path, str):
+            # ファイルオブジェクトにはそのまま書き出す（標準出力モード）
+            _write_archive(output_path, output_records, zf.comment)
+            return
+
+        # 同じファイルへの上書きにも対応するため、一時ファイルに書いてから置き換える
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.pptx.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                _write_archive(out, output_records, zf.comment)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    os.replace(tmp_path, output_path)
+
+
+def _source_available(source_path) -> bool:
+    """差分保存の元データとして読めるか"""
+    if isinstance(source_path, str):
+        return os.path.isfile(source_path)
+    return source_path is not None and hasattr(source_path, 'seek')
+
+
+def save_presentation(prs, output_path, source_path=None,
+                      dirty_parts: Optional[Iterable[str]] = None,
+                      before_full_save: Optional[Callable[[], None]] = None) -> str:
+    """
+    可能なら差分保存し、できなければ通常の保存にフォールバック
+
+    Args:
+        prs: python-pptxのプレゼンテーション
+        output_path: 出力ファイルのパス、またはファイルオブジェクト
+        source_path: 元のPPTXファイルのパス、またはファイルオブジェクト（Noneなら通常保存）
+        dirty_parts: 変更したパート名（Noneなら通常保存）
+        before_full_save: 通常保存の直前に呼ぶ関数（読み込んでいないパートを補うためなど）
+
+    Returns:
+        保存方法（"incremental" または "full"）
+    """
+    if dirty_parts is not None and _source_available(source_path):
+        try:
+            save_incremental(prs, source_path, output_path, dirty_parts)
+            return "incremental"
+        except (ValueError, zipfile.BadZipFile, KeyError):
+            pass
+
+    if not isinstance(output_path, str):
+        # 差分保存の途中で書き込んだ内容を破棄
+        output_path.seek(0)
+        output_path.truncate()
+    if before_full_save is not None:
+        before_full_save()
+    prs.save(output_path)
+    return "full"
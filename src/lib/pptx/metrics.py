@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+処理のフェーズごとの所要時間とカウンター
+ダウンロード・読み込み・置換・保存などのどこに時間がかかったかを結果JSONの "metrics" に出力する
+--metrics（環境変数 PPTX_METRICS=1）を指定したときだけ出力し、デフォルトの結果JSONは変わらない
+（無効な間の計測の呼び出しは何もしないメソッド呼び出しだけになる）
+--profile-memory（環境変数 PPTX_PROFILE_MEMORY=1）を指定すると、フェーズごとの
+tracemalloc のピーク・RSS・確保の多い行を "metrics" の "memory" に出力する
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 計測を有効にする環境変数（"1" / "true" / "on" で有効）
+METRICS_ENV = 'PPTX_METRICS'
+METRICS_FLAG = '--metrics'
+
+# メモリプロファイルを有効にする環境変数（"1" / "true" / "on" で有効）
+PROFILE_MEMORY_ENV = 'PPTX_PROFILE_MEMORY'
+PROFILE_MEMORY_FLAG = '--profile-memory'
+
+# フェーズごとに出力する確保の多い行の数
+TOP_ALLOCATION_SITES = 10
+
+# カウンター名
+SLIDES = 'slides'
+SHAPES = 'shapes'
+RUNS = 'runs'
+CELLS = 'cells'
+BYTES_IN = 'bytes_in'
+BYTES_OUT = 'bytes_out'
+
+
+def peak_rss() -> Optional[int]:
+    """プロセスの最大常駐メモリ（バイト、取得できない環境ではNone）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux はKB、macOS はバイト
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss() -> Optional[int]:
+    """プロセスの現在の常駐メモリ（バイト、/proc のない環境ではNone）"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def source_size(source) -> Optional[int]:
+    """
+    入出力のサイズ（バイト）
+
+    Args:
+        source: ファイルパス、またはシーク可能なファイルオブジェクト（URLなど取得できない場合はNone）
+    """
+    try:
+        if isinstance(source, str):
+            return os.path.getsize(source)
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+class Metrics:
+    """フェーズごとの所要時間（単調増加の時計）とカウンター"""
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """with ブロックの所要時間をフェーズに加算（同じ名前のフェーズは合計する）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name: str, value: int = 1):
+        """カウンターに加算"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_size(self, name: str, source):
+        """ファイルのサイズをカウンターに加算（サイズが分からなければ何もしない）"""
+        size = source_size(source)
+        if size is not None:
+            self.count(name, size)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """結果JSONに出力する形式"""
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "phases": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "counters": dict(self.counters),
+            "peak_rss": peak_rss()
+        }
+
+    def attach(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """結果の辞書に "metrics" を追加して返す"""
+        result["metrics"] = self.as_dict()
+        return result
+
+
+class NullMetrics:
+    """計測を無効にした場合の Metrics（何も記録しない）"""
+
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name: str):
+        return self._phase
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def count_size(self, name: str, source):
+        pass
+
+    def as_dict(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def attach(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return result
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _site(frame) -> str:
+    """確保した行の表示（パスは末尾の2階層だけにする）"""
+    parts = frame.filename.replace('\\', '/').rsplit('/', 2)
+    return f"{'/'.join(parts[-2:])}:{frame.lineno}"
+
+
+# スナップショットから除く確保（tracemalloc 自身とインポート処理）
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class MemoryMetrics(Metrics):
+    """
+    Metrics に加えて、フェーズごとのメモリを記録する（--profile-memory）
+
+    - traced_start / traced_end / traced_peak: tracemalloc で追跡したPythonのメモリ
+      （フェーズの最初の開始時・最後の終了時・フェーズ中の最大）
+    - rss_start / rss_end / rss_peak: プロセスの常駐メモリ（rss_peak はフェーズ終了時点までの最大）
+    - top: フェーズ中に確保されて解放されなかったメモリの多い行
+
+    top はスナップショットの比較に時間がかかるため、一番外側のフェーズが別の名前に
+    切り替わるときだけ取得する（スライドごとに繰り返すフェーズは連続する範囲をまとめて1回、
+    入れ子のフェーズは外側のフェーズに含める）
+    tracemalloc はプロセス全体で共有するため、ワーカーで複数のジョブを同時に実行すると値が混ざる
+    """
+
+    def __init__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        super().__init__()
+        self.memory: Dict[str, Dict[str, Any]] = {}
+        self._peaks: List[int] = []  # 実行中のフェーズ（入れ子）ごとのピーク
+        self._sites_phase: Optional[str] = None
+        self._sites_snapshot = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self._peaks:
+            # 入れ子のフェーズでピークをリセットする前に、外側のフェーズのピークを退避
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        elif name != self._sites_phase:
+            self._close_sites()
+            self._sites_phase = name
+            self._sites_snapshot = self._snapshot()
+
+        stats = self.memory.get(name)
+        if stats is None:
+            stats = self.memory[name] = {
+                "traced_start": tracemalloc.get_traced_memory()[0],
+                "traced_end": None,
+                "traced_peak": 0,
+                "rss_start": current_rss(),
+                "rss_end": None,
+                "rss_peak": None
+            }
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(self._peaks.pop(), peak)
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            stats["traced_end"] = current
+            stats["traced_peak"] = max(stats["traced_peak"], peak)
+            stats["rss_end"] = current_rss()
+            # ru_maxrss は /proc の値より更新が遅れることがあるため、終了時の値を下限にする
+            stats["rss_peak"] = max(filter(None, (peak_rss(), stats["rss_end"])), default=None)
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def _close_sites(self):
+        """直前の一番外側のフェーズの開始時からの差分で、確保の多い行を記録"""
+        if self._sites_phase is None:
+            return
+        differences = self._snapshot().compare_to(self._sites_snapshot, 'lineno')
+        stats = self.memory[self._sites_phase]
+        sites = {site["site"]: site for site in stats.get("top", [])}
+        for difference in differences:
+            if difference.size_diff <= 0:
+                continue
+            site = sites.setdefault(_site(difference.traceback[0]), {
+                "site": _site(difference.traceback[0]), "size": 0, "count": 0
+            })
+            site["size"] += difference.size_diff
+            site["count"] += difference.count_diff
+        stats["top"] = sorted(sites.values(), key=lambda site: site["size"], reverse=True)[:TOP_ALLOCATION_SITES]
+        self._sites_phase = None
+        self._sites_snapshot = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        self._close_sites()
+        result = super().as_dict()
+        result["memory"] = {
+            "traced_peak": max((stats["traced_peak"] for stats in self.memory.values()), default=0),
+            "phases": self.memory
+        }
+        return result
+
+
+def metrics_enabled() -> bool:
+    """環境変数で計測が有効にされているか"""
+    return os.environ.get(METRICS_ENV, '').lower() in ('1', 'true', 'on')
+
+
+def enable_metrics():
+    """
+    計測を有効にする（--metrics）
+    環境変数に設定するので、このあと作成する計測オブジェクトと子プロセスにも適用される
+    """
+    os.environ[METRICS_ENV] = '1'
+
+
+def memory_profiling_enabled() -> bool:
+    """環境変数でメモリプロファイルが有効にされているか"""
+    return os.environ.get(PROFILE_MEMORY_ENV, '').lower() in ('1', 'true', 'on')
+
+
+def enable_memory_profiling():
+    """
+    メモリプロファイルを有効にする（--profile-memory）
+    環境変数に設定するので、このあと作成する計測オブジェクトと子プロセスにも適用される
+    """
+    os.environ[PROFILE_MEMORY_ENV] = '1'
+
+
+def take_profile_flags(argv: List[str]) -> List[str]:
+    """
+    位置引数だけを受け取るスクリプト用に、引数から --metrics / --profile-memory を取り除いて有効にする
+
+    Args:
+        argv: コマンドライン引数（sys.argv[1:]）
+
+    Returns:
+        --metrics / --profile-memory を除いた引数
+    """
+    if METRICS_FLAG in argv:
+        enable_metrics()
+    if PROFILE_MEMORY_FLAG in argv:
+        enable_memory_profiling()
+    return [arg for arg in argv if arg not in (METRICS_FLAG, PROFILE_MEMORY_FLAG)]
+
+
+def new_metrics(enabled: Optional[bool] = None):
+    """
+    計測オブジェクトを作成
+
+    Args:
+        enabled: 計測するか（Noneなら環境変数 PPTX_METRICS に従う）
+
+    Returns:
+        Metrics（メモリプロファイルが有効なら MemoryMetrics）、または無効なら NULL_METRICS
+    """
+    if memory_profiling_enabled():
+        return MemoryMetrics()
+    if enabled is None:
+        enabled = metrics_enabled()
+    return Metrics() if enabled else NULL_METRICS
+
+
+_END = object()
+
+
+def timed(iterable, metrics, name: str) -> Iterator[Any]:
+    """
+    イテレーターの各要素の取得にかかった時間をフェーズに加算しながら要素を返す
+    （ジェネレーターの途中で yield をまたいで計測しないため、呼び出し側の処理時間は含まない）
+
+    Args:
+        iterable: 計測するイテラブル
+        metrics: Metrics または NULL_METRICS
+        name: フェーズ名
+    """
+    iterator = iter(iterable)
+    while True:
+        with metrics.phase(name):
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        yield item
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+HTTP Range リクエストによるリモートPPTXの遅延読み込み
+zipの中央ディレクトリと、解析が必要なXMLパートだけを取得してプレゼンテーションを開く
+画像・動画などのバイナリは読み込まず、差分保存のときにリモートから出力へ直接転送する
+"""
+
+import io
+import re
+import zipfile
+from typing import Dict, List, Optional, Set, Tuple
+
+from pptx import Presentation
+
+from http_fetch import ConnectionPool, DownloadError, default_pool
+
+# 取得の単位（XMLパートはこの単位でまとめて取得してキャッシュする）
+BLOCK_SIZE = 64 * 1024
+
+# 最初に末尾から取得するサイズ（中央ディレクトリが収まることが多い）
+TAIL_SIZE = BLOCK_SIZE
+
+# ストリーミング転送の単位
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 解析に必要なパート（それ以外は中身を読まない）
+EAGER_SUFFIXES = ('.xml', '.rels')
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+# PPTXTranslator.download_status の値（Range リクエストで必要なパートだけを取得）
+RANGE = 'range'
+
+
+class RangeNotSupported(DownloadError):
+    """サーバーが Range リクエストに対応していない"""
+
+
+def is_lazy_member(name: str) -> bool:
+    """中身を読み込まずに済むエントリか（画像・動画・埋め込みファイルなど）"""
+    return not name.endswith(EAGER_SUFFIXES)
+
+
+class RemoteFile(io.RawIOBase):
+    """HTTP Range リクエストで読むシーク可能な読み込み専用ファイル"""
+
+    def __init__(self, url: str, pool: Optional[ConnectionPool] = None):
+        """
+        コンストラクタ（末尾を取得してファイルサイズを確認する）
+
+        Args:
+            url: リモートファイルのURL
+            pool: 接続プール（省略時はプロセス共通のプール）
+
+        Raises:
+            RangeNotSupported: サーバーが Range リクエストに対応していない場合
+        """
+        super().__init__()
+        self.url = url
+        self.pool = pool or default_pool()
+        self.name = url
+        self.position = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+        self.etag: Optional[str] = None
+        self._blocks: Dict[int, bytes] = {}
+
+        with self.pool.open(url, {'Range': f'bytes=-{TAIL_SIZE}'}) as response:
+            if response.status != 206:
+                # 本文は読まずに接続ごと捨てる（フォールバックの全体ダウンロードと二重に取得しない）
+                raise RangeNotSupported(f"Server did not honor Range request (HTTP {response.status}): {url}")
+            start, _, self.size = self._content_range(response)
+            self.etag = response.getheader('ETag')
+            data = response.read()
+        self._count(len(data))
+
+        # 末尾のデータのうちブロック境界に揃う部分をキャッシュする
+        first_block = -(-start // BLOCK_SIZE)
+        for block in range(first_block, self._block_count()):
+            offset = block * BLOCK_SIZE - start
+            self._blocks[block] = data[offset:offset + BLOCK_SIZE]
+
+    def _count(self, size: int):
+        self.requests += 1
+        self.bytes_fetched += size
+
+    def _block_count(self) -> int:
+        return -(-self.size // BLOCK_SIZE)
+
+    def _content_range(self, response) -> Tuple[int, int, int]:
+        """Content-Range ヘッダーを (開始, 終了, 全体サイズ) に分解"""
+        match = CONTENT_RANGE_PATTERN.match(response.getheader('Content-Range') or '')
+        if not match:
+            raise DownloadError(f"Invalid Content-Range: {response.getheader('Content-Range')}")
+        return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+    def _range_headers(self, start: int, end: int) -> Dict[str, str]:
+        """Range リクエストのヘッダー（途中でファイルが更新されていれば206を返さないよう If-Range を付ける）"""
+        headers = {'Range': f'bytes={start}-{end}'}
+        if self.etag:
+            headers['If-Range'] = self.etag
+        return headers
+
+    def _check_partial(self, response, start: int):
+        """206で要求した位置から返ってきたか"""
+        if response.status != 206:
+            # 本文（ファイル全体）は読まずに接続ごと捨てる
+            raise DownloadError(f"Remote file changed or Range not honored (HTTP {response.status}): {self.url}")
+        if self._content_range(response)[0] != start:
+            raise DownloadError(f"Unexpected Content-Range: {response.getheader('Content-Range')}")
+
+    def _fetch_blocks(self, first: int, last: int):
+        """first から last までの連続したブロックを1回のリクエストで取得"""
+        start = first * BLOCK_SIZE
+        end = min((last + 1) * BLOCK_SIZE, self.size) - 1
+        with self.pool.open(self.url, self._range_headers(start, end)) as response:
+            self._check_partial(response, start)
+            data = response.read()
+        if len(data) != end - start + 1:
+            raise DownloadError(f"Incomplete range ({len(data)}/{end - start + 1} bytes)")
+        self._count(len(data))
+        for block in range(first, last + 1):
+            offset = (block - first) * BLOCK_SIZE
+            self._blocks[block] = data[offset:offset + BLOCK_SIZE]
+
+    def _ensure_blocks(self, blocks: List[int]):
+        """キャッシュにないブロックを、連続する範囲ごとにまとめて取得"""
+        missing = sorted(block for block in set(blocks) if block not in self._blocks)
+        run_start = None
+        previous = None
+        for block in missing:
+            if run_start is None:
+                run_start = block
+            elif block != previous + 1:
+                self._fetch_blocks(run_start, previous)
+                run_start = block
+            previous = block
+        if run_start is not None:
+            self._fetch_blocks(run_start, previous)
+
+    def prefetch(self, spans: List[Tuple[int, int]]):
+        """
+        複数の範囲をまとめて取得しておく
+
+        Args:
+            spans: (開始位置, バイト数) のリスト
+        """
+        blocks = []
+        for offset, length in spans:
+            if length > 0:
+                blocks.extend(range(offset // BLOCK_SIZE, (offset + length - 1) // BLOCK_SIZE + 1))
+        self._ensure_blocks(blocks)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = max(0, min(size, self.size - self.position))
+        if size == 0:
+            return b''
+
+        first = self.position // BLOCK_SIZE
+        last = (self.position + size - 1) // BLOCK_SIZE
+        self._ensure_blocks(list(range(first, last + 1)))
+
+        data = b''.join(self._blocks[block] for block in range(first, last + 1))
+        offset = self.position - first * BLOCK_SIZE
+        self.position += size
+        return data[offset:offset + size]
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def copy_range(self, offset: int, length: int, out):
+        """
+        範囲をキャッシュせずに1回のリクエストで出力へ転送（差分保存で変更していないエントリのコピー用）
+
+        Args:
+            offset: 開始位置
+            length: バイト数
+            out: 書き込み先
+        """
+        if length <= 0:
+            return
+        with self.pool.open(self.url, self._range_headers(offset, offset + length - 1)) as response:
+            self._check_partial(response, offset)
+            remaining = length
+            while remaining > 0:
+                chunk = response.read(min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    raise DownloadError(f"Incomplete range ({length - remaining}/{length} bytes)")
+                out.write(chunk)
+                remaining -= len(chunk)
+        self._count(length)
+
+
+def _member_spans(zf: zipfile.ZipFile) -> Dict[str, Tuple[int, int]]:
+    """各エントリのローカルレコードの範囲（次のエントリの先頭、最後は中央ディレクトリまで）"""
+    infos = sorted(zf.infolist(), key=lambda info: info.header_offset)
+    spans = {}
+    for position, info in enumerate(infos):
+        end = infos[position + 1].header_offset if position + 1 < len(infos) else zf.start_dir
+        spans[info.filename] = (info.header_offset, end - info.header_offset)
+    return spans
+
+
+class RemotePresentation:
+    """リモートPPTXから必要なパートだけを読み込んだプレゼンテーション"""
+
+    def __init__(self, url: str, pool: Optional[ConnectionPool] = None):
+        """
+        コンストラクタ（中央ディレクトリとXMLパートを取得してプレゼンテーションを開く）
+
+        Args:
+            url: リモートPPTXのURL
+            pool: 接続プール（省略時はプロセス共通のプール）
+
+        Raises:
+            RangeNotSupported: サーバーが Range リクエストに対応していない場合
+        """
+        self.remote = RemoteFile(url, pool)
+        self.zip_file = zipfile.ZipFile(self.remote)
+        self.lazy_members: Set[str] = {name for name in self.zip_file.namelist() if is_lazy_member(name)}
+
+        # XMLパートの範囲をまとめて先に取得し、1パートごとのリクエストを避ける
+        spans = _member_spans(self.zip_file)
+        self.remote.prefetch([spans[name] for name in spans if name not in self.lazy_members])
+
+        # バイナリは空のまま、XMLパートだけを持つ骨組みのパッケージを作る
+        skeleton = io.BytesIO()
+        with zipfile.ZipFile(skeleton, 'w', zipfile.ZIP_STORED) as out:
+            for info in self.zip_file.infolist():
+                data = b'' if info.filename in self.lazy_members else self.zip_file.read(info.filename)
+                out.writestr(zipfile.ZipInfo(info.filename, date_time=info.date_time), data)
+        skeleton.seek(0)
+        self.presentation = Presentation(skeleton)
+
+    def hydrate(self):
+        """
+        読み込んでいないパートの中身を取得する
+        （差分保存できずに python-pptx で保存し直す場合、空のままだと画像などが失われるため）
+        """
+        for part in self.presentation.part.package.iter_parts():
+            name = part.partname.membername
+            if name in self.lazy_members:
+                part._blob = self.zip_file.read(name)
+        self.lazy_members = set()
+
+    def stats(self) -> Dict[str, int]:
+        """取得したリクエスト数とバイト数"""
+        return {
+            "size": self.remote.size,
+            "requests": self.remote.requests,
+            "bytes_fetched": self.remote.bytes_fetched
+        }
+
+    def close(self):
+        self.zip_file.close()
+        self.remote.close()
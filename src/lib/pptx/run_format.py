@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+XMLレベルの書式コピー
+python-pptxのプロキシ経由で属性を1つずつ読み書きする代わりに、
+a:rPr / a:pPr 要素を丸ごと複製して新しいラン・段落に付け替える
+（テーマカラーや latin/ea フォントなど、プロキシが扱わない書式もそのまま保持される）
+"""
+
+from copy import deepcopy
+from typing import Optional
+
+NS_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+A_RPR = f'{{{NS_A}}}rPr'
+A_PPR = f'{{{NS_A}}}pPr'
+
+# フォントサイズは1/100ポイント単位
+DEFAULT_FONT_SIZE = 1100
+
+
+def run_properties(run):
+    """ランの a:rPr 要素（なければNone）。段落をクリアした後も参照は有効"""
+    return run._r.find(A_RPR)
+
+
+def paragraph_properties(paragraph):
+    """段落の a:pPr 要素（なければNone）"""
+    return paragraph._p.find(A_PPR)
+
+
+def _replace_child(parent, tag: str, source):
+    """parent の先頭の tag 要素を source の複製で置き換える（source がNoneなら何もしない）"""
+    if source is None:
+        return None
+    clone = deepcopy(source)
+    existing = parent.find(tag)
+    if existing is not None:
+        parent.remove(existing)
+    # a:rPr / a:pPr はどちらも先頭の子要素でなければならない
+    parent.insert(0, clone)
+    return clone
+
+
+def clone_run_properties(rPr, target_run):
+    """
+    a:rPr をターゲットのランに複製
+
+    Args:
+        rPr: コピー元の a:rPr 要素（None可）
+        target_run: コピー先のラン
+
+    Returns:
+        複製された a:rPr 要素（コピー元がNoneならNone）
+    """
+    return _replace_child(target_run._r, A_RPR, rPr)
+
+
+def clone_paragraph_properties(pPr, target_paragraph):
+    """
+    a:pPr をターゲットの段落に複製
+
+    Args:
+        pPr: コピー元の a:pPr 要素（None可）
+        target_paragraph: コピー先の段落
+
+    Returns:
+        複製された a:pPr 要素（コピー元がNoneならNone）
+    """
+    return _replace_child(target_paragraph._p, A_PPR, pPr)
+
+
+def has_font_size(rPr: Optional[object]) -> bool:
+    """a:rPr にフォントサイズが直接指定されているか"""
+    return rPr is not None and rPr.get('sz') is not None
+
+
+def set_default_font_size(run, size: int = DEFAULT_FONT_SIZE):
+    """フォントサイズが未指定のランにデフォルトサイズを設定"""
+    rPr = run._r.get_or_add_rPr()
+    if rPr.get('sz') is None:
+        rPr.set('sz', str(size))
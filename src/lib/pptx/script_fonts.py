@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+文字体系（スクリプト）の判定とフォントのフォールバック
+翻訳後のテキストがどの文字体系かを1回の走査で判定し、文字体系ごとのフォント表から
+ランに設定するフォントを決める（同じ文字列の判定結果はキャッシュする）
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from run_format import NS_A
+
+# 文字体系
+LATIN = 'latin'
+JAPANESE = 'japanese'
+CHINESE = 'chinese'
+KOREAN = 'korean'
+THAI = 'thai'
+ARABIC = 'arabic'
+HEBREW = 'hebrew'
+DEVANAGARI = 'devanagari'
+CYRILLIC = 'cyrillic'
+GREEK = 'greek'
+
+# 漢字だけのテキストは日本語か中国語か区別できないため、デフォルトで日本語として扱う
+DEFAULT_HAN_SCRIPT = JAPANESE
+
+# 翻訳先の言語コード（主言語の部分）から漢字だけのテキストの文字体系へ
+HAN_SCRIPT_LANGUAGES = {
+    'ja': JAPANESE,
+    'zh': CHINESE,
+    'cmn': CHINESE,
+    'yue': CHINESE,
+}
+
+# 文字クラス（正規表現の名前付きグループ名, 文字の範囲）
+_CHARACTER_CLASSES = (
+    ('kana', r'\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f'),
+    ('hangul', r'\u1100-\u11ff\u3130-\u318f\uac00-\ud7af'),
+    ('han', r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0002fa1f'),
+    ('arabic', r'\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff\ufe70-\ufeff'),
+    ('hebrew', r'\u0590-\u05ff\ufb1d-\ufb4f'),
+    ('thai', r'\u0e00-\u0e7f'),
+    ('devanagari', r'\u0900-\u097f'),
+    ('cyrillic', r'\u0400-\u04ff'),
+    ('greek', r'\u0370-\u03ff'),
+)
+
+# 全文字クラスを1つの正規表現にまとめ、テキストを1回だけ走査する
+_CHARACTER_PATTERN = re.compile('|'.join(f'(?P<{name}>[{ranges}]+)' for name, ranges in _CHARACTER_CLASSES))
+
+# 複数の文字体系が混ざっている場合の優先順位（先にあるものでフォントを決める）
+_PRIORITY = (
+    ('kana', JAPANESE),
+    ('hangul', KOREAN),
+    ('han', None),  # DEFAULT_HAN_SCRIPT または han_script
+    ('arabic', ARABIC),
+    ('hebrew', HEBREW),
+    ('thai', THAI),
+    ('devanagari', DEVANAGARI),
+    ('cyrillic', CYRILLIC),
+    ('greek', GREEK),
+)
+
+# 文字体系ごとのフォント（優先順位順）
+FONT_FALLBACKS: Dict[str, Tuple[str, ...]] = {
+    JAPANESE: (
+        "游ゴシック",
+        "Yu Gothic",
+        "メイリオ",
+        "Meiryo",
+        "ＭＳ ゴシック",
+        "MS Gothic",
+        "ヒラギノ角ゴ Pro",
+        "Hiragino Kaku Gothic Pro",
+        "Noto Sans CJK JP",
+        "源ノ角ゴシック",
+    ),
+    CHINESE: (
+        "Microsoft YaHei",
+        "微软雅黑",
+        "SimHei",
+        "PingFang SC",
+        "Noto Sans CJK SC",
+    ),
+    KOREAN: (
+        "Malgun Gothic",
+        "맑은 고딕",
+        "Apple SD Gothic Neo",
+        "Noto Sans CJK KR",
+    ),
+    THAI: (
+        "Leelawadee UI",
+        "Tahoma",
+        "Thonburi",
+        "Noto Sans Thai",
+    ),
+    ARABIC: (
+        "Segoe UI",
+        "Arial",
+        "Geeza Pro",
+        "Noto Sans Arabic",
+    ),
+    HEBREW: (
+        "Segoe UI",
+        "Arial",
+        "Noto Sans Hebrew",
+    ),
+    DEVANAGARI: (
+        "Nirmala UI",
+        "Mangal",
+        "Noto Sans Devanagari",
+    ),
+    LATIN: (
+        "Calibri",
+        "Arial",
+        "Helvetica",
+        "Segoe UI",
+    ),
+}
+
+# 文字体系ごとのフォントの設定先（a:rPr の子要素）
+# 東アジアの文字は a:ea、複雑な文字体系（右から左・結合文字）は a:cs、
+# ラテン・キリル・ギリシャ文字は元の書式のままでよいので設定しない
+FONT_SLOTS: Dict[str, Optional[str]] = {
+    JAPANESE: 'ea',
+    CHINESE: 'ea',
+    KOREAN: 'ea',
+    THAI: 'cs',
+    ARABIC: 'cs',
+    HEBREW: 'cs',
+    DEVANAGARI: 'cs',
+    LATIN: None,
+    CYRILLIC: None,
+    GREEK: None,
+}
+
+# a:rPr の子要素で a:ea / a:cs より後に来るもの
+_SLOT_SUCCESSORS = {
+    'ea': ('a:cs', 'a:sym', 'a:hlinkClick', 'a:hlinkMouseOver', 'a:rtl', 'a:extLst'),
+    'cs': ('a:sym', 'a:hlinkClick', 'a:hlinkMouseOver', 'a:rtl', 'a:extLst'),
+}
+
+# 判定結果をキャッシュする文字列の数
+DETECT_CACHE_SIZE = 65536
+
+
+def character_classes(text: str) -> FrozenSet[str]:
+    """テキストに含まれる文字クラス（kana / han / hangul など）"""
+    return frozenset(match.lastgroup for match in _CHARACTER_PATTERN.finditer(text))
+
+
+@lru_cache(maxsize=DETECT_CACHE_SIZE)
+def detect_script(text: str, han_script: str = DEFAULT_HAN_SCRIPT) -> str:
+    """
+    フォントを決める文字体系を判定
+
+    Args:
+        text: 判定するテキスト
+        han_script: 漢字だけのテキストを扱う文字体系（JAPANESE または CHINESE）
+
+    Returns:
+        文字体系（対象の文字を含まなければ LATIN）
+    """
+    if not text:
+        return LATIN
+    classes = character_classes(text)
+    for character_class, script in _PRIORITY:
+        if character_class in classes:
+            return script or han_script
+    return LATIN
+
+
+def han_script_for_language(language: Optional[str]) -> str:
+    """
+    翻訳先の言語コードから漢字だけのテキストを扱う文字体系を決める
+
+    Args:
+        language: 言語コード（"zh" / "zh-CN" / "zh_Hant" / "ja" など。Noneなら不明）
+
+    Returns:
+        detect_script() の han_script に渡す文字体系（不明な言語なら DEFAULT_HAN_SCRIPT）
+    """
+    if not language:
+        return DEFAULT_HAN_SCRIPT
+    primary = language.replace('_', '-').split('-', 1)[0].lower()
+    return HAN_SCRIPT_LANGUAGES.get(primary, DEFAULT_HAN_SCRIPT)
+
+
+def is_font_for_script(font_name: Optional[str], script: str) -> bool:
+    """フォント名が文字体系のフォント表に含まれるか（"游ゴシック Light" なども一致とみなす）"""
+    if not font_name:
+        return False
+    return any(candidate in font_name for candidate in FONT_FALLBACKS.get(script, ()))
+
+
+def is_theme_font(font_name: Optional[str]) -> bool:
+    """テーマフォントの参照か（+mn-ea / +mj-cs など）"""
+    return bool(font_name) and font_name.startswith('+')
+
+
+def _ensure_slot_typeface(run, slot: str, script: str):
+    """
+    a:ea / a:cs の typeface を文字体系に合ったフォントにする
+    テーマフォントの参照と、文字体系に対応したフォントの指定はそのまま残し、
+    対応しないフォント（日本語のデッキを韓国語に訳したときの Meiryo など）は置き換える
+    """
+    rPr = run._r.get_or_add_rPr()
+    element = rPr.find(f'{{{NS_A}}}{slot}')
+    if element is None:
+        element = rPr.makeelement(f'{{{NS_A}}}{slot}', {})
+        rPr.insert_element_before(element, *_SLOT_SUCCESSORS[slot])
+    else:
+        typeface = element.get('typeface')
+        if is_theme_font(typeface) or is_font_for_script(typeface, script):
+            return
+    element.set('typeface', FONT_FALLBACKS[script][0])
+
+
+def ensure_script_font(run, script: str):
+    """
+    文字体系に合ったフォントをランに設定
+
+    Args:
+        run: python-pptxのラン
+        script: detect_script() の結果
+    """
+    slot = FONT_SLOTS.get(script)
+    if slot is None:
+        return
+    fonts = FONT_FALLBACKS[script]
+
+    if slot == 'ea':
+        # 従来どおりラテンフォントも東アジアのフォントにそろえる（元が対応フォントならそのまま）
+        if not is_font_for_script(run.font.name, script):
+            run.font.name = fonts[0]
+    _ensure_slot_typeface(run, slot, script)
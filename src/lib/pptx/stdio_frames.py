@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+標準入出力の長さプレフィックス付きフレーム
+一時ファイルを使わずにPPTXとJSONをやり取りするためのフレーミング
+
+フレーム形式:
+    8バイトのビッグエンディアン符号なし整数（ペイロード長） + ペイロード
+
+小さなデッキはメモリ上で処理し、上限を超える場合だけ一時ファイルに退避する
+"""
+
+import shutil
+import struct
+import tempfile
+from typing import IO, Optional
+
+FRAME_HEADER = struct.Struct('>Q')
+
+# これを超えるペイロードはメモリではなく一時ファイルに退避する
+SPOOL_MAX_BYTES = 128 * 1024 * 1024
+
+# ペイロードをコピーする単位
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _read_exact(stream: IO[bytes], size: int) -> bytes:
+    """size バイトを読み切る（途中でEOFなら例外）"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            raise EOFError(f"Unexpected end of stream ({size - remaining}/{size} bytes)")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def _read_length(stream: IO[bytes]) -> Optional[int]:
+    """フレームヘッダーを読む（ストリームの終端ならNone）"""
+    first = stream.read(1)
+    if not first:
+        return None
+    header = first + _read_exact(stream, FRAME_HEADER.size - 1)
+    return FRAME_HEADER.unpack(header)[0]
+
+
+def read_frame(stream: IO[bytes], spool_max_bytes: int = SPOOL_MAX_BYTES) -> Optional[IO[bytes]]:
+    """
+    1フレームを読み込む
+
+    Args:
+        stream: 入力ストリーム（バイナリ）
+        spool_max_bytes: メモリに保持する上限（超えたら一時ファイルに退避）
+
+    Returns:
+        先頭にシークしたファイルオブジェクト（ストリームの終端ならNone）
+    """
+    length = _read_length(stream)
+    if length is None:
+        return None
+
+    payload = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(min(remaining, COPY_CHUNK_SIZE))
+        if not chunk:
+            payload.close()
+            raise EOFError(f"Unexpected end of stream ({length - remaining}/{length} bytes)")
+        payload.write(chunk)
+        remaining -= len(chunk)
+    payload.seek(0)
+    return payload
+
+
+def read_frame_bytes(stream: IO[bytes]) -> Optional[bytes]:
+    """1フレームをバイト列として読み込む（JSONなど小さなペイロード用）"""
+    length = _read_length(stream)
+    if length is None:
+        return None
+    return _read_exact(stream, length)
+
+
+def write_frame(stream: IO[bytes], data: bytes):
+    """バイト列を1フレームとして書き出す"""
+    stream.write(FRAME_HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def write_frame_from(stream: IO[bytes], payload: IO[bytes]):
+    """ファイルオブジェクトの内容全体を1フレームとして書き出す"""
+    payload.seek(0, 2)
+    length = payload.tell()
+    payload.seek(0)
+    stream.write(FRAME_HEADER.pack(length))
+    shutil.copyfileobj(payload, stream, COPY_CHUNK_SIZE)
+    stream.flush()
+
+
+def new_payload(spool_max_bytes: int = SPOOL_MAX_BYTES) -> IO[bytes]:
+    """出力デッキの書き込み先（上限までメモリ、超えたら一時ファイル）"""
+    return tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
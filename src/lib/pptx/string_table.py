@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+重複のない文字列テーブル
+フッター・免責事項・表の見出しなど、全スライドで繰り返される文字列を1回だけ出力・翻訳するため、
+抽出結果のテキストを "strings" テーブルの番号で参照する形式に変換し、
+番号で指定した翻訳を各スクリプトの翻訳データの形式に展開する
+
+抽出結果（extract_text.py --strings）:
+    {"strings": [{"text": "Confidential", "count": 42}, ...],
+     "slides": [{"slide_number": 1, "texts": [{"string": 0, "locator": {...}, ...}, ...]}, ...]}
+
+番号で指定した翻訳データ（抽出結果の "strings" に "translated" を追加するか、"translations" に番号 -> 訳文を指定）:
+    {"strings": [{"text": "Confidential", "translated": "社外秘"}, ...], "slides": [...]}
+    {"translations": {"0": "社外秘", ...}, "slides": [...]}
+"""
+
+import unicodedata
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """テーブルのキーにする正規化（Unicode正規化NFCと前後の空白の除去）"""
+    return unicodedata.normalize('NFC', text).strip()
+
+
+class StringTable:
+    """出現順に番号を振った重複のない文字列と出現回数"""
+
+    def __init__(self):
+        self.indexes: Dict[str, int] = {}
+        self.strings: List[Dict[str, Any]] = []
+
+    def add(self, text: str) -> int:
+        """文字列を登録して番号を返す（登録済みなら出現回数を加算）"""
+        text = normalize_text(text)
+        index = self.indexes.get(text)
+        if index is None:
+            index = self.indexes[text] = len(self.strings)
+            self.strings.append({"text": text, "count": 0})
+        self.strings[index]["count"] += 1
+        return index
+
+
+def dedupe_slides(slides: List[Dict[str, Any]], table: StringTable) -> List[Dict[str, Any]]:
+    """
+    抽出したスライドの "text" を文字列テーブルの番号 "string" に置き換える（シェイプとテーブルのセル）
+
+    Args:
+        slides: 抽出結果のスライド（その場で書き換える）
+        table: 登録先の文字列テーブル
+
+    Returns:
+        書き換えたスライド
+    """
+    for slide_data in slides:
+        for text_data in slide_data["texts"]:
+            for node in text_data.get("cells") or (text_data,):
+                if "text" in node:
+                    node["string"] = table.add(node.pop("text"))
+    return slides
+
+
+def dedupe_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    抽出結果を文字列テーブル形式に変換（失敗した結果はそのまま）
+
+    Args:
+        result: extract_text_from_pptx() の結果（その場で書き換える）
+
+    Returns:
+        "strings" を追加した結果
+    """
+    if result.get("success"):
+        table = StringTable()
+        dedupe_slides(result["slides"], table)
+        result["strings"] = table.strings
+    return result
+
+
+def is_string_keyed(data: Any) -> bool:
+    """翻訳データが文字列テーブルの番号で指定した形式か"""
+    return isinstance(data, dict) and "slides" in data and ("strings" in data or "translations" in data)
+
+
+def _translated_strings(data: Dict[str, Any]) -> List[Optional[str]]:
+    """番号ごとの訳文（"strings" の "translated" を "translations" で上書き）"""
+    translated: List[Optional[str]] = [
+        entry.get("translated") if isinstance(entry, dict) else None
+        for entry in data.get("strings") or []
+    ]
+    overrides = data.get("translations") or {}
+    items = enumerate(overrides) if isinstance(overrides, list) else overrides.items()
+    for index, text in items:
+        index = int(index)
+        if index >= len(translated):
+            translated.extend([None] * (index + 1 - len(translated)))
+        translated[index] = text
+    return translated
+
+
+def iter_string_translations(data: Dict[str, Any]) -> Iterator[Tuple[int, str, str, Optional[Dict[str, Any]]]]:
+    """
+    番号で指定した翻訳を出現箇所ごとに展開
+
+    Args:
+        data: 番号で指定した翻訳データ
+
+    Yields:
+        (スライド番号, 元テキスト, 訳文, ロケーター)（訳文のない文字列は飛ばす）
+    """
+    originals = [entry.get("text", '') if isinstance(entry, dict) else '' for entry in data.get("strings") or []]
+    translated = _translated_strings(data)
+
+    for slide_data in data["slides"]:
+        slide_number = slide_data.get("slide_number", 0)
+        for text_data in slide_data.get("texts", []):
+            for node in text_data.get("cells") or (text_data,):
+                index = node.get("string")
+                if index is None or index >= len(translated) or not translated[index]:
+                    continue
+                original = originals[index] if index < len(originals) else ''
+                yield slide_number, original, translated[index], node.get("locator")
+
+
+def _group_by_slide(data: Dict[str, Any]) -> Dict[int, List[Tuple[str, str, Optional[Dict[str, Any]]]]]:
+    slides: Dict[int, List[Tuple[str, str, Optional[Dict[str, Any]]]]] = {}
+    for slide_number, original, translated, locator in iter_string_translations(data):
+        slides.setdefault(slide_number, []).append((original, translated, locator))
+    return slides
+
+
+def to_edited_slides(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """generate_pptx.py の編集済みスライドの形式に展開"""
+    return [
+        {"pageNumber": slide_number, "texts": [
+            {"original": original, "translated": translated, "locator": locator}
+            for original, translated, locator in items
+        ]}
+        for slide_number, items in _group_by_slide(data).items()
+    ]
+
+
+def to_apply_translations(data: Dict[str, Any]) -> Dict[str, Any]:
+    """apply_translations.py / apply_translations_v2.py の翻訳データの形式に展開"""
+    return {"slides": [
+        {"slide_number": slide_number, "translations": [
+            {"original": original, "translated": translated, "locator": locator}
+            for original, translated, locator in items
+        ]}
+        for slide_number, items in _group_by_slide(data).items()
+    ]}
+
+
+def to_update_translations(data: Dict[str, Any]) -> Dict[int, List[Dict[str, Any]]]:
+    """update_pptx.py の翻訳データの形式に展開（ロケーターで位置を指定）"""
+    return {
+        slide_number: [
+            {"locator": locator, "translated_text": translated}
+            for _, translated, locator in items if locator is not None
+        ]
+        for slide_number, items in _group_by_slide(data).items()
+    }
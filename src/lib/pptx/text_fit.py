@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+訳文をテキストフレームに収めるフォントサイズの調整
+フォントごとの文字幅表（1000分率の送り幅）とシェイプの大きさから折り返し後の幅・高さを見積もり、
+描画せずに枠に収まる最大のフォントサイズを選ぶ（英→独・日→英などで訳文が長くなった場合の対策）
+文字幅はフォントごとに1回だけ計算してキャッシュするので、大きなデッキの全テキストフレームに使える
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from run_format import NS_A
+
+# 1ポイント = 12700 EMU
+EMU_PER_POINT = 12700
+
+# a:bodyPr の余白のデフォルト（EMU）
+DEFAULT_INSETS = (91440, 45720, 91440, 45720)  # 左, 上, 右, 下
+
+# サイズが継承されていて分からない段落のフォントサイズ（1/100ポイント、PowerPointの本文のデフォルト）
+INHERITED_FONT_SIZE = 1800
+
+# 縮小の下限（1/100ポイント）と、元のサイズに対する下限の比率
+MIN_FONT_SIZE = 800
+MIN_SCALE = 0.5
+
+# 縮小の刻み（1/100ポイント）
+SIZE_STEP = 50
+
+# 行の高さ（フォントサイズに対する比率、行間100%のとき）
+LINE_HEIGHT = 1.2
+
+# 全角の文字の送り幅（1000分率）
+FULL_WIDTH = 1000
+
+# Helvetica / Arial の ASCII 32〜126 の送り幅（AFM の値、1000分率）
+HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+
+# Times Roman / Times New Roman の ASCII 32〜126 の送り幅（AFM の値、1000分率）
+TIMES_WIDTHS = (
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)
+
+# フォント名（小文字）-> (基準の文字幅表, 倍率)。表にないフォントは Arial として見積もる
+FONT_TABLES: Dict[str, Tuple[Tuple[int, ...], float]] = {
+    'arial': (HELVETICA_WIDTHS, 1.0),
+    'helvetica': (HELVETICA_WIDTHS, 1.0),
+    'liberation sans': (HELVETICA_WIDTHS, 1.0),
+    'segoe ui': (HELVETICA_WIDTHS, 1.0),
+    'calibri': (HELVETICA_WIDTHS, 0.9),
+    'calibri light': (HELVETICA_WIDTHS, 0.88),
+    'tahoma': (HELVETICA_WIDTHS, 0.97),
+    'verdana': (HELVETICA_WIDTHS, 1.12),
+    'times new roman': (TIMES_WIDTHS, 1.0),
+    'times': (TIMES_WIDTHS, 1.0),
+    'cambria': (TIMES_WIDTHS, 1.05),
+    'georgia': (TIMES_WIDTHS, 1.1),
+}
+DEFAULT_FONT_NAME = 'arial'
+
+# 折り返しの単位（空白・全角文字は1文字ずつ・それ以外は空白までの語）
+_WIDE_RANGES = r'\u1100-\u11ff\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef\U00020000-\U0002fa1f'
+_TOKEN_PATTERN = re.compile(rf'(\s+)|([{_WIDE_RANGES}])|([^\s{_WIDE_RANGES}]+)')
+
+A_R = f'{{{NS_A}}}r'
+A_BR = f'{{{NS_A}}}br'
+A_FLD = f'{{{NS_A}}}fld'
+A_T = f'{{{NS_A}}}t'
+A_RPR = f'{{{NS_A}}}rPr'
+A_PPR = f'{{{NS_A}}}pPr'
+A_END_PARA_RPR = f'{{{NS_A}}}endParaRPr'
+A_LATIN = f'{{{NS_A}}}latin'
+A_BODY_PR = f'{{{NS_A}}}bodyPr'
+A_LN_SPC = f'{{{NS_A}}}lnSpc'
+A_SPC_BEF = f'{{{NS_A}}}spcBef'
+A_SPC_AFT = f'{{{NS_A}}}spcAft'
+A_SPC_PCT = f'{{{NS_A}}}spcPct'
+A_SPC_PTS = f'{{{NS_A}}}spcPts'
+
+
+class FontMetrics:
+    """1つのフォントの文字幅（1000分率）。文字ごとの幅は初回に計算してキャッシュする"""
+
+    def __init__(self, ascii_widths: Sequence[int], scale: float = 1.0):
+        """
+        コンストラクタ
+
+        Args:
+            ascii_widths: ASCII 32〜126 の送り幅
+            scale: 基準の表に対する倍率（同系統のフォントの幅の違い）
+        """
+        self.widths: Dict[str, float] = {
+            chr(32 + offset): width * scale for offset, width in enumerate(ascii_widths)
+        }
+        lowercase = [self.widths[ch] for ch in 'abcdefghijklmnopqrstuvwxyz']
+        self.average_width = sum(lowercase) / len(lowercase)
+
+    def _measure(self, ch: str) -> float:
+        """表にない文字の幅（全角は1em、アクセント付きの文字は基の文字、それ以外は小文字の平均）"""
+        if unicodedata.east_asian_width(ch) in ('W', 'F'):
+            width = FULL_WIDTH
+        elif unicodedata.combining(ch):
+            width = 0.0
+        else:
+            base = unicodedata.normalize('NFD', ch)[0]
+            width = self.widths.get(base, self.average_width)
+        self.widths[ch] = width
+        return width
+
+    def text_width(self, text: str) -> float:
+        """テキストの送り幅の合計（1000分率）"""
+        widths = self.widths
+        return sum(widths[ch] if ch in widths else self._measure(ch) for ch in text)
+
+
+@lru_cache(maxsize=None)
+def _table_metrics(table_name: str) -> FontMetrics:
+    """FONT_TABLES のフォントの文字幅表（フォントごとに1回だけ作成）"""
+    ascii_widths, scale = FONT_TABLES[table_name]
+    return FontMetrics(ascii_widths, scale)
+
+
+def font_metrics(font_name: Optional[str]) -> FontMetrics:
+    """
+    フォントの文字幅表
+
+    Args:
+        font_name: a:latin の typeface（表にないフォント・テーマフォント・Noneは Arial として見積もる）
+    """
+    table_name = (font_name or '').lower()
+    return _table_metrics(table_name if table_name in FONT_TABLES else DEFAULT_FONT_NAME)
+
+
+
+# 折り返し計算のトークンの種類
+_WORD = 0
+_SPACE = 1
+_BREAK = 2
+
+
+class _Paragraph:
+    """折り返し計算用の段落（幅・高さはフォントサイズ1倍のときのpt）"""
+
+    __slots__ = ('tokens', 'largest', 'line_height', 'line_scales', 'space_scaled', 'space_fixed')
+
+    def __init__(self):
+        self.tokens: List[Tuple[float, int, bool]] = []  # (幅, 種類, 縮小するか)
+        self.largest = 0  # 直接指定された最大のフォントサイズ（1/100ポイント）
+        self.line_height = 0.0
+        self.line_scales = True
+        self.space_scaled = 0.0  # 段落前後の間隔のうちフォントサイズに比例する分
+        self.space_fixed = 0.0   # ポイントで指定された分
+
+    def line_count(self, available: float, scale: float) -> int:
+        """幅 available（pt）で折り返したときの行数"""
+        lines = 1
+        x = 0.0
+        for width, kind, scalable in self.tokens:
+            if kind == _BREAK:
+                lines += 1
+                x = 0.0
+                continue
+            if scalable:
+                width *= scale
+            if kind == _SPACE:
+                # 行末の空白は幅に数えない（次の語が入らなければそこで改行する）
+                x += width
+                continue
+            if x > 0 and x + width > available:
+                lines += 1
+                x = 0.0
+            if width > available:
+                # 1行に入らない語は語の途中で折り返す
+                extra = int(width // available)
+                lines += extra
+                x = width - extra * available
+            else:
+                x += width
+        return lines
+
+    def max_width(self, scale: float) -> float:
+        """折り返さない場合の最も長い行の幅（pt）"""
+        longest = 0.0
+        x = 0.0
+        for width, kind, scalable in self.tokens:
+            if kind == _BREAK:
+                x = 0.0
+                continue
+            x += width * scale if scalable else width
+            longest = max(longest, x)
+        return longest
+
+    def height(self, lines: int, scale: float) -> float:
+        """lines 行のときの段落の高さ（pt、段落前後の間隔を含む）"""
+        line_height = self.line_height * scale if self.line_scales else self.line_height
+        return lines * line_height + self.space_scaled * scale + self.space_fixed
+
+
+def _spacing(pPr, tag: str) -> Tuple[float, float]:
+    """a:lnSpc / a:spcBef / a:spcAft を (フォントサイズに対する比率, pt) に変換"""
+    spacing = pPr.find(tag) if pPr is not None else None
+    if spacing is None:
+        return 0.0, 0.0
+    pct = spacing.find(A_SPC_PCT)
+    if pct is not None:
+        return int(pct.get('val', '0')) / 100000, 0.0
+    pts = spacing.find(A_SPC_PTS)
+    if pts is not None:
+        return 0.0, int(pts.get('val', '0')) / 100
+    return 0.0, 0.0
+
+
+def _measure_paragraph(p) -> _Paragraph:
+    """a:p を折り返し計算用の段落に変換（サイズが継承されているランは INHERITED_FONT_SIZE とみなし、縮小しない）"""
+    paragraph = _Paragraph()
+    tokens = paragraph.tokens
+    line_size = 0
+    line_scales = True
+
+    for child in p:
+        if child.tag == A_BR:
+            tokens.append((0.0, _BREAK, False))
+            continue
+        if child.tag not in (A_R, A_FLD):
+            continue
+        rPr = child.find(A_RPR)
+        explicit = rPr is not None and rPr.get('sz') is not None
+        size = int(rPr.get('sz')) if explicit else INHERITED_FONT_SIZE
+        if explicit:
+            paragraph.largest = max(paragraph.largest, size)
+        if size > line_size or (size == line_size and not explicit):
+            line_size, line_scales = size, explicit
+
+        text_element = child.find(A_T)
+        text = text_element.text if text_element is not None else None
+        if not text:
+            continue
+        latin = rPr.find(A_LATIN) if rPr is not None else None
+        metrics = font_metrics(latin.get('typeface') if latin is not None else None)
+        points = size / 100000
+        for match in _TOKEN_PATTERN.finditer(text):
+            kind = _SPACE if match.group(1) is not None else _WORD
+            tokens.append((metrics.text_width(match.group()) * points, kind, explicit))
+
+    if not line_size:
+        # 空の段落は a:endParaRPr のサイズで1行分の高さを取る
+        end_rPr = p.find(A_END_PARA_RPR)
+        explicit = end_rPr is not None and end_rPr.get('sz') is not None
+        line_size = int(end_rPr.get('sz')) if explicit else INHERITED_FONT_SIZE
+        line_scales = explicit
+        if explicit:
+            paragraph.largest = line_size
+
+    pPr = p.find(A_PPR)
+    font_pt = line_size / 100
+    line_pct, line_pts = _spacing(pPr, A_LN_SPC)
+    if line_pts:
+        paragraph.line_height = line_pts
+        paragraph.line_scales = False
+    else:
+        paragraph.line_height = font_pt * LINE_HEIGHT * (line_pct or 1.0)
+        paragraph.line_scales = line_scales
+    for tag in (A_SPC_BEF, A_SPC_AFT):
+        pct, pts = _spacing(pPr, tag)
+        paragraph.space_scaled += font_pt * pct
+        paragraph.space_fixed += pts
+    return paragraph
+
+
+def _body_insets(bodyPr) -> Tuple[int, int, int, int]:
+    """a:bodyPr の余白（左, 上, 右, 下、EMU）"""
+    names = ('lIns', 'tIns', 'rIns', 'bIns')
+    if bodyPr is None:
+        return DEFAULT_INSETS
+    return tuple(int(bodyPr.get(name, default)) for name, default in zip(names, DEFAULT_INSETS))
+
+
+def _scale_font_sizes(txBody, scale: float):
+    """直接指定されたフォントサイズをすべて scale 倍にする"""
+    for rPr in txBody.iter(A_RPR, A_END_PARA_RPR):
+        size = rPr.get('sz')
+        if size is not None:
+            rPr.set('sz', str(max(100, int(round(int(size) * scale)))))
+
+
+def fit_text_frame(text_frame, width: int, height: int) -> Optional[float]:
+    """
+    テキストフレームが枠からあふれる場合、収まる最大のフォントサイズまで縮小する
+    （最大のフォントサイズを SIZE_STEP 刻みで二分探索し、各ランのサイズは同じ比率で縮小する）
+
+    Args:
+        text_frame: python-pptxのテキストフレーム
+        width: シェイプの幅（EMU）
+        height: シェイプの高さ（EMU）
+
+    Returns:
+        縮小した倍率（あふれていない・縮小できない場合はNone）
+    """
+    txBody = text_frame._txBody
+    bodyPr = txBody.find(A_BODY_PR)
+    if bodyPr is not None and bodyPr.get('vert', 'horz') != 'horz':
+        # 縦書きは対象外
+        return None
+
+    left, top, right, bottom = _body_insets(bodyPr)
+    available_width = (width - left - right) / EMU_PER_POINT
+    available_height = (height - top - bottom) / EMU_PER_POINT
+    if available_width <= 0 or available_height <= 0:
+        return None
+
+    wrap = bodyPr is None or bodyPr.get('wrap') != 'none'
+    paragraphs = [_measure_paragraph(p) for p in txBody.p_lst]
+    largest = max((paragraph.largest for paragraph in paragraphs), default=0)
+    if not largest:
+        return None
+
+    def fits(scale: float) -> bool:
+        total = 0.0
+        for paragraph in paragraphs:
+            if wrap:
+                lines = paragraph.line_count(available_width, scale)
+            elif paragraph.max_width(scale) > available_width:
+                return False
+            else:
+                lines = paragraph.line_count(float('inf'), scale)
+            total += paragraph.height(lines, scale)
+            if total > available_height:
+                return False
+        return True
+
+    if fits(1.0):
+        return None
+
+    smallest = max(MIN_FONT_SIZE, int(largest * MIN_SCALE))
+    sizes = list(range(largest - SIZE_STEP, smallest - 1, -SIZE_STEP))
+    if not sizes:
+        return None
+
+    # sizes は大きい順。収まる最初のサイズを二分探索（下限でも収まらなければ下限まで縮小する）
+    low, high = 0, len(sizes) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if fits(sizes[middle] / largest):
+            high = middle
+        else:
+            low = middle + 1
+
+    scale = sizes[low] / largest
+    _scale_font_sizes(txBody, scale)
+    return scale
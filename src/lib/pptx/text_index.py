@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+デッキ全体のテキストノード索引
+スライドを1回だけ走査して、グループ・テーブル・プレースホルダー・ノートを含む
+すべてのテキストの位置（スライド/シェイプ/段落/セル）とテキストをキャッシュする
+抽出・翻訳適用の各スクリプトはこの索引の上にルックアップを構築する
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pptx.shapes.group import GroupShape
+
+# ノードの種類
+KIND_SHAPE = 'shape'  # テキストフレームを持つシェイプ
+KIND_CELL = 'cell'    # テーブルセル（空のセルも含む）
+KIND_NOTES = 'notes'  # スライドノート
+
+NO_GROUPS: Tuple = ()
+
+
+class TextNode:
+    """テキストノード（1つのテキストフレームに対応）"""
+
+    __slots__ = (
+        'node_id',
+        'kind',
+        'slide_idx',
+        'shape_idx',
+        'shape_id',
+        'row',
+        'col',
+        'shape',
+        'cell',
+        'groups',
+        'text_frame',
+        'para_texts',
+        'text',
+    )
+
+    def __init__(self, kind: str, slide_idx: int, shape_idx: int, shape, text_frame,
+                 cell=None, row: int = -1, col: int = -1, groups: Tuple = NO_GROUPS):
+        self.kind = kind
+        self.slide_idx = slide_idx
+        self.shape_idx = shape_idx
+        self.shape = shape
+        self.cell = cell
+        self.row = row
+        self.col = col
+        self.groups = groups
+        self.text_frame = text_frame
+        self.shape_id = shape.shape_id if shape is not None else 0
+        self.node_id = _node_id(kind, slide_idx, self.shape_id, row, col)
+        # paragraph.text は呼ぶたびにランを連結し直すため、ここで一度だけ取得する
+        self.para_texts = tuple(paragraph.text for paragraph in text_frame.paragraphs)
+        self.text = '\n'.join(self.para_texts).strip()
+
+    @property
+    def part_name(self) -> str:
+        """ノードを含むパート名（差分保存で変更したパートとして記録する）"""
+        return str(self.text_frame.part.partname)
+
+    def refresh(self):
+        """テキストを書き換えた後にキャッシュを更新"""
+        self.para_texts = tuple(paragraph.text for paragraph in self.text_frame.paragraphs)
+        self.text = '\n'.join(self.para_texts).strip()
+
+    def __repr__(self) -> str:
+        return f"TextNode({self.node_id!r}, {self.text[:30]!r})"
+
+
+def _node_id(kind: str, slide_idx: int, shape_id: int, row: int, col: int) -> str:
+    """安定したノードID（スライド番号・シェイプID・セル位置から生成）"""
+    slide_number = slide_idx + 1
+    if kind == KIND_NOTES:
+        return f"s{slide_number}:notes"
+    if kind == KIND_CELL:
+        return f"s{slide_number}:{shape_id}:r{row}c{col}"
+    return f"s{slide_number}:{shape_id}"
+
+
+def node_locator(node: TextNode) -> Dict[str, int]:
+    """
+    抽出結果に埋め込む安定したロケーター
+
+    Returns:
+        {"slide": スライド番号, "shape_id": シェイプID} にセルの場合は "row"/"col" を加えた辞書
+    """
+    locator = {"slide": node.slide_idx + 1, "shape_id": node.shape_id}
+    if node.kind == KIND_CELL:
+        locator["row"] = node.row
+        locator["col"] = node.col
+    return locator
+
+
+def locator_node_id(locator: Dict[str, Any]) -> Optional[str]:
+    """ロケーターをノードIDに変換（形式が不正ならNone）"""
+    try:
+        slide_idx = int(locator["slide"]) - 1
+        shape_id = int(locator["shape_id"])
+        if "row" in locator:
+            return _node_id(KIND_CELL, slide_idx, shape_id, int(locator["row"]), int(locator["col"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return _node_id(KIND_SHAPE, slide_idx, shape_id, -1, -1)
+
+
+def _index_shapes(shapes, slide_idx: int, nodes: List[TextNode], groups: Tuple, top_shape_idx: int):
+    """シェイプを文書順に走査（グループは再帰的に展開）"""
+    for shape_idx, shape in enumerate(shapes):
+        # グループ内のシェイプはトップレベルのグループの位置で数える
+        idx = top_shape_idx if groups else shape_idx
+
+        if isinstance(shape, GroupShape):
+            _index_shapes(shape.shapes, slide_idx, nodes, groups + (shape,), idx)
+
+        elif shape.has_text_frame:
+            node = TextNode(KIND_SHAPE, slide_idx, idx, shape, shape.text_frame, groups=groups)
+            if node.text:
+                nodes.append(node)
+
+        elif shape.has_table:
+            # 位置で対応付けるスクリプトがあるため、テーブルは空のセルも含めて登録する
+            for row_idx, row in enumerate(shape.table.rows):
+                for col_idx, cell in enumerate(row.cells):
+                    nodes.append(TextNode(
+                        KIND_CELL, slide_idx, idx, shape, cell.text_frame,
+                        cell=cell, row=row_idx, col=col_idx, groups=groups
+                    ))
+
+
+def index_slide(slide, slide_idx: int, include_notes: bool = True) -> List[TextNode]:
+    """
+    1枚のスライドのテキストノードを文書順に取得
+
+    Args:
+        slide: python-pptxのスライド
+        slide_idx: スライドインデックス（0始まり）
+        include_notes: スライドノートを含めるか
+
+    Returns:
+        テキストノードのリスト（ノートは末尾）
+    """
+    nodes: List[TextNode] = []
+    _index_shapes(slide.shapes, slide_idx, nodes, NO_GROUPS, 0)
+
+    # has_notes_slide を確認してからアクセスする（notes_slide は無ければ作成してしまう）
+    if include_notes and slide.has_notes_slide:
+        notes_text_frame = slide.notes_slide.notes_text_frame
+        if notes_text_frame is not None:
+            node = TextNode(KIND_NOTES, slide_idx, -1, None, notes_text_frame)
+            if node.text:
+                nodes.append(node)
+
+    return nodes
+
+
+class TextIndex:
+    """プレゼンテーション全体のテキストノード索引（各スライドは初回アクセス時に一度だけ走査）"""
+
+    __slots__ = ('prs', 'include_notes', '_slides', '_by_id')
+
+    def __init__(self, prs, include_notes: bool = True):
+        """
+        コンストラクタ
+
+        Args:
+            prs: python-pptxのプレゼンテーション
+            include_notes: スライドノートを含めるか
+        """
+        self.prs = prs
+        self.include_notes = include_notes
+        self._slides: Dict[int, List[TextNode]] = {}
+        self._by_id: Dict[int, Dict[str, TextNode]] = {}
+
+    def slide_nodes(self, slide_idx: int) -> List[TextNode]:
+        """スライドのテキストノード（0始まりのインデックス）"""
+        nodes = self._slides.get(slide_idx)
+        if nodes is None:
+            nodes = index_slide(self.prs.slides[slide_idx], slide_idx, self.include_notes)
+            self._slides[slide_idx] = nodes
+        return nodes
+
+    def find(self, locator: Optional[Dict[str, Any]]) -> Optional[TextNode]:
+        """
+        ロケーターからノードを直接取得
+
+        Args:
+            locator: 抽出結果の "locator"（"para" などの追加キーは無視）
+
+        Returns:
+            対応するノード（見つからなければNone）
+        """
+        if not isinstance(locator, dict):
+            return None
+        node_id = locator_node_id(locator)
+        if node_id is None:
+            return None
+        slide_idx = int(locator["slide"]) - 1
+        if slide_idx < 0 or slide_idx >= len(self.prs.slides):
+            return None
+
+        by_id = self._by_id.get(slide_idx)
+        if by_id is None:
+            by_id = {}
+            for node in self.slide_nodes(slide_idx):
+                # シェイプIDが重複している壊れたファイルでは文書順で最初のノードを優先
+                by_id.setdefault(node.node_id, node)
+            self._by_id[slide_idx] = by_id
+        return by_id.get(node_id)
+
+    def __iter__(self) -> Iterator[TextNode]:
+        """全スライドのノードを文書順に返す"""
+        for slide_idx in range(len(self.prs.slides)):
+            yield from self.slide_nodes(slide_idx)
@@ -3,13 +3,21 @@
 
 import json
 import sys
+from itertools import groupby
 from pptx import Presentation
 from typing import Dict, List, Any
 
+from cpu_profile import start_cpu_profile, take_cpu_profile_flag
+from incremental_save import save_presentation
+from metrics import BYTES_IN, BYTES_OUT, CELLS, RUNS, SHAPES, SLIDES, new_metrics, take_profile_flags
+from string_table import is_string_keyed, to_update_translations
+from text_index import KIND_CELL, KIND_SHAPE, TextIndex
+
 def update_pptx_with_translations(
     input_path: str, 
     output_path: str, 
-    translations: Dict[int, List[Dict[str, str]]]
+    translations: Dict[int, List[Dict[str, str]]],
+    metrics=None
 ) -> Dict[str, Any]:
     """
     翻訳されたテキストでPowerPointファイルを更新
@@ -17,14 +25,29 @@ def update_pptx_with_translations(
     Args:
         input_path: 元のPPTXファイルのパス
         output_path: 出力PPTXファイルのパス
-        translations: スライド番号をキーとした翻訳データ
+        translations: スライド番号をキーとした翻訳データ（文字列テーブルの番号で指定した形式も可）
+        metrics: フェーズごとの所要時間・カウンターの記録先（Noneなら環境変数 PPTX_METRICS に従って作成）
         
     Returns:
-        処理結果を含む辞書
+        処理結果を含む辞書（計測が有効なら "metrics" を含む）
     """
+    if metrics is None:
+        metrics = new_metrics()
+    
     try:
-        prs = Presentation(input_path)
+        metrics.count_size(BYTES_IN, input_path)
+        with metrics.phase('load'):
+            prs = Presentation(input_path)
+        with metrics.phase('index'):
+            index = TextIndex(prs, include_notes=False)
         updated_count = 0
+        dirty_parts = set()  # 変更したスライドのパート名（差分保存用）
+        
+        if is_string_keyed(translations):
+            translations = to_update_translations(translations)
+        
+        # JSONから読み込んだ場合はキーが文字列になるため数値に揃える
+        translations = {int(slide_num): items for slide_num, items in translations.items()}
         
         for slide_num, slide in enumerate(prs.slides, 1):
             if slide_num not in translations:
@@ -32,39 +55,67 @@ def update_pptx_with_translations(
                 
             slide_translations = translations[slide_num]
             shape_index = 0
+            metrics.count(SLIDES)
             
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
+            # ロケーター付きの翻訳は位置で直接適用する
+            for translation in slide_translations:
+                if "locator" in translation and "translated_text" in translation:
+                    node = index.find(translation["locator"])
+                    if node is not None:
+                        with metrics.phase('apply'):
+                            node.text_frame.text = translation["translated_text"]
+                        metrics.count(CELLS if node.kind == KIND_CELL else SHAPES)
+                        metrics.count(RUNS, translation["translated_text"].count('\n') + 1)
+                        dirty_parts.add(node.part_name)
+                        updated_count += 1
+            
+            # ロケーターのない翻訳は抽出結果と同じ単位（テキストのあるシェイプ・空でないテーブル）で順番に対応付ける
+            nodes = index.slide_nodes(slide_num - 1)
+            for (kind, _), group in groupby(nodes, key=lambda node: (node.kind, id(node.shape))):
+                if kind == KIND_SHAPE:
+                    node = next(group)
                     # 対応する翻訳を探す
                     if shape_index < len(slide_translations):
                         translation = slide_translations[shape_index]
-                        if "translated_text" in translation:
-                            shape.text = translation["translated_text"]
+                        if "translated_text" in translation and "locator" not in translation:
+                            with metrics.phase('apply'):
+                                node.shape.text = translation["translated_text"]
+                            metrics.count(SHAPES)
+                            metrics.count(RUNS, translation["translated_text"].count('\n') + 1)
+                            dirty_parts.add(node.part_name)
                             updated_count += 1
                     shape_index += 1
                     
                 # テーブルの場合
-                elif shape.has_table:
+                elif kind == KIND_CELL:
+                    cell_nodes = list(group)
+                    if not any(node.text for node in cell_nodes):
+                        continue
                     if shape_index < len(slide_translations):
                         translation = slide_translations[shape_index]
                         if "translated_table" in translation:
                             translated_table = translation["translated_table"]
-                            for row_idx, row in enumerate(shape.table.rows):
-                                if row_idx < len(translated_table):
-                                    for cell_idx, cell in enumerate(row.cells):
-                                        if cell_idx < len(translated_table[row_idx]):
-                                            cell.text = translated_table[row_idx][cell_idx]
-                                            updated_count += 1
+                            for node in cell_nodes:
+                                if node.row < len(translated_table) and node.col < len(translated_table[node.row]):
+                                    with metrics.phase('apply'):
+                                        node.cell.text = translated_table[node.row][node.col]
+                                    metrics.count(CELLS)
+                                    metrics.count(RUNS, translated_table[node.row][node.col].count('\n') + 1)
+                                    dirty_parts.add(node.part_name)
+                                    updated_count += 1
                     shape_index += 1
         
-        # ファイルを保存
-        prs.save(output_path)
+        # ファイルを保存（変更していないパートは元のzipからそのままコピー）
+        with metrics.phase('save'):
+            save_mode = save_presentation(prs, output_path, input_path, dirty_parts)
+        metrics.count_size(BYTES_OUT, output_path)
         
-        return {
+        return metrics.attach({
             "success": True,
             "updated_count": updated_count,
-            "output_path": output_path
-        }
+            "output_path": output_path,
+            "save_mode": save_mode
+        })
         
     except Exception as e:
         return {
@@ -73,16 +124,17 @@ def update_pptx_with_translations(
         }
 
 def main():
-    if len(sys.argv) != 4:
+    argv = take_profile_flags(sys.argv[1:])
+    argv, profile_path = take_cpu_profile_flag(argv)
+    start_cpu_profile(profile_path)
+    if len(argv) != 3:
         print(json.dumps({
             "success": False,
-            "error": "Usage: python update_pptx.py <input_pptx> <output_pptx> <translations_json>"
+            "error": "Usage: python update_pptx.py <input_pptx> <output_pptx> <translations_json> [--metrics] [--profile-memory] [--profile-cpu <out.folded>]"
         }))
         sys.exit(1)
     
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
-    translations_json = sys.argv[3]
+    input_path, output_path, translations_json = argv
     
     try:
         translations = json.loads(translations_json)
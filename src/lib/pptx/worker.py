@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+常駐型PPTX処理ワーカー
+python-pptx/lxmlのインポートを保持したまま、改行区切りJSONのリクエストを処理する
+
+リクエスト例（1行1リクエスト）:
+    {"id": "1", "op": "extract", "file_path": "/tmp/a.pptx"}
+    {"id": "2", "op": "apply", "input_path": "...", "output_path": "...", "translations": {...}}
+    {"id": "3", "op": "generate", "input": "...", "output": "...", "slides": [...], "language": "zh-CN"}
+
+"profile_cpu": "出力先" を付けたリクエストは、処理中のスレッドをCPUプロファイルして collapsed stack を書き出す
+
+レスポンスは各スクリプトの結果JSONに "id" と "op" を付与して1行で返す
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, TextIO
+
+# generate_pptx.py は python_backend 配下にあるためパスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'python_backend'))
+
+from cpu_profile import PROFILE_CPU_ENV, profile_cpu
+from extract_cache import DEFAULT_MAX_BYTES, ExtractionCache
+from extract_text import extract_text_from_pptx
+from apply_translations import apply_translations_to_pptx
+from generate_pptx import generate_translated_pptx
+from metrics import enable_memory_profiling, enable_metrics
+from string_table import is_string_keyed, to_edited_slides
+
+# デフォルトの同時実行数と再起動までのジョブ数
+DEFAULT_CONCURRENCY = 2
+DEFAULT_MAX_JOBS = 500
+
+
+def _handle_extract(worker: 'PPTXWorker', request: Dict[str, Any]) -> Dict[str, Any]:
+    """extractリクエストを処理"""
+    return extract_text_from_pptx(
+        request['file_path'],
+        engine=request.get('engine', 'pptx'),
+        cache=worker.extract_cache,
+        start=request.get('start', 1),
+        count=request.get('count'),
+        strings=request.get('strings', False)
+    )
+
+
+def _handle_apply(worker: 'PPTXWorker', request: Dict[str, Any]) -> Dict[str, Any]:
+    """applyリクエストを処理"""
+    translations = request.get('translations', {})
+    # 既存の関数はJSON文字列を受け取るため、オブジェクトの場合は文字列化する
+    if not isinstance(translations, str):
+        translations = json.dumps(translations, ensure_ascii=False)
+    return apply_translations_to_pptx(request['input_path'], request['output_path'], translations)
+
+
+def _handle_generate(worker: 'PPTXWorker', request: Dict[str, Any]) -> Dict[str, Any]:
+    """generateリクエストを処理"""
+    slides = request.get('slides', [])
+    # generate_pptx.py の main() と同様に slides キーを展開
+    if isinstance(slides, dict) and 'slides' in slides:
+        slides = slides['slides']
+    # 文字列テーブルの番号で指定した翻訳（"strings" / "translations"）は出現箇所ごとに展開
+    if is_string_keyed(request):
+        slides = to_edited_slides(request)
+    return generate_translated_pptx(request['input'], slides, request['output'], language=request.get('language'))
+
+
+HANDLERS: Dict[str, Callable[['PPTXWorker', Dict[str, Any]], Dict[str, Any]]] = {
+    'extract': _handle_extract,
+    'apply': _handle_apply,
+    'generate': _handle_generate,
+    'ping': lambda worker, request: {"success": True, "pid": os.getpid()},
+}
+
+
+class PPTXWorker:
+    """同時実行数とジョブ数の上限を管理するワーカー"""
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        extract_cache: Optional[ExtractionCache] = None,
+        profile_cpu_path: Optional[str] = None
+    ):
+        """
+        コンストラクタ
+
+        Args:
+            concurrency: 同時に実行するジョブの最大数
+            max_jobs: このプロセスで処理するジョブの上限（超えたら終了して再起動させる）
+            extract_cache: 抽出結果キャッシュ（ヒット・ミス数はワーカーの生存期間で累積）
+            profile_cpu_path: 全リクエストをCPUプロファイルする場合の出力先（"{id}" はリクエストIDに置き換える）
+        """
+        self.concurrency = max(1, concurrency)
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self.lock = threading.Lock()
+        self.accepted_jobs = 0
+        self.stopping = threading.Event()
+        self.extract_cache = extract_cache
+        self.profile_cpu_path = profile_cpu_path
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        1件のリクエストを処理する
+
+        Args:
+            request: リクエストオブジェクト
+
+        Returns:
+            id/opを付与した結果辞書
+        """
+        request_id = request.get('id')
+        op = request.get('op')
+        handler = HANDLERS.get(op)
+
+        profile_path = request.get('profile_cpu')
+        if not profile_path and self.profile_cpu_path:
+            profile_path = self.profile_cpu_path.replace('{id}', str(request_id))
+
+        if handler is None:
+            result = {"success": False, "error": f"Unknown op: {op}"}
+        else:
+            try:
+                with profile_cpu(profile_path):
+                    result = handler(self, request)
+            except KeyError as e:
+                result = {"success": False, "error": f"Missing required field: {e.args[0]}"}
+            except Exception as e:
+                result = {
+                    "success": False,
+                    "error": str(e),
+                    "traceback": traceback.format_exc()
+                }
+
+        response = {"id": request_id, "op": op}
+        response.update(result)
+        return response
+
+    def handle_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """改行区切りJSONの1行を処理（空行はNone）"""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"id": None, "success": False, "error": f"Invalid JSON: {str(e)}"}
+        if not isinstance(request, dict):
+            return {"id": None, "success": False, "error": "Request must be a JSON object"}
+        return self.handle_request(request)
+
+    def _reserve_job(self) -> bool:
+        """ジョブ枠を確保する。上限に達していればFalse"""
+        with self.lock:
+            if self.stopping.is_set():
+                return False
+            self.accepted_jobs += 1
+            if self.max_jobs and self.accepted_jobs >= self.max_jobs:
+                # このジョブを最後に受付を停止し、プロセスを入れ替える
+                self.stopping.set()
+            return True
+
+    def submit_line(self, line: str, respond: Callable[[Dict[str, Any]], None]) -> Optional[Future]:
+        """
+        1行を同時実行数の範囲内で非同期に処理する
+
+        Args:
+            line: リクエスト行（空行でないこと）
+            respond: レスポンスを書き出すコールバック
+
+        Returns:
+            受け付けたジョブのFuture（上限到達後はNone）
+        """
+        if not self._reserve_job():
+            return None
+
+        # 空きスロットができるまで待つ（読み込み側へのバックプレッシャー）
+        self.slots.acquire()
+
+        def run():
+            try:
+                response = self.handle_line(line)
+                if response is not None:
+                    respond(response)
+            finally:
+                self.slots.release()
+
+        return self.executor.submit(run)
+
+    def shutdown(self):
+        """実行中のジョブの完了を待って終了"""
+        self.stopping.set()
+        self.executor.shutdown(wait=True)
+
+
+def serve_stdio(worker: PPTXWorker, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout):
+    """標準入出力で改行区切りJSONを処理する"""
+    write_lock = threading.Lock()
+
+    def respond(response: Dict[str, Any]):
+        data = json.dumps(response, ensure_ascii=False)
+        with write_lock:
+            stdout.write(data + "\n")
+            stdout.flush()
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        if worker.submit_line(line, respond) is None or worker.stopping.is_set():
+            break
+
+    worker.shutdown()
+
+
+def serve_unix_socket(worker: PPTXWorker, socket_path: str):
+    """Unixソケットで改行区切りJSONを処理する"""
+
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            write_lock = threading.Lock()
+
+            def respond(response: Dict[str, Any]):
+                data = (json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8')
+                with write_lock:
+                    try:
+                        self.wfile.write(data)
+                        self.wfile.flush()
+                    except OSError:
+                        pass  # クライアントが切断済み
+
+            pending = []
+            for raw_line in self.rfile:
+                line = raw_line.decode('utf-8')
+                if not line.strip():
+                    continue
+                future = worker.submit_line(line, respond)
+                if future is None:
+                    break
+                pending.append(future)
+                if worker.stopping.is_set():
+                    break
+
+            # この接続のジョブがすべて書き終わるまで待つ
+            wait(pending)
+
+            if worker.stopping.is_set():
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        worker.shutdown()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    """
+    メイン処理
+    コマンドライン引数：
+        --socket: Unixソケットのパス（省略時は標準入出力）
+        --concurrency: 同時実行数
+        --max-jobs: 処理後にプロセスを終了するジョブ数（0で無制限）
+        --cache-dir: 抽出結果キャッシュのディレクトリ
+        --metrics: 各ジョブの結果にフェーズごとの所要時間・カウンター（"metrics"）を出力
+        --profile-memory: 各ジョブの結果の "metrics" にフェーズごとのメモリを出力
+                          （tracemalloc はプロセス全体の値なので --concurrency 1 で使う）
+        --profile-cpu: 各リクエストをCPUプロファイルする場合の出力先（"{id}" はリクエストIDに置き換える）
+    """
+    parser = argparse.ArgumentParser(description='Long-lived PPTX worker (newline-delimited JSON)')
+    parser.add_argument('--socket', help='Unix socket path (default: stdin/stdout)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum concurrent jobs')
+    parser.add_argument('--max-jobs', type=int, default=DEFAULT_MAX_JOBS, help='Exit after this many jobs (0 = unlimited)')
+    parser.add_argument('--cache-dir', default=os.environ.get('PPTX_EXTRACT_CACHE_DIR'), help='Extraction cache directory')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='Extraction cache size limit (MB)')
+    parser.add_argument('--metrics', action='store_true', help='Add per-phase timings and element counters to every job result')
+    parser.add_argument('--profile-memory', action='store_true', help='Report per-phase memory in every job result (use with --concurrency 1)')
+    parser.add_argument('--profile-cpu', metavar='PATH', default=os.environ.get(PROFILE_CPU_ENV), help='Profile every request and write collapsed stacks to PATH ({id} is replaced with the request id)')
+
+    args = parser.parse_args()
+
+    if args.metrics:
+        enable_metrics()
+    if args.profile_memory:
+        enable_memory_profiling()
+
+    extract_cache = ExtractionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024) if args.cache_dir else None
+    worker = PPTXWorker(concurrency=args.concurrency, max_jobs=args.max_jobs, extract_cache=extract_cache,
+                        profile_cpu_path=args.profile_cpu)
+
+    if args.socket:
+        serve_unix_socket(worker, args.socket)
+    else:
+        serve_stdio(worker)
+
+
+if __name__ == "__main__":
+    main()
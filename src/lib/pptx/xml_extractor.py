@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+python-pptxのオブジェクトモデルを使わずにPPTXからテキストを抽出するエンジン
+zipから必要なスライドXMLだけを読み、lxmlのiterparseで要素を逐次解放しながら処理する
+（画像・動画などのメディアパートは一切読み込まない）
+"""
+
+import posixpath
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from lxml import etree
+
+# 名前空間
+NS_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NSMAP = {'a': NS_A, 'p': NS_P, 'r': NS_R}
+
+GRAPHIC_DATA_URI_TABLE = 'http://schemas.openxmlformats.org/drawingml/2006/table'
+RT_SLIDE_LAYOUT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout'
+RT_SLIDE_MASTER = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideMaster'
+
+# python-pptx の slide.shapes が対象とする要素
+P_SP = f'{{{NS_P}}}sp'
+P_GRPSP = f'{{{NS_P}}}grpSp'
+P_GRAPHIC_FRAME = f'{{{NS_P}}}graphicFrame'
+P_CXNSP = f'{{{NS_P}}}cxnSp'
+P_PIC = f'{{{NS_P}}}pic'
+P_CONTENT_PART = f'{{{NS_P}}}contentPart'
+P_SPTREE = f'{{{NS_P}}}spTree'
+SHAPE_TAGS = (P_SP, P_GRPSP, P_GRAPHIC_FRAME, P_CXNSP, P_PIC, P_CONTENT_PART)
+
+A_R = f'{{{NS_A}}}r'
+A_BR = f'{{{NS_A}}}br'
+A_FLD = f'{{{NS_A}}}fld'
+A_T = f'{{{NS_A}}}t'
+
+# レイアウトのプレースホルダーがマスターのどのタイプを継承するか（python-pptxと同じ対応）
+BASE_PLACEHOLDER_TYPE = {
+    'body': 'body',
+    'chart': 'body',
+    'clipArt': 'body',
+    'ctrTitle': 'title',
+    'dgm': 'body',
+    'dt': 'dt',
+    'ftr': 'ftr',
+    'media': 'body',
+    'obj': 'body',
+    'pic': 'body',
+    'sldNum': 'sldNum',
+    'subTitle': 'body',
+    'tbl': 'body',
+    'title': 'title',
+}
+
+# EMUからピクセルへの変換（1インチ = 914400 EMU = 96ピクセル）
+EMU_PER_INCH = 914400
+PX_PER_INCH = 96
+
+# (x, y, cx, cy) 各要素は未指定ならNone
+Xfrm = Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]
+EMPTY_XFRM: Xfrm = (None, None, None, None)
+
+
+def emu_to_px(value: Optional[int]) -> int:
+    """EMUをピクセルに変換（python-pptx版と同じく未指定・0は0）"""
+    return int(value * PX_PER_INCH / EMU_PER_INCH) if value else 0
+
+
+def _int_attr(elem, name: str) -> Optional[int]:
+    """整数属性を取得（なければNone）"""
+    value = elem.get(name) if elem is not None else None
+    return int(value) if value is not None else None
+
+
+def _read_xfrm(xfrm) -> Xfrm:
+    """a:xfrm / p:xfrm 要素から位置とサイズを取得"""
+    if xfrm is None:
+        return EMPTY_XFRM
+    off = xfrm.find('a:off', NSMAP)
+    ext = xfrm.find('a:ext', NSMAP)
+    return (_int_attr(off, 'x'), _int_attr(off, 'y'), _int_attr(ext, 'cx'), _int_attr(ext, 'cy'))
+
+
+def _shape_xfrm(elem) -> Xfrm:
+    """シェイプ要素に直接指定された位置とサイズを取得"""
+    if elem.tag == P_GRAPHIC_FRAME:
+        return _read_xfrm(elem.find('p:xfrm', NSMAP))
+    if elem.tag == P_GRPSP:
+        return _read_xfrm(elem.find('p:grpSpPr/a:xfrm', NSMAP))
+    return _read_xfrm(elem.find('p:spPr/a:xfrm', NSMAP))
+
+
+def _placeholder(elem):
+    """シェイプ要素の p:ph 要素を取得（プレースホルダーでなければNone）"""
+    return elem.find('./*/p:nvPr/p:ph', NSMAP)
+
+
+def _paragraph_text(p) -> str:
+    """a:p 要素のテキスト（python-pptxの paragraph.text と同じ規則）"""
+    parts = []
+    for child in p:
+        tag = child.tag
+        if tag == A_R or tag == A_FLD:
+            t = child.find(A_T)
+            if t is not None and t.text:
+                parts.append(t.text)
+        elif tag == A_BR:
+            parts.append('\v')
+    return ''.join(parts)
+
+
+def text_body_text(txBody) -> str:
+    """p:txBody / a:txBody のテキスト（段落を改行で連結）"""
+    if txBody is None:
+        return ''
+    return '\n'.join(_paragraph_text(p) for p in txBody.findall('a:p', NSMAP))
+
+
+def _sp_shape_type(sp, ph) -> str:
+    """p:sp 要素のシェイプタイプ名（python-pptxの MSO_SHAPE_TYPE 名と同じ）"""
+    if ph is not None:
+        return 'PLACEHOLDER'
+    spPr = sp.find('p:spPr', NSMAP)
+    if spPr is not None and spPr.find('a:custGeom', NSMAP) is not None:
+        return 'FREEFORM'
+    cNvSpPr = sp.find('p:nvSpPr/p:cNvSpPr', NSMAP)
+    is_textbox = cNvSpPr is not None and cNvSpPr.get('txBox') in ('1', 'true')
+    if spPr is not None and spPr.find('a:prstGeom', NSMAP) is not None and not is_textbox:
+        return 'AUTO_SHAPE'
+    if is_textbox:
+        return 'TEXT_BOX'
+    return 'unknown'
+
+
+class _PackageReader:
+    """zip内のパート・リレーションシップを必要な分だけ読み込むヘルパー"""
+
+    def __init__(self, zf: zipfile.ZipFile):
+        self.zf = zf
+        self._rels_cache: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._layout_cache: Dict[str, Tuple[Dict[int, Tuple[str, Xfrm]], Optional[str]]] = {}
+        self._master_cache: Dict[str, Dict[str, Xfrm]] = {}
+
+    def parse(self, part_name: str):
+        """小さなパート（presentation.xml・レイアウト等）をツリーとして読み込む"""
+        with self.zf.open(part_name) as f:
+            return etree.parse(f).getroot()
+
+    def rels(self, part_name: str) -> Dict[str, Tuple[str, str]]:
+        """パートのリレーションシップ（rId -> (type, 絶対パート名)）"""
+        if part_name in self._rels_cache:
+            return self._rels_cache[part_name]
+
+        base_dir, file_name = posixpath.split(part_name)
+        rels_name = posixpath.join(base_dir, '_rels', file_name + '.rels')
+        rels: Dict[str, Tuple[str, str]] = {}
+        if rels_name in self.zf.NameToInfo:
+            root = self.parse(rels_name)
+            for rel in root.iter(f'{{{NS_PKG_REL}}}Relationship'):
+                if rel.get('TargetMode') == 'External':
+                    continue
+                target = rel.get('Target', '')
+                if target.startswith('/'):
+                    target_name = target.lstrip('/')
+                else:
+                    target_name = posixpath.normpath(posixpath.join(base_dir, target))
+                rels[rel.get('Id')] = (rel.get('Type', ''), target_name)
+
+        self._rels_cache[part_name] = rels
+        return rels
+
+    def related(self, part_name: str, rel_type: str) -> Optional[str]:
+        """指定タイプの最初の関連パート名"""
+        for rtype, target in self.rels(part_name).values():
+            if rtype == rel_type:
+                return target
+        return None
+
+    def slide_part_names(self) -> List[str]:
+        """スライドのパート名を表示順（sldIdLst順）で取得"""
+        presentation = 'ppt/presentation.xml'
+        root = self.parse(presentation)
+        rels = self.rels(presentation)
+        names = []
+        for sldId in root.iterfind('p:sldIdLst/p:sldId', NSMAP):
+            rel = rels.get(sldId.get(f'{{{NS_R}}}id'))
+            if rel is not None:
+                names.append(rel[1])
+        return names
+
+    def _master_placeholders(self, master_name: str) -> Dict[str, Xfrm]:
+        """マスターのプレースホルダー（タイプ -> 位置）"""
+        if master_name not in self._master_cache:
+            placeholders: Dict[str, Xfrm] = {}
+            root = self.parse(master_name)
+            spTree = root.find('p:cSld/p:spTree', NSMAP)
+            for elem in spTree if spTree is not None else []:
+                if elem.tag not in SHAPE_TAGS:
+                    continue
+                ph = _placeholder(elem)
+                if ph is not None:
+                    placeholders.setdefault(ph.get('type', 'obj'), _shape_xfrm(elem))
+            self._master_cache[master_name] = placeholders
+        return self._master_cache[master_name]
+
+    def _layout_placeholders(self, layout_name: str) -> Dict[int, Tuple[str, Xfrm]]:
+        """レイアウトのプレースホルダー（idx -> (タイプ, 位置)）"""
+        if layout_name not in self._layout_cache:
+            placeholders: Dict[int, Tuple[str, Xfrm]] = {}
+            root = self.parse(layout_name)
+            spTree = root.find('p:cSld/p:spTree', NSMAP)
+            for elem in spTree if spTree is not None else []:
+                if elem.tag not in SHAPE_TAGS:
+                    continue
+                ph = _placeholder(elem)
+                if ph is not None:
+                    idx = int(ph.get('idx', '0'))
+                    placeholders.setdefault(idx, (ph.get('type', 'obj'), _shape_xfrm(elem)))
+            self._layout_cache[layout_name] = (placeholders, self.related(layout_name, RT_SLIDE_MASTER))
+        return self._layout_cache[layout_name][0]
+
+    def inherited_xfrm(self, slide_name: str, ph) -> Xfrm:
+        """スライドのプレースホルダーがレイアウト・マスターから継承する位置"""
+        layout_name = self.related(slide_name, RT_SLIDE_LAYOUT)
+        if layout_name is None:
+            return EMPTY_XFRM
+        layout_ph = self._layout_placeholders(layout_name).get(int(ph.get('idx', '0')))
+        if layout_ph is None:
+            return EMPTY_XFRM
+
+        ph_type, layout_xfrm = layout_ph
+        master_name = self._layout_cache[layout_name][1]
+        base_type = BASE_PLACEHOLDER_TYPE.get(ph_type)
+        master_xfrm = EMPTY_XFRM
+        if master_name is not None and base_type is not None:
+            master_xfrm = self._master_placeholders(master_name).get(base_type, EMPTY_XFRM)
+
+        return tuple(  # type: ignore[return-value]
+            value if value is not None else master_value
+            for value, master_value in zip(layout_xfrm, master_xfrm)
+        )
+
+
+def to_slide_xfrm(xfrm: Xfrm, groups: Sequence) -> Xfrm:
+    """
+    グループ内シェイプの座標をスライド座標に変換
+
+    Args:
+        xfrm: シェイプに直接指定された位置とサイズ（グループの子座標系）
+        groups: 祖先の p:grpSp 要素（内側から外側の順）
+
+    Returns:
+        スライド座標系の位置とサイズ
+    """
+    x, y, cx, cy = (value or 0 for value in xfrm)
+    for grpSp in groups:
+        group_xfrm = grpSp.find('p:grpSpPr/a:xfrm', NSMAP)
+        if group_xfrm is None:
+            continue
+        off_x, off_y, ext_cx, ext_cy = (value or 0 for value in _read_xfrm(group_xfrm))
+        ch_off = group_xfrm.find('a:chOff', NSMAP)
+        ch_ext = group_xfrm.find('a:chExt', NSMAP)
+        ch_x = _int_attr(ch_off, 'x') or 0
+        ch_y = _int_attr(ch_off, 'y') or 0
+        ch_cx = _int_attr(ch_ext, 'cx') or 0
+        ch_cy = _int_attr(ch_ext, 'cy') or 0
+        scale_x = ext_cx / ch_cx if ch_cx else 1.0
+        scale_y = ext_cy / ch_cy if ch_cy else 1.0
+        x = off_x + (x - ch_x) * scale_x
+        y = off_y + (y - ch_y) * scale_y
+        cx = cx * scale_x
+        cy = cy * scale_y
+    return (x, y, cx, cy)
+
+
+def _effective_xfrm(reader: _PackageReader, slide_name: str, elem, ph) -> Xfrm:
+    """直接指定がなければ継承元の値を使った位置とサイズ"""
+    xfrm = _shape_xfrm(elem)
+    if ph is None or all(value is not None for value in xfrm):
+        return xfrm
+    inherited = reader.inherited_xfrm(slide_name, ph)
+    return tuple(  # type: ignore[return-value]
+        value if value is not None else inherited_value
+        for value, inherited_value in zip(xfrm, inherited)
+    )
+
+
+def position_px(xfrm: Xfrm) -> Dict[str, int]:
+    """位置情報をピクセルの辞書に変換"""
+    x, y, cx, cy = xfrm
+    return {
+        "x": emu_to_px(x),
+        "y": emu_to_px(y),
+        "width": emu_to_px(cx),
+        "height": emu_to_px(cy)
+    }
+
+
+def _shape_id(elem) -> int:
+    """シェイプID（p:nvXxPr/p:cNvPr の id 属性）"""
+    c_nv_pr = elem.find('*/p:cNvPr', NSMAP)
+    return int(c_nv_pr.get('id', '0')) if c_nv_pr is not None else 0
+
+
+def _table_text_data(tbl, xfrm: Xfrm, locator: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """a:tbl 要素からテーブルのテキスト情報を構築"""
+    rows = tbl.findall('a:tr', NSMAP)
+    rows_count = len(rows)
+    cols_count = len(tbl.findall('a:tblGrid/a:gridCol', NSMAP))
+
+    table_position = position_px(xfrm)
+    cell_width = table_position["width"] // cols_count if cols_count > 0 else 0
+    cell_height = table_position["height"] // rows_count if rows_count > 0 else 0
+
+    cells_data = []
+    for row_idx, tr in enumerate(rows):
+        for col_idx, tc in enumerate(tr.findall('a:tc', NSMAP)):
+            cell_text = text_body_text(tc.find('a:txBody', NSMAP)).strip()
+            if cell_text:  # 空のセルはスキップ
+                cells_data.append({
+                    "text": cell_text,
+                    "row": row_idx,
+                    "col": col_idx,
+                    "position": {
+                        "x": table_position["x"] + (col_idx * cell_width),
+                        "y": table_position["y"] + (row_idx * cell_height),
+                        "width": cell_width,
+                        "height": cell_height
+                    },
+                    "locator": dict(locator, row=row_idx, col=col_idx)
+                })
+
+    if not cells_data:
+        return None
+
+    return {
+        "shape_type": "TABLE",
+        "table_info": {
+            "rows": rows_count,
+            "cols": cols_count,
+            "position": table_position
+        },
+        "cells": cells_data,
+        "locator": locator
+    }
+
+
+def extract_slide_texts_xml(reader: _PackageReader, slide_name: str, slide_number: int = 1) -> List[Dict[str, Any]]:
+    """
+    1枚のスライドXMLを逐次パースしてテキスト情報を抽出
+
+    Args:
+        reader: パッケージリーダー
+        slide_name: スライドのパート名（例: ppt/slides/slide1.xml）
+        slide_number: ロケーターに埋め込むスライド番号（1始まり）
+
+    Returns:
+        extract_text.py と同じ形式のテキスト情報のリスト
+    """
+    slide_texts = []
+    title_found = False
+
+    with reader.zf.open(slide_name) as f:
+        for _, elem in etree.iterparse(f, events=('end',), tag=SHAPE_TAGS):
+            parent = elem.getparent()
+            if parent is None or elem.tag == P_GRPSP:
+                # グループ自体はテキストを持たない（子要素は個別に処理済み）
+                if parent is not None and parent.tag == P_SPTREE:
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del parent[0]
+                continue
+
+            # グループ内のシェイプは祖先のグループを内側から順に集める
+            groups = []
+            ancestor = parent
+            while ancestor is not None and ancestor.tag == P_GRPSP:
+                groups.append(ancestor)
+                ancestor = ancestor.getparent()
+            if ancestor is None or ancestor.tag != P_SPTREE:
+                continue
+
+            ph = _placeholder(elem)
+            # タイトル = トップレベルで最初の idx=0 のプレースホルダー
+            is_title = False
+            if not groups and ph is not None and not title_found and int(ph.get('idx', '0')) == 0:
+                is_title = title_found = True
+
+            # プレースホルダーの継承はトップレベルのシェイプのみ（python-pptxと同じ）
+            if groups:
+                xfrm = to_slide_xfrm(_shape_xfrm(elem), groups)
+            else:
+                xfrm = _effective_xfrm(reader, slide_name, elem, ph)
+
+            locator = {"slide": slide_number, "shape_id": _shape_id(elem)}
+
+            if elem.tag == P_SP:
+                text = text_body_text(elem.find('p:txBody', NSMAP)).strip()
+                if text:
+                    text_data = {
+                        "shape_type": _sp_shape_type(elem, ph),
+                        "text": text,
+                        "position": position_px(xfrm),
+                        "locator": locator
+                    }
+                    if is_title:
+                        text_data["is_title"] = True
+                    slide_texts.append(text_data)
+
+            elif elem.tag == P_GRAPHIC_FRAME:
+                graphic_data = elem.find('a:graphic/a:graphicData', NSMAP)
+                if graphic_data is not None and graphic_data.get('uri') == GRAPHIC_DATA_URI_TABLE:
+                    tbl = graphic_data.find('a:tbl', NSMAP)
+                    if tbl is not None:
+                        table_text_data = _table_text_data(tbl, xfrm, locator)
+                        if table_text_data:
+                            slide_texts.append(table_text_data)
+
+            # 処理済みの要素を解放し、トップレベルでは前の兄弟要素も削除してメモリを一定に保つ
+            # （グループ内ではグループの変換情報が後続の子要素に必要なため、グループ終了時にまとめて解放）
+            elem.clear()
+            if not groups:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    return slide_texts
+
+
+def _iter_slides(reader: _PackageReader, slide_names: List[str], slide_numbers: Iterable[int]) -> Iterator[Dict[str, Any]]:
+    """指定したスライド番号のうちテキストを含むスライドのデータを1枚ずつ返す"""
+    for slide_num in slide_numbers:
+        slide_texts = extract_slide_texts_xml(reader, slide_names[slide_num - 1], slide_num)
+        if slide_texts:
+            yield {
+                "slide_number": slide_num,
+                "texts": slide_texts
+            }
+
+
+def count_slides(file_path: str) -> int:
+    """presentation.xml だけを読んでスライド数を取得"""
+    with zipfile.ZipFile(file_path) as zf:
+        root = _PackageReader(zf).parse('ppt/presentation.xml')
+        return len(root.findall('p:sldIdLst/p:sldId', NSMAP))
+
+
+def iter_slides_xml(file_path: str, slide_numbers: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    スライドを処理した順に1枚ずつ抽出
+
+    Args:
+        file_path: PPTXファイルのパス
+        slide_numbers: 1始まりのスライド番号（Noneですべて）
+
+    Yields:
+        テキストを含むスライドのデータ
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        reader = _PackageReader(zf)
+        slide_names = reader.slide_part_names()
+        if slide_numbers is None:
+            slide_numbers = range(1, len(slide_names) + 1)
+        yield from _iter_slides(reader, slide_names, slide_numbers)
+
+
+def extract_slides_xml(file_path: str, slide_numbers: Iterable[int]) -> List[Dict[str, Any]]:
+    """
+    指定したスライドだけを抽出（並列抽出のシャード単位）
+
+    Args:
+        file_path: PPTXファイルのパス
+        slide_numbers: 1始まりのスライド番号
+
+    Returns:
+        テキストを含むスライドのデータのリスト
+    """
+    return list(iter_slides_xml(file_path, slide_numbers))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+抽出・適用・生成のベンチマーク
+合成デッキ（synthetic_deck.py）をパラメーターの組み合わせごとに作成し、
+extract_text_from_pptx / apply_translations（2種類）/ update_pptx_with_translations / generate_translated_pptx
+の所要時間・スループット（テキストノード/秒、MB/秒）・最大メモリを測定する
+各測定は新しいプロセスで実行するので、最大メモリ（ru_maxrss）は測定ごとの値になる
+
+使い方:
+    python3 benchmark_pipeline.py [--slides 200] [--repeat 3] [--output results.json] [--baseline baseline.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List
+
+import pptx
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+import apply_translations
+import apply_translations_v2
+from extract_text import extract_text_from_pptx
+from generate_pptx import generate_translated_pptx
+from metrics import enable_metrics, peak_rss
+from synthetic_deck import DeckSpec, build_deck, translation_payloads
+from update_pptx import update_pptx_with_translations
+
+DEFAULT_SLIDES = 100
+DEFAULT_REPEAT = 3
+
+# ベースラインより遅いとみなす比率
+DEFAULT_TOLERANCE = 0.25
+
+
+def deck_grid(slides: int) -> List[DeckSpec]:
+    """基準のデッキと、1つのパラメーターだけを変えたデッキ"""
+    base = DeckSpec(slides=slides, shapes_per_slide=6, notes=True)
+    return [
+        base,
+        replace(base, runs_per_paragraph=8),
+        replace(base, table_rows=8, table_cols=6),
+        replace(base, group_depth=4),
+        replace(base, media_bytes=256 * 1024),
+        replace(base, script='cjk'),
+    ]
+
+
+def _extract(path: str, output_path: str, payloads: Dict[str, Any]) -> Dict[str, Any]:
+    return extract_text_from_pptx(path)
+
+
+def _apply(path: str, output_path: str, payloads: Dict[str, Any]) -> Dict[str, Any]:
+    return apply_translations.apply_translations_to_pptx(path, output_path, payloads["apply"])
+
+
+def _apply_v2(path: str, output_path: str, payloads: Dict[str, Any]) -> Dict[str, Any]:
+    return apply_translations_v2.apply_translations_to_pptx(path, output_path, payloads["apply"])
+
+
+def _update(path: str, output_path: str, payloads: Dict[str, Any]) -> Dict[str, Any]:
+    return update_pptx_with_translations(path, output_path, payloads["update"])
+
+
+def _generate(path: str, output_path: str, payloads: Dict[str, Any]) -> Dict[str, Any]:
+    return generate_translated_pptx(path, payloads["generate"], output_path)
+
+
+OPERATIONS: Dict[str, Callable[[str, str, Dict[str, Any]], Dict[str, Any]]] = {
+    "extract": _extract,
+    "apply": _apply,
+    "apply_v2": _apply_v2,
+    "update": _update,
+    "generate": _generate,
+}
+
+
+def _measure(operation: str, path: str, output_path: str, payloads: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """1つの操作を repeat 回実行して最短時間を返す（測定用のプロセスで実行）"""
+    logging.disable(logging.INFO)
+    best = None
+    result: Dict[str, Any] = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = OPERATIONS[operation](path, output_path, payloads)
+        elapsed = time.perf_counter() - started
+        if not result.get("success"):
+            return {"success": False, "error": result.get("error") or result.get("errors")}
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "success": True,
+        "seconds": best,
+        "peak_rss": peak_rss(),
+        "phases": (result.get("metrics") or {}).get("phases")
+    }
+
+
+def run_benchmarks(specs: List[DeckSpec], operations: List[str], repeat: int, work_dir: str) -> List[Dict[str, Any]]:
+    """
+    デッキごとに各操作を測定
+
+    Args:
+        specs: 測定するデッキのパラメーター
+        operations: 測定する操作（OPERATIONS のキー）
+        repeat: 操作ごとの実行回数（最短時間を採用）
+        work_dir: デッキと出力を置くディレクトリ
+
+    Returns:
+        デッキ・操作ごとの測定結果
+    """
+    results = []
+    context = get_context('spawn')
+    for spec in specs:
+        path = os.path.join(work_dir, f"{spec.label()}.pptx")
+        info = build_deck(spec, path)
+        file_size = os.path.getsize(path)
+
+        # 翻訳データは実際の流れと同じく抽出結果から作る（測定には含めない）
+        payloads = translation_payloads(extract_text_from_pptx(path))
+        payloads["apply"] = json.dumps(payloads["apply"], ensure_ascii=False)
+
+        for operation in operations:
+            output_path = os.path.join(work_dir, f"{spec.label()}.{operation}.out.pptx")
+            # 測定ごとに新しいプロセスを使い、最大メモリが前の測定の影響を受けないようにする
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                measured = executor.submit(_measure, operation, path, output_path, payloads, repeat).result()
+
+            record = {
+                "deck": info["label"],
+                "spec": info["spec"],
+                "text_nodes": info["text_nodes"],
+                "file_size": file_size,
+                "operation": operation,
+                **measured
+            }
+            if measured["success"]:
+                record["nodes_per_second"] = round(info["text_nodes"] / measured["seconds"], 1)
+                record["mb_per_second"] = round(file_size / measured["seconds"] / 1e6, 2)
+                record["seconds"] = round(measured["seconds"], 4)
+            results.append(record)
+            print(_format_record(record), flush=True)
+
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+        os.unlink(path)
+    return results
+
+
+def _format_record(record: Dict[str, Any]) -> str:
+    """1行の表示"""
+    head = f"{record['deck']:<36} {record['operation']:<9}"
+    if not record["success"]:
+        return f"{head} FAILED: {record['error']}"
+    rss = record["peak_rss"] / (1024 * 1024) if record["peak_rss"] else 0
+    return (f"{head} {record['seconds']:8.3f}s  {record['nodes_per_second']:>10,.0f} nodes/s  "
+            f"{record['mb_per_second']:7.2f} MB/s  {rss:7.1f} MB peak")
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    ベースラインと比較して遅くなった測定を返す
+
+    Args:
+        results: 今回の測定結果
+        baseline: 以前に --output で保存した結果
+        tolerance: 許容する遅延の比率（0.25 なら 1.25倍まで）
+
+    Returns:
+        遅くなった測定の説明
+    """
+    previous = {
+        (record["deck"], record["operation"]): record
+        for record in baseline.get("results", []) if record.get("success")
+    }
+    regressions = []
+    for record in results:
+        before = previous.get((record["deck"], record["operation"]))
+        if before is None or not record["success"]:
+            continue
+        ratio = record["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append(f"{record['deck']} {record['operation']}: "
+                               f"{before['seconds']:.3f}s -> {record['seconds']:.3f}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract/apply/generate on synthetic decks')
+    parser.add_argument('--slides', type=int, default=DEFAULT_SLIDES, help='Slides per synthetic deck')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per measurement (the fastest is kept)')
+    parser.add_argument('--operations', default=','.join(OPERATIONS), help='Comma-separated operations to run')
+    parser.add_argument('--output', help='Write the results as JSON (usable as a later --baseline)')
+    parser.add_argument('--baseline', help='Compare against a previous --output file and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed slowdown ratio against the baseline')
+    args = parser.parse_args()
+    # 結果にフェーズごとの所要時間を含めるため計測を有効にする（測定用のプロセスにも環境変数で引き継ぐ）
+    enable_metrics()
+
+    operations = [name.strip() for name in args.operations.split(',') if name.strip()]
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"Unknown operations: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmarks(deck_grid(args.slides), operations, args.repeat, work_dir)
+
+    report = {
+        "python": platform.python_version(),
+        "python_pptx": pptx.__version__,
+        "platform": platform.platform(),
+        "slides": args.slides,
+        "repeat": args.repeat,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failed = [record for record in results if not record["success"]]
+    regressions: List[str] = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+
+    sys.exit(1 if failed or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
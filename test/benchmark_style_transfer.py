@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+書式コピーのベンチマーク
+python-pptxのプロキシ経由で属性をコピーする従来の方法（TextStyle）と、
+a:rPr を要素ごと複製する方法（run_format）の速度を比較する
+
+使い方:
+    python3 benchmark_style_transfer.py [ラン数]
+"""
+
+import os
+import sys
+import time
+
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.util import Inches, Pt
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from generate_pptx import PPTXTranslator
+from run_format import clone_run_properties, run_properties
+
+DEFAULT_RUNS = 50000
+
+
+def build_paragraphs(run_count: int):
+    """書式付きのランを持つ段落を run_count 個作成"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    text_frame = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(4)).text_frame
+    for idx in range(run_count):
+        paragraph = text_frame.paragraphs[0] if idx == 0 else text_frame.add_paragraph()
+        run = paragraph.add_run()
+        run.text = f"Run {idx}"
+        run.font.name = "Arial"
+        run.font.size = Pt(12 + idx % 8)
+        run.font.bold = idx % 2 == 0
+        run.font.italic = idx % 3 == 0
+        run.font.color.rgb = RGBColor(idx % 256, 0, 0)
+    return list(text_frame.paragraphs)
+
+
+def bench_proxy(translator: PPTXTranslator, paragraphs) -> float:
+    """従来の方法: TextStyle に読み出してから新しいランに設定"""
+    start = time.perf_counter()
+    for paragraph in paragraphs:
+        style = translator.extract_text_style(paragraph.runs[0])
+        paragraph.clear()
+        style.apply_to_run(paragraph.add_run())
+    return time.perf_counter() - start
+
+
+def bench_clone(paragraphs) -> float:
+    """高速化した方法: a:rPr を要素ごと複製"""
+    start = time.perf_counter()
+    for paragraph in paragraphs:
+        rPr = run_properties(paragraph.runs[0])
+        paragraph.clear()
+        clone_run_properties(rPr, paragraph.add_run())
+    return time.perf_counter() - start
+
+
+def main():
+    run_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    translator = PPTXTranslator("")
+
+    proxy_time = bench_proxy(translator, build_paragraphs(run_count))
+    clone_time = bench_clone(build_paragraphs(run_count))
+
+    print(f"runs:        {run_count:,}")
+    print(f"proxy copy:  {proxy_time:.3f}s ({proxy_time / run_count * 1e6:.1f}us/run)")
+    print(f"rPr clone:   {clone_time:.3f}s ({clone_time / run_count * 1e6:.1f}us/run)")
+    print(f"speedup:     {proxy_time / clone_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
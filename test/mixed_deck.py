@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+テスト用のPPTXの生成
+プレースホルダー・テキストボックス・オートシェイプ・フリーフォーム・テーブル・グループ・画像・ノート・
+テキストのないスライドを1つずつ含む小さなデッキを作る（抽出・置換・保存の各テストで共有する）
+"""
+
+import io
+
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Inches
+
+
+def create_mixed_pptx(path: str):
+    """プレースホルダー・テーブル・グループ・画像などを含むテスト用PPTXを作成"""
+    prs = Presentation()
+
+    # タイトルスライド（位置はレイアウトから継承）
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = "Quarterly Report"
+    slide.placeholders[1].text = "First line\nSecond line"
+
+    # テキストボックス・オートシェイプ・フリーフォーム・改行
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = "Shapes"
+    textbox = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(3), Inches(1))
+    textbox.text_frame.text = "Text box"
+    textbox.text_frame.paragraphs[0].add_line_break()
+    textbox.text_frame.paragraphs[0].add_run().text = "after break"
+    autoshape = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(5), Inches(2), Inches(2), Inches(1))
+    autoshape.text = "Auto shape"
+    builder = slide.shapes.build_freeform(Inches(1), Inches(4))
+    builder.add_line_segments([(Inches(2), Inches(4)), (Inches(2), Inches(5))])
+    freeform = builder.convert_to_shape()
+    freeform.text = "Freeform"
+    slide.shapes.add_shape(MSO_SHAPE.OVAL, Inches(7), Inches(5), Inches(1), Inches(1))
+
+    # テーブル（空のセルを含む）
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    table = slide.shapes.add_table(3, 3, Inches(1), Inches(1), Inches(6), Inches(2)).table
+    for row_idx in range(3):
+        for col_idx in range(3):
+            if (row_idx + col_idx) % 2 == 0:
+                table.cell(row_idx, col_idx).text = f"Cell {row_idx}-{col_idx}"
+
+    # グループ・画像・ノート
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    group = slide.shapes.add_group_shape()
+    group.shapes.add_textbox(Inches(1), Inches(1), Inches(2), Inches(1)).text_frame.text = "Grouped"
+    image = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 10, 10)).save(image, format='PNG')
+    image.seek(0)
+    slide.shapes.add_picture(image, Inches(4), Inches(1))
+    slide.notes_slide.notes_text_frame.text = "Speaker notes"
+
+    # テキストのないスライド
+    prs.slides.add_slide(prs.slide_layouts[6])
+
+    prs.save(path)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク用の合成PPTXの生成
+スライド数・シェイプ数・テーブルの大きさ・グループの入れ子・ノート・ランの分割数・
+埋め込み画像のサイズ・文字体系（ラテン文字／日本語）を指定して、本番規模のデッキを作る
+
+使い方:
+    python3 synthetic_deck.py 出力.pptx [--slides 500] [--shapes 8] [--table 6x4] [--script cjk] ...
+"""
+
+import argparse
+import io
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+# 本文に使う語（ラテン文字）
+LATIN_WORDS = (
+    "revenue", "growth", "quarterly", "market", "customer", "strategy", "product", "review",
+    "forecast", "pipeline", "regional", "margin", "operating", "digital", "platform", "launch",
+    "partner", "support", "quality", "delivery", "target", "summary", "priority", "investment",
+)
+
+# 本文に使う語（日本語）
+CJK_WORDS = (
+    "売上", "成長", "四半期", "市場", "顧客", "戦略", "製品", "見直し",
+    "予測", "案件", "地域", "利益率", "営業", "デジタル", "基盤", "発売",
+    "提携", "支援", "品質", "納期", "目標", "概要", "優先", "投資",
+)
+
+SCRIPTS = ('latin', 'cjk')
+
+
+@dataclass(frozen=True)
+class DeckSpec:
+    """合成デッキのパラメーター"""
+    slides: int = 20
+    shapes_per_slide: int = 4
+    paragraphs_per_shape: int = 2
+    runs_per_paragraph: int = 1  # 1段落を何個のランに分割するか（書式の切り替わりの多さ）
+    table_rows: int = 0
+    table_cols: int = 0
+    group_depth: int = 0  # 0ならグループなし、nなら n 段に入れ子にしたグループの中にテキストを置く
+    notes: bool = False
+    media_bytes: int = 0  # スライドごとに埋め込む画像のおおよそのサイズ（0なら画像なし）
+    script: str = 'latin'
+    seed: int = 0
+
+    def label(self) -> str:
+        """結果の表示に使う短い名前"""
+        parts = [f"s{self.slides}", f"sh{self.shapes_per_slide}", f"r{self.runs_per_paragraph}"]
+        if self.table_rows and self.table_cols:
+            parts.append(f"t{self.table_rows}x{self.table_cols}")
+        if self.group_depth:
+            parts.append(f"g{self.group_depth}")
+        if self.notes:
+            parts.append("notes")
+        if self.media_bytes:
+            parts.append(f"m{self.media_bytes // 1024}k")
+        parts.append(self.script)
+        return "-".join(parts)
+
+
+def _sentence(rng: random.Random, script: str, words: int, tag: str) -> str:
+    """語をつなげた文（照合が一意になるよう末尾に位置のタグを付ける）"""
+    vocabulary = CJK_WORDS if script == 'cjk' else LATIN_WORDS
+    chosen = [rng.choice(vocabulary) for _ in range(words)]
+    body = ''.join(chosen) if script == 'cjk' else ' '.join(chosen).capitalize()
+    return f"{body} {tag}"
+
+
+def _fill_text_frame(text_frame, spec: DeckSpec, rng: random.Random, tag: str):
+    """段落・ランに分割したテキストを設定"""
+    for para_idx in range(spec.paragraphs_per_shape):
+        paragraph = text_frame.paragraphs[0] if para_idx == 0 else text_frame.add_paragraph()
+        text = _sentence(rng, spec.script, 6, f"{tag}.{para_idx}")
+        # テキストを runs_per_paragraph 個のランに分け、書式を交互に変える
+        pieces = max(1, spec.runs_per_paragraph)
+        step = -(-len(text) // pieces)
+        for run_idx, start in enumerate(range(0, len(text), step)):
+            run = paragraph.add_run()
+            run.text = text[start:start + step]
+            run.font.size = Pt(18)
+            run.font.bold = run_idx % 2 == 1
+
+
+def _noise_png(rng: random.Random, size: int) -> io.BytesIO:
+    """ほぼ size バイトになる圧縮の効かないPNG"""
+    side = max(8, int(size ** 0.5))
+    image = Image.frombytes('L', (side, side), rng.randbytes(side * side))
+    data = io.BytesIO()
+    image.save(data, format='PNG')
+    data.seek(0)
+    return data
+
+
+def build_deck(spec: DeckSpec, path: str) -> Dict[str, Any]:
+    """
+    合成デッキを作成して保存
+
+    Args:
+        spec: デッキのパラメーター
+        path: 出力先のパス
+
+    Returns:
+        パラメーターと、作成したテキストノード数（シェイプ・空でないセル、ノートを除く）
+    """
+    if spec.script not in SCRIPTS:
+        raise ValueError(f"Unknown script: {spec.script}")
+    rng = random.Random(spec.seed)
+    prs = Presentation()
+    text_nodes = 0
+
+    for slide_idx in range(spec.slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = _sentence(rng, spec.script, 3, f"{slide_idx + 1}")
+        text_nodes += 1
+
+        width = Inches(8) // max(1, spec.shapes_per_slide)
+        for shape_idx in range(spec.shapes_per_slide):
+            shape = slide.shapes.add_textbox(Inches(1) + width * shape_idx, Inches(1.5), width, Inches(1.5))
+            _fill_text_frame(shape.text_frame, spec, rng, f"{slide_idx + 1}-{shape_idx + 1}")
+            text_nodes += 1
+
+        if spec.table_rows and spec.table_cols:
+            table = slide.shapes.add_table(spec.table_rows, spec.table_cols, Inches(1), Inches(3.2),
+                                           Inches(8), Inches(0.3) * spec.table_rows).table
+            for row_idx in range(spec.table_rows):
+                for col_idx in range(spec.table_cols):
+                    tag = f"{slide_idx + 1}-t{row_idx}.{col_idx}"
+                    table.cell(row_idx, col_idx).text = _sentence(rng, spec.script, 2, tag)
+                    text_nodes += 1
+
+        if spec.group_depth:
+            shapes = slide.shapes
+            for _ in range(spec.group_depth):
+                shapes = shapes.add_group_shape().shapes
+            grouped = shapes.add_textbox(Inches(1), Inches(6), Inches(4), Inches(1))
+            _fill_text_frame(grouped.text_frame, spec, rng, f"{slide_idx + 1}-g")
+            text_nodes += 1
+
+        if spec.media_bytes:
+            slide.shapes.add_picture(_noise_png(rng, spec.media_bytes), Inches(6), Inches(5.5), Inches(2))
+
+        if spec.notes:
+            slide.notes_slide.notes_text_frame.text = _sentence(rng, spec.script, 12, f"{slide_idx + 1}-n")
+
+    prs.save(path)
+    return {"spec": asdict(spec), "label": spec.label(), "text_nodes": text_nodes}
+
+
+def fake_translate(text: str) -> str:
+    """長さが変わる疑似翻訳（元テキストと必ず異なる）"""
+    return f"{text} [ü]"
+
+
+def translation_payloads(extracted: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    抽出結果から各スクリプト向けの翻訳データを作成
+
+    Args:
+        extracted: extract_text_from_pptx() の結果
+
+    Returns:
+        {"generate": 編集済みスライド, "apply": apply_translations の翻訳JSON, "update": update_pptx の翻訳データ}
+    """
+    generate: List[Dict[str, Any]] = []
+    apply_slides: List[Dict[str, Any]] = []
+    update: Dict[int, List[Dict[str, Any]]] = {}
+
+    for slide_data in extracted["slides"]:
+        items: List[Tuple[str, Dict[str, Any]]] = []
+        for text_data in slide_data["texts"]:
+            if "cells" in text_data:
+                items.extend((cell["text"], cell["locator"]) for cell in text_data["cells"])
+            else:
+                items.append((text_data["text"], text_data["locator"]))
+
+        slide_number = slide_data["slide_number"]
+        generate.append({"pageNumber": slide_number, "texts": [
+            {"original": text, "translated": fake_translate(text), "locator": locator} for text, locator in items
+        ]})
+        apply_slides.append({"slide_number": slide_number, "translations": [
+            {"original": text, "translated": fake_translate(text), "locator": locator} for text, locator in items
+        ]})
+        update[slide_number] = [
+            {"locator": locator, "translated_text": fake_translate(text)} for text, locator in items
+        ]
+
+    return {"generate": generate, "apply": {"slides": apply_slides}, "update": update}
+
+
+def _table_size(value: str) -> Tuple[int, int]:
+    rows, _, cols = value.partition('x')
+    return int(rows), int(cols or rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic PPTX deck for benchmarks')
+    parser.add_argument('output', help='Output PPTX file path')
+    parser.add_argument('--slides', type=int, default=DeckSpec.slides)
+    parser.add_argument('--shapes', type=int, default=DeckSpec.shapes_per_slide, help='Text boxes per slide')
+    parser.add_argument('--paragraphs', type=int, default=DeckSpec.paragraphs_per_shape, help='Paragraphs per text box')
+    parser.add_argument('--runs', type=int, default=DeckSpec.runs_per_paragraph, help='Runs per paragraph')
+    parser.add_argument('--table', type=_table_size, default=(0, 0), help='Table size per slide, e.g. 6x4')
+    parser.add_argument('--group-depth', type=int, default=0, help='Nesting depth of a grouped text box per slide')
+    parser.add_argument('--notes', action='store_true', help='Add speaker notes to every slide')
+    parser.add_argument('--media-kb', type=int, default=0, help='Approximate size of an image embedded per slide (KB)')
+    parser.add_argument('--script', choices=SCRIPTS, default='latin', help='Writing system of the generated text')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    spec = DeckSpec(
+        slides=args.slides,
+        shapes_per_slide=args.shapes,
+        paragraphs_per_shape=args.paragraphs,
+        runs_per_paragraph=args.runs,
+        table_rows=args.table[0],
+        table_cols=args.table[1],
+        group_depth=args.group_depth,
+        notes=args.notes,
+        media_bytes=args.media_kb * 1024,
+        script=args.script,
+        seed=args.seed
+    )
+    info = build_deck(spec, args.output)
+    print(f"{args.output}: {info['label']} ({info['text_nodes']:,} text nodes)")
+
+
+if __name__ == "__main__":
+    main()
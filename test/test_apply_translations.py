@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+apply_translations.py のテスト
+同じテキストが複数ある場合も文書順に1対1で対応付けられることを確認する
+"""
+
+import json
+import os
+import sys
+
+from pptx import Presentation
+from pptx.util import Inches
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from apply_translations import apply_translations_to_pptx
+
+
+def test_duplicate_texts_map_one_to_one(tmp_path):
+    """重複するテキストは文書順に消費され、ノードを使い切った余りの翻訳は適用しない"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide.shapes.add_textbox(Inches(1), Inches(1), Inches(2), Inches(1)).text_frame.text = "Total"
+    table = slide.shapes.add_table(2, 2, Inches(1), Inches(3), Inches(4), Inches(1)).table
+    table.cell(0, 0).text = "Total"
+    table.cell(1, 1).text = "Other"
+    path = str(tmp_path / 'dup.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    prs.save(path)
+
+    translations = {"slides": [{"slide_number": 1, "translations": [
+        {"original": "Total", "translated": "合計1"},
+        {"original": " Total ", "translated": "合計2"},
+        {"original": "Total", "translated": "合計3"},
+        {"original": "Missing", "translated": "なし"},
+    ]}]}
+    result = apply_translations_to_pptx(path, output_path, json.dumps(translations))
+    assert result["success"]
+    assert result["applied_count"] == 2
+
+    shapes = Presentation(output_path).slides[0].shapes
+    assert shapes[0].text_frame.text == "合計1"
+    assert shapes[1].table.cell(0, 0).text == "合計2"
+    assert shapes[1].table.cell(1, 1).text == "Other"
+
+
+def test_duplicates_across_tables_apply_once_per_entry(tmp_path):
+    """2つのテーブルとシェイプに同じテキストがあっても、1件の翻訳は1箇所だけに適用する
+    （従来はテーブルごとに最初の一致セルへ適用し、その後のシェイプにも適用していた）
+    applied_count は従来どおり書き込んだ箇所の数"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    for top in (1, 3):
+        table = slide.shapes.add_table(1, 2, Inches(1), Inches(top), Inches(4), Inches(1)).table
+        table.cell(0, 1).text = "Total"
+    slide.shapes.add_textbox(Inches(1), Inches(5), Inches(2), Inches(1)).text_frame.text = "Total"
+    path = str(tmp_path / 'tables.pptx')
+    prs.save(path)
+
+    def apply(translated):
+        output_path = str(tmp_path / 'out.pptx')
+        translations = {"slides": [{"slide_number": 1, "translations": [
+            {"original": "Total", "translated": text} for text in translated
+        ]}]}
+        result = apply_translations_to_pptx(path, output_path, json.dumps(translations))
+        shapes = Presentation(output_path).slides[0].shapes
+        texts = [shapes[0].table.cell(0, 1).text, shapes[1].table.cell(0, 1).text, shapes[2].text_frame.text]
+        return result["applied_count"], texts
+
+    assert apply(["合計"]) == (1, ["合計", "Total", "Total"])
+    assert apply(["合計1", "合計2", "合計3"]) == (3, ["合計1", "合計2", "合計3"])
+    assert apply(["合計1", "合計2", "合計3", "合計4"]) == (3, ["合計1", "合計2", "合計3"])
+
+
+def test_locators_address_nodes_directly(tmp_path):
+    """抽出結果のロケーターで重複テキストの2つ目だけを置換できる"""
+    from extract_text import extract_text_from_pptx
+    import apply_translations_v2
+
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    for top in (1, 3):
+        slide.shapes.add_textbox(Inches(1), Inches(top), Inches(2), Inches(1)).text_frame.text = "Same"
+    table = slide.shapes.add_table(1, 2, Inches(1), Inches(5), Inches(4), Inches(1)).table
+    table.cell(0, 1).text = "Same"
+    path = str(tmp_path / 'same.pptx')
+    prs.save(path)
+
+    texts = extract_text_from_pptx(path)["slides"][0]["texts"]
+    cell = texts[2]["cells"][0]
+    assert cell["locator"]["row"] == 0 and cell["locator"]["col"] == 1
+    translations = {"slides": [{"slide_number": 1, "translations": [
+        {"original": "Same", "translated": "二番目", "locator": texts[1]["locator"]},
+        {"original": "Same", "translated": "セル", "locator": cell["locator"]},
+    ]}]}
+
+    for module in (apply_translations_to_pptx, apply_translations_v2.apply_translations_to_pptx):
+        output_path = str(tmp_path / 'out.pptx')
+        result = module(path, output_path, json.dumps(translations))
+        assert result["applied_count"] == 2
+
+        shapes = Presentation(output_path).slides[0].shapes
+        assert [shapes[0].text_frame.text, shapes[1].text_frame.text] == ["Same", "二番目"]
+        assert shapes[2].table.cell(0, 1).text == "セル"
+
+
+def test_v2_preserves_theme_color_and_east_asian_font(tmp_path):
+    """a:rPr を複製するため、テーマカラーや ea フォントも保持される"""
+    from lxml import etree
+    from pptx.enum.dml import MSO_THEME_COLOR
+    from pptx.oxml.ns import qn
+    from run_format import run_properties
+    import apply_translations_v2
+
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    run = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(3), Inches(1)).text_frame.paragraphs[0].add_run()
+    run.text = "Themed"
+    run.font.color.theme_color = MSO_THEME_COLOR.ACCENT_2
+    etree.SubElement(run_properties(run), qn('a:ea'), typeface='Meiryo')
+    path = str(tmp_path / 'theme.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    prs.save(path)
+
+    translations = {"slides": [{"slide_number": 1, "translations": [
+        {"original": "Themed", "translated": "テーマ"}
+    ]}]}
+    result = apply_translations_v2.apply_translations_to_pptx(path, output_path, json.dumps(translations))
+    assert result["applied_count"] == 1
+
+    new_run = Presentation(output_path).slides[0].shapes[0].text_frame.paragraphs[0].runs[0]
+    assert new_run.text == "テーマ"
+    assert new_run.font.color.theme_color == MSO_THEME_COLOR.ACCENT_2
+    assert run_properties(new_run).find(qn('a:ea')).get('typeface') == 'Meiryo'
+
+
+def test_located_nodes_are_not_matched_by_text(tmp_path):
+    """ロケーターで指定したノードは、前後にあるテキスト照合の翻訳では上書きしない"""
+    from extract_text import extract_text_from_pptx
+
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    for top in (1, 3):
+        slide.shapes.add_textbox(Inches(1), Inches(top), Inches(2), Inches(1)).text_frame.text = "Same"
+    path = str(tmp_path / 'same.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    prs.save(path)
+
+    texts = extract_text_from_pptx(path)["slides"][0]["texts"]
+    translations = {"slides": [{"slide_number": 1, "translations": [
+        {"original": "Same", "translated": "一"},
+        {"original": "Same", "translated": "位置", "locator": texts[0]["locator"]},
+        {"original": "Same", "translated": "位置2", "locator": texts[0]["locator"]},
+        {"original": "Same", "translated": "二"},
+    ]}]}
+    result = apply_translations_to_pptx(path, output_path, json.dumps(translations))
+    assert result["applied_count"] == 2
+
+    shapes = Presentation(output_path).slides[0].shapes
+    assert [shapes[0].text_frame.text, shapes[1].text_frame.text] == ["位置", "一"]
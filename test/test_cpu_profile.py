@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+CPUプロファイラーのテスト
+collapsed stack 形式で書き出され、無効時はプロファイラーのスレッドを作らないことを確認する
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from cpu_profile import PROFILE_CPU_ENV, profile_cpu, take_cpu_profile_flag
+from mixed_deck import create_mixed_pptx
+from worker import PPTXWorker
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx')
+
+
+def _busy_loop():
+    total = 0
+    for value in range(2_000_000):
+        total += value * value
+    return total
+
+
+def test_profile_cpu_writes_collapsed_stacks(tmp_path):
+    """with ブロックのスレッドのスタックが "外側;...;内側 サンプル数" の形式で書き出される"""
+    output_path = str(tmp_path / 'cpu.folded')
+    with profile_cpu(output_path, interval=0.001) as profiler:
+        _busy_loop()
+    assert profiler.samples > 0
+
+    with open(output_path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, _, count = lines[0].rpartition(' ')
+    assert int(count) > 0
+    assert stack.split(';')[-1].startswith('_busy_loop (test/test_cpu_profile.py:')
+    assert 'test_profile_cpu_writes_collapsed_stacks' in stack
+
+
+def test_profile_cpu_disabled_starts_nothing(monkeypatch):
+    """出力先がなければスレッドを作らず、位置引数のスクリプトでは --profile-cpu を取り除く"""
+    threads = threading.active_count()
+    with profile_cpu(None) as profiler:
+        assert profiler is None
+        assert threading.active_count() == threads
+
+    monkeypatch.delenv(PROFILE_CPU_ENV, raising=False)
+    assert take_cpu_profile_flag(['a.pptx', 'b.pptx', '{}']) == (['a.pptx', 'b.pptx', '{}'], None)
+    assert take_cpu_profile_flag(['a.pptx', '--profile-cpu', 'out.folded', 'b.pptx']) == (['a.pptx', 'b.pptx'], 'out.folded')
+    monkeypatch.setenv(PROFILE_CPU_ENV, 'env.folded')
+    assert take_cpu_profile_flag(['--profile-cpu=flag.folded']) == ([], 'flag.folded')
+    assert take_cpu_profile_flag([]) == ([], 'env.folded')
+
+
+def test_cli_and_worker_profiles(tmp_path):
+    """コマンドラインはプロセス終了時に、ワーカーはリクエストごとに書き出す"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+
+    cli_profile = str(tmp_path / 'update.folded')
+    completed = subprocess.run(
+        [sys.executable, os.path.join(SCRIPT_DIR, 'update_pptx.py'), path, str(tmp_path / 'out.pptx'), '{}',
+         '--profile-cpu', cli_profile],
+        capture_output=True, text=True
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert '"success": true' in completed.stdout
+    assert os.path.exists(cli_profile)
+
+    worker = PPTXWorker(concurrency=1, profile_cpu_path=str(tmp_path / 'job-{id}.folded'))
+    try:
+        response = worker.handle_request({"id": "a1", "op": "extract", "file_path": path})
+        assert response["success"]
+        assert os.path.exists(tmp_path / 'job-a1.folded')
+
+        own_profile = str(tmp_path / 'own.folded')
+        worker.handle_request({"id": "a2", "op": "extract", "file_path": path, "profile_cpu": own_profile})
+        assert os.path.exists(own_profile)
+        assert not os.path.exists(tmp_path / 'job-a2.folded')
+    finally:
+        worker.shutdown()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+抽出結果キャッシュのテスト
+"""
+
+import os
+import sys
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+import extract_cache
+from extract_cache import RESCAN_INTERVAL, ExtractionCache
+from extract_text import extract_text_from_pptx
+from metrics import METRICS_ENV
+
+TEST_PPTX = os.path.join(os.path.dirname(__file__), 'test_presentation.pptx')
+
+
+def test_repeat_extraction_is_served_from_cache(tmp_path, monkeypatch):
+    """2回目の抽出はキャッシュから同じ結果を返す（読み込みのフェーズがないことを計測で確認する）"""
+    monkeypatch.setenv(METRICS_ENV, '1')
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+
+    first = extract_text_from_pptx(TEST_PPTX, cache=cache)
+    second = extract_text_from_pptx(TEST_PPTX, engine='xml', cache=cache)
+
+    assert first.pop("cache") == {"hit": False, "hits": 0, "misses": 1}
+    assert second.pop("cache") == {"hit": True, "hits": 1, "misses": 1}
+    assert "load" in first["metrics"]["phases"] and "load" not in second["metrics"]["phases"]
+    assert first.pop("metrics")["counters"] == second.pop("metrics")["counters"]
+    assert first == second
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path):
+    """上限を超えると最終アクセスの古いエントリから削除する"""
+    cache = ExtractionCache(str(tmp_path / 'cache'), max_bytes=250)
+    payload = {"success": True, "slides": ["x" * 80]}
+
+    cache.put('aa' * 32, payload)
+    os.utime(cache._entry_path('aa' * 32), (1, 1))
+    cache.put('bb' * 32, payload)
+    os.utime(cache._entry_path('bb' * 32), (2, 2))
+    cache.put('cc' * 32, payload)
+
+    assert cache.get('aa' * 32) is None
+    assert cache.get('bb' * 32) == payload
+    assert cache.get('cc' * 32) == payload
+
+
+def test_put_scans_only_when_estimate_exceeds_limit(tmp_path, monkeypatch):
+    """書き込みごとにディレクトリを走査せず、推定サイズが上限を超えたときと一定回数ごとに走査する"""
+    scans = []
+    walk = os.walk
+    monkeypatch.setattr(extract_cache.os, 'walk', lambda top: scans.append(top) or walk(top))
+
+    cache = ExtractionCache(str(tmp_path / 'cache'), max_bytes=10_000)
+    payload = {"success": True, "slides": ["x" * 80]}
+    for idx in range(20):
+        cache.put(f"{idx:064x}", payload)
+    # 初回だけ走査して以降は推定サイズを加算（同じキーの上書きは差分だけ）
+    assert len(scans) == 1
+    cache.put(f"{0:064x}", payload)
+    entry_size = os.path.getsize(cache._entry_path(f"{0:064x}"))
+    assert cache.total_bytes == 20 * entry_size and len(scans) == 1
+
+    # 上限を超えたら走査して古いエントリを削除し、実際のサイズに合わせる
+    cache.max_bytes = 10 * entry_size
+    cache.put(f"{20:064x}", payload)
+    assert len(scans) == 2
+    assert cache.total_bytes == 10 * entry_size
+    assert sum(len(files) for _, _, files in walk(cache.cache_dir)) == 10
+
+    # 上限以内でも一定回数ごとに数え直す
+    cache.max_bytes = 10_000_000
+    for idx in range(RESCAN_INTERVAL):
+        cache.put(f"{idx % 5:064x}", payload)
+    assert len(scans) == 3
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+抽出エンジンのテスト
+python-pptx版とXMLストリーミング版が同じJSONを返すことを確認する
+"""
+
+import os
+import sys
+
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from extract_text import extract_text_from_pptx
+from mixed_deck import create_mixed_pptx
+
+TEST_PPTX = os.path.join(os.path.dirname(__file__), 'test_presentation.pptx')
+
+
+def test_xml_engine_matches_pptx_engine_on_fixture():
+    """既存のテスト用PPTXで両エンジンの出力が一致する"""
+    expected = extract_text_from_pptx(TEST_PPTX)
+    assert expected["success"]
+    actual = extract_text_from_pptx(TEST_PPTX, engine='xml')
+    assert actual == expected
+
+
+def test_xml_engine_matches_pptx_engine_on_mixed_shapes(tmp_path):
+    """様々なシェイプを含むPPTXで両エンジンの出力が一致する"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+
+    expected = extract_text_from_pptx(path)
+    assert expected["success"]
+    assert expected["total_slides"] == 5
+    actual = extract_text_from_pptx(path, engine='xml')
+    assert actual == expected
+
+
+def test_xml_engine_reports_errors(tmp_path):
+    """zipでないファイルはエラーとして返す"""
+    path = tmp_path / 'broken.pptx'
+    path.write_bytes(b'not a zip file')
+
+    result = extract_text_from_pptx(str(path), engine='xml')
+    assert result["success"] is False
+    assert result["error"]
+
+
+def test_parallel_extraction_matches_serial(tmp_path, monkeypatch):
+    """並列抽出の結果がslide_number順で直列抽出と一致する"""
+    import extract_text
+
+    prs = Presentation()
+    for slide_idx in range(12):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {slide_idx + 1}"
+        if slide_idx % 3:
+            slide.placeholders[1].text = f"Body {slide_idx + 1}"
+    path = str(tmp_path / 'many.pptx')
+    prs.save(path)
+
+    expected = extract_text_from_pptx(path)
+    monkeypatch.setattr(extract_text, 'PARALLEL_MIN_SLIDES', 1)
+    for engine in ('pptx', 'xml'):
+        actual = extract_text_from_pptx(path, engine=engine, workers=3)
+        assert actual == expected
+
+
+def test_slide_range_extraction():
+    """指定した範囲のスライドだけを抽出し、総スライド数も返す"""
+    from extract_text import parse_slide_range
+
+    assert parse_slide_range("1-20") == (1, 20)
+    assert parse_slide_range("5") == (5, 1)
+    assert parse_slide_range("5-") == (5, None)
+
+    full = extract_text_from_pptx(TEST_PPTX)
+    for engine in ('pptx', 'xml'):
+        result = extract_text_from_pptx(TEST_PPTX, engine=engine, start=2, count=2)
+        assert result["total_slides"] == full["total_slides"]
+        assert result["slide_range"] == {"start": 2, "count": 2}
+        assert result["slides"] == full["slides"][1:3]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+多言語出力のテスト
+1回の読み込みから言語ごとのPPTXを生成し、前の言語の翻訳が次の言語に残らないことを確認する
+"""
+
+import os
+import sys
+
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from generate_pptx import generate_translated_pptx_multi
+from mixed_deck import create_mixed_pptx
+
+
+def test_each_language_starts_from_the_original(tmp_path):
+    """言語ごとに元のテキストから置換され、置換数と所要時間が報告される"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+
+    edited_slides_by_lang = {
+        "ja": [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": "四半期報告"}]}],
+        "fr": {"slides": [{"pageNumber": 2, "texts": [{"original": "Shapes", "translated": "Formes"}]}]},
+        "de": [{"pageNumber": 1, "texts": [
+            {"original": "Quarterly Report", "translated": "Quartalsbericht"},
+            {"original": "Auto shape", "translated": "Autoform"},
+        ]}],
+    }
+    result = generate_translated_pptx_multi(path, edited_slides_by_lang, str(tmp_path / 'out_{lang}.pptx'))
+
+    assert result["success"]
+    assert list(result["languages"]) == ["ja", "fr", "de"]
+    assert result["languages"]["ja"]["replacements"] == 1
+    assert result["languages"]["de"]["replacements"] == 2
+    assert all(lang_result["seconds"] >= 0 for lang_result in result["languages"].values())
+
+    def titles(lang):
+        prs = Presentation(str(tmp_path / f'out_{lang}.pptx'))
+        return [prs.slides[0].shapes.title.text_frame.text, prs.slides[1].shapes.title.text_frame.text]
+
+    assert titles("ja") == ["四半期報告", "Shapes"]
+    assert titles("fr") == ["Quarterly Report", "Formes"]
+    assert titles("de") == ["Quartalsbericht", "Shapes"]
+    assert Presentation(str(tmp_path / 'out_de.pptx')).slides[1].shapes[2].text_frame.text == "Autoform"
+    assert Presentation(str(tmp_path / 'out_fr.pptx')).slides[1].shapes[2].text_frame.text == "Auto shape"
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+マニフェストモードのテスト
+複数のジョブをプロセスプール・パイプラインで実行し、失敗したジョブが他のジョブに影響しないことを確認する
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+import generate_pptx
+from generate_pptx import run_manifest, run_manifest_job
+from pipeline import run_manifest_pipeline
+from mixed_deck import create_mixed_pptx
+
+
+def test_manifest_isolates_failed_jobs(tmp_path):
+    """ジョブごとに1行の結果が出力され、壊れたジョブは失敗として報告される"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    translations_path = str(tmp_path / 'fr.json')
+    with open(translations_path, 'w', encoding='utf-8') as f:
+        json.dump({"slides": [{"pageNumber": 2, "texts": [{"original": "Shapes", "translated": "Formes"}]}]}, f)
+
+    jobs = [
+        {"id": "ja", "input": path, "output": str(tmp_path / 'ja.pptx'),
+         "slides": [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": "四半期報告"}]}]},
+        {"id": "missing", "input": str(tmp_path / 'missing.pptx'), "output": str(tmp_path / 'x.pptx'), "slides": []},
+        {"id": "fr", "input": path, "output": str(tmp_path / 'fr.pptx'), "translations": translations_path},
+        {"id": "no-output", "input": path, "slides": []},
+    ]
+    manifest_path = str(tmp_path / 'jobs.jsonl')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False) + '\n')
+        f.write('{not json\n')
+
+    out = io.StringIO()
+    summary = run_manifest(manifest_path, workers=2, out=out)
+
+    assert summary == {"total": 5, "succeeded": 2, "failed": 3}
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    by_line = {record["line"]: record for record in records}
+    assert sorted(by_line) == [1, 2, 3, 4, 5]
+    assert by_line[1]["id"] == "ja" and by_line[1]["success"]
+    assert not by_line[2]["success"] and "not found" in by_line[2]["errors"][0]
+    assert by_line[3]["success"] and by_line[3]["replacements"] == 1
+    assert by_line[4]["error"] == "Missing job field: output"
+    assert by_line[5]["error"].startswith("Invalid JSON")
+
+    assert Presentation(str(tmp_path / 'ja.pptx')).slides[0].shapes.title.text_frame.text == "四半期報告"
+    assert Presentation(str(tmp_path / 'fr.pptx')).slides[1].shapes.title.text_frame.text == "Formes"
+
+
+
+def _run_or_crash(job, *args):
+    """"crash" を指定したジョブではワーカープロセスごと終了する"""
+    if job.get("crash"):
+        os._exit(1)
+    return run_manifest_job(job, *args)
+
+
+def test_manifest_recreates_broken_pool_once(tmp_path, monkeypatch):
+    """ワーカーが落ちると実行中のジョブは失敗し、プールは1回だけ作り直して残りのジョブを続ける"""
+    pools = []
+
+    class CountingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    def wait_one(futures, return_when):
+        """終わったジョブを1件ずつ返す（壊れたプールのジョブが複数回の collect に分かれる場合を再現する）"""
+        done, not_done = wait(futures, return_when=return_when)
+        first, *rest = done
+        return {first}, not_done | set(rest)
+
+    monkeypatch.setattr(generate_pptx, 'ProcessPoolExecutor', CountingPool)
+    monkeypatch.setattr(generate_pptx, 'run_manifest_job', _run_or_crash)
+    monkeypatch.setattr(generate_pptx, 'wait', wait_one)
+
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    manifest_path = str(tmp_path / 'jobs.jsonl')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"id": "crash", "crash": True, "input": path, "output": "x.pptx", "slides": []}) + '\n')
+        for job_idx in range(12):
+            f.write(json.dumps({"id": job_idx, "input": path, "output": str(tmp_path / f'out{job_idx}.pptx'),
+                                "slides": []}) + '\n')
+
+    out = io.StringIO()
+    summary = run_manifest(manifest_path, workers=2, out=out)
+
+    records = {record["id"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert summary["total"] == 13
+    assert records["crash"]["error"].startswith("Worker process terminated")
+    # 壊れたプールで実行中だったジョブ（最大 workers * 2 件）以外は新しいプールで成功する
+    assert summary["failed"] <= 4
+    assert records[11]["success"]
+    assert len(pools) == 2
+
+def test_pipeline_overlaps_downloads(tmp_path):
+    """パイプラインではダウンロード待ちどうし、およびダウンロードと翻訳・保存が重なる"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    with open(path, 'rb') as f:
+        body = f.read()
+
+    delay = 0.5
+
+    class SlowHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/deck.pptx"
+
+    manifest_path = str(tmp_path / 'jobs.jsonl')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for job_idx in range(4):
+            f.write(json.dumps({"id": job_idx, "input": url, "output": str(tmp_path / f'out{job_idx}.pptx'),
+                                "slides": [{"pageNumber": 1, "texts": [
+                                    {"original": "Quarterly Report", "translated": f"Report {job_idx}"}
+                                ]}]}) + '\n')
+        f.write(json.dumps({"id": "bad", "input": "http://127.0.0.1:1/none.pptx", "output": "x.pptx", "slides": []}) + '\n')
+
+    out = io.StringIO()
+    try:
+        summary = run_manifest_pipeline(manifest_path, workers=2, out=out, fetch_concurrency=2)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert summary == {"total": 5, "succeeded": 4, "failed": 1}
+    records = {record["id"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert records["bad"]["error"].startswith("Failed to download")
+    for job_idx in range(4):
+        assert records[job_idx]["download"] == "downloaded"
+        assert set(records[job_idx]["timings"]) == {"fetch_started", "fetch", "process_started", "process"}
+        prs = Presentation(str(tmp_path / f'out{job_idx}.pptx'))
+        assert prs.slides[0].shapes.title.text_frame.text == f"Report {job_idx}"
+
+    # 経過時間ではなく各段の区間で重なりを確認する（マシンの速さに左右されない）
+    timings = [records[job_idx]["timings"] for job_idx in range(4)]
+    fetches = sorted((t["fetch_started"], t["fetch_started"] + t["fetch"]) for t in timings)
+    processes = sorted((t["process_started"], t["process_started"] + t["process"]) for t in timings)
+    # 同時に2件ダウンロードしている
+    assert fetches[1][0] < fetches[0][1]
+    # 最後のダウンロードは最初に取得したジョブの翻訳・保存が終わる前に始まっている
+    assert fetches[-1][0] < processes[0][1]
+
+
+
+def test_pipeline_drains_when_writing_a_result_fails(tmp_path):
+    """結果の書き出しが失敗しても前段を止めずに全ジョブを処理し、最後に例外を送出する"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    manifest_path = str(tmp_path / 'jobs.jsonl')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for job_idx in range(5):
+            f.write(json.dumps({"id": job_idx, "input": path, "output": str(tmp_path / f'out{job_idx}.pptx'),
+                                "slides": []}) + '\n')
+
+    class FailingOnce(io.StringIO):
+        failed = False
+
+        def write(self, text):
+            if not self.failed:
+                self.failed = True
+                raise OSError("Broken pipe")
+            return super().write(text)
+
+    out = FailingOnce()
+    outcome = {}
+
+    def run():
+        with pytest.raises(OSError, match="Broken pipe"):
+            run_manifest_pipeline(manifest_path, workers=1, out=out, fetch_concurrency=1)
+        outcome["raised"] = True
+
+    # 書き出しの失敗で止まると done_queue で待ち続けるので、別スレッドで実行して時間内に終わることを確認する
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive() and outcome.get("raised")
+    assert len(out.getvalue().splitlines()) == 4
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+URLダウンロードのテスト
+ローカルのHTTPサーバーを相手に、接続の使い回しと条件付きリクエストによるキャッシュを確認する
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from generate_pptx import generate_translated_pptx
+from http_fetch import DOWNLOADED, NOT_MODIFIED, STORED, ConnectionPool, DownloadCache, DownloadError, download
+from mixed_deck import create_mixed_pptx
+
+
+@pytest.fixture
+def deck_server(tmp_path):
+    """PPTXを ETag 付きで返すkeep-alive対応のHTTPサーバー"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    with open(path, 'rb') as f:
+        body = f.read()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+    stats = {"bodies": 0, "not_modified": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/deck.pptx':
+                if self.headers.get('If-None-Match') == etag:
+                    stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                stats["bodies"] += 1
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == '/moved.pptx':
+                self.send_response(302)
+                self.send_header('Location', '/deck.pptx')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            else:
+                self.send_error(404)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", body, stats
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_revalidates_cache_and_reuses_connection(deck_server, tmp_path):
+    """2回目は304で本体を受け取らず、同じ接続が使い回される"""
+    base_url, body, stats = deck_server
+    pool = ConnectionPool(timeout=5)
+    cache = DownloadCache(str(tmp_path / 'cache'))
+
+    path, status = download(f"{base_url}/deck.pptx", cache, pool)
+    assert status == STORED
+    path_again, status = download(f"{base_url}/moved.pptx", cache, pool)
+    assert status == STORED  # リダイレクト前のURLで別エントリになる
+    path_again, status = download(f"{base_url}/deck.pptx", cache, pool)
+    assert status == NOT_MODIFIED and path_again == path
+    with open(path, 'rb') as f:
+        assert f.read() == body
+
+    assert stats == {"bodies": 2, "not_modified": 1}
+    assert pool.connections_opened == 1
+
+    temp_path, status = download(f"{base_url}/deck.pptx", None, pool)
+    assert status == DOWNLOADED
+    os.unlink(temp_path)
+
+    with pytest.raises(DownloadError):
+        download(f"{base_url}/missing.pptx", cache, pool)
+    pool.close()
+
+
+def test_generate_from_url_uses_download_cache(deck_server, tmp_path):
+    """URL入力の生成でもキャッシュが使われ、差分保存も機能する"""
+    base_url, _, stats = deck_server
+    edited = [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": "四半期報告"}]}]
+    cache_dir = str(tmp_path / 'cache')
+
+    first = generate_translated_pptx(f"{base_url}/deck.pptx", edited, str(tmp_path / 'a.pptx'), cache_dir)
+    second = generate_translated_pptx(f"{base_url}/deck.pptx", edited, str(tmp_path / 'b.pptx'), cache_dir)
+
+    assert first["success"] and first["download"] == STORED
+    assert second["success"] and second["download"] == NOT_MODIFIED
+    assert second["save_mode"] == "incremental"
+    assert stats["bodies"] == 1
+    with open(tmp_path / 'a.pptx', 'rb') as a, open(tmp_path / 'b.pptx', 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+差分保存のテスト
+変更していないzipエントリが圧縮済みのバイト列のままコピーされることを確認する
+"""
+
+import json
+import os
+import sys
+import zipfile
+
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from apply_translations import apply_translations_to_pptx
+from incremental_save import save_presentation
+from mixed_deck import create_mixed_pptx
+
+
+def raw_entries(path: str):
+    """各エントリの圧縮済みバイト列を取得"""
+    entries = {}
+    with open(path, 'rb') as fp, zipfile.ZipFile(fp) as zf:
+        for info in zf.infolist():
+            fp.seek(info.header_offset + 26)
+            name_len = int.from_bytes(fp.read(2), 'little')
+            extra_len = int.from_bytes(fp.read(2), 'little')
+            fp.seek(name_len + extra_len, os.SEEK_CUR)
+            entries[info.filename] = (info.CRC, fp.read(info.compress_size))
+    return entries
+
+
+def test_untouched_entries_are_copied_raw(tmp_path):
+    """変更したスライドだけが書き換わり、他のエントリはバイト単位で一致する"""
+    path = str(tmp_path / 'mixed.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    create_mixed_pptx(path)
+
+    translations = {"slides": [{"slide_number": 4, "translations": [
+        {"original": "Grouped", "translated": "グループ"}
+    ]}]}
+    result = apply_translations_to_pptx(path, output_path, json.dumps(translations))
+    assert result["save_mode"] == "incremental"
+
+    with zipfile.ZipFile(output_path) as zf:
+        assert zf.testzip() is None
+
+    before = raw_entries(path)
+    after = raw_entries(output_path)
+    assert list(before) == list(after)
+    changed = [name for name in before if before[name] != after[name]]
+    assert changed == ['ppt/slides/slide4.xml']
+    assert Presentation(output_path).slides[3].shapes[0].shapes[0].text_frame.text == "グループ"
+
+
+def test_falls_back_when_slide_parts_are_renamed(tmp_path):
+    """スライドの並び順とパート名が一致しない場合は通常保存にフォールバック"""
+    from lxml import etree
+
+    path = str(tmp_path / 'mixed.pptx')
+    reordered_path = str(tmp_path / 'reordered.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    create_mixed_pptx(path)
+
+    # presentation.xml の sldIdLst だけを入れ替える（python-pptxは読み込み時にパート名を付け直す）
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(reordered_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = src.read(info.filename)
+            if info.filename == 'ppt/presentation.xml':
+                root = etree.fromstring(data)
+                sld_id_lst = root.find('{http://schemas.openxmlformats.org/presentationml/2006/main}sldIdLst')
+                sld_id_lst.insert(0, sld_id_lst[-1])
+                data = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+            dst.writestr(info, data)
+
+    prs = Presentation(reordered_path)
+    slide = prs.slides[1]
+    slide.shapes.title.text_frame.text = "Changed"
+    assert save_presentation(prs, output_path, reordered_path, {slide.part.partname}) == "full"
+
+    titles = [s.shapes.title.text_frame.text if s.shapes.title else None for s in Presentation(output_path).slides]
+    assert titles[1] == "Changed"
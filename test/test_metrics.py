@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+フェーズごとの所要時間・カウンターのテスト
+"""
+
+import json
+import os
+import sys
+import tracemalloc
+
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from apply_translations import apply_translations_to_pptx
+from extract_text import extract_text_from_pptx
+from generate_pptx import generate_translated_pptx
+from metrics import (METRICS_ENV, NULL_METRICS, PROFILE_MEMORY_ENV, MemoryMetrics, Metrics, new_metrics,
+                     take_profile_flags, timed)
+from mixed_deck import create_mixed_pptx
+
+
+def test_metrics_records_phases_and_counters():
+    """同じ名前のフェーズは合計し、無効時は何も記録しない"""
+    metrics = Metrics()
+    with metrics.phase('load'):
+        pass
+    with metrics.phase('load'):
+        pass
+    metrics.count('slides')
+    metrics.count('slides', 2)
+    assert list(timed(range(3), metrics, 'extract')) == [0, 1, 2]
+
+    data = metrics.as_dict()
+    assert set(data["phases"]) == {'load', 'extract'}
+    assert data["counters"] == {'slides': 3}
+    assert data["peak_rss"] is None or data["peak_rss"] > 0
+
+    assert NULL_METRICS.attach({"success": True}) == {"success": True}
+
+
+def test_metrics_are_opt_in(monkeypatch):
+    """デフォルトでは計測せず、PPTX_METRICS=1 または --metrics で有効になる"""
+    monkeypatch.delenv(METRICS_ENV, raising=False)
+    assert new_metrics() is NULL_METRICS
+    monkeypatch.setenv(METRICS_ENV, '0')
+    assert new_metrics() is NULL_METRICS
+    monkeypatch.setenv(METRICS_ENV, '1')
+    assert isinstance(new_metrics(), Metrics)
+
+    monkeypatch.delenv(METRICS_ENV)
+    assert take_profile_flags(['in.pptx', '--metrics', 'out.pptx']) == ['in.pptx', 'out.pptx']
+    assert isinstance(new_metrics(), Metrics)
+
+
+def test_generate_and_apply_report_metrics(tmp_path, monkeypatch):
+    """有効にすると生成・適用・抽出の結果に各フェーズの所要時間と処理した要素数が含まれる（無効なら含まれない）"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    output_path = str(tmp_path / 'out.pptx')
+
+    edited = [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": "四半期報告\n2024"}]}]
+    monkeypatch.delenv(METRICS_ENV, raising=False)
+    result = generate_translated_pptx(path, edited, output_path)
+    assert result["success"] and "metrics" not in result
+    assert "metrics" not in extract_text_from_pptx(path)
+
+    monkeypatch.setenv(METRICS_ENV, '1')
+    result = generate_translated_pptx(path, edited, output_path)
+    assert result["success"]
+    metrics = result["metrics"]
+    assert {'load', 'prepare', 'index', 'replace', 'save'} <= set(metrics["phases"])
+    counters = metrics["counters"]
+    assert counters["shapes"] == 1 and counters["runs"] == 2
+    assert counters["slides"] == len(Presentation(path).slides)
+    assert counters["bytes_in"] == os.path.getsize(path)
+    assert counters["bytes_out"] == os.path.getsize(output_path)
+
+    translations = {"slides": [{"slide_number": 1, "translations": [
+        {"original": "Quarterly Report", "translated": "四半期報告"}
+    ]}]}
+    result = apply_translations_to_pptx(path, output_path, json.dumps(translations))
+    assert result["success"]
+    assert {'parse', 'load', 'index', 'apply', 'save'} <= set(result["metrics"]["phases"])
+    assert result["metrics"]["counters"]["shapes"] == 1
+
+    # 抽出のカウンターはエンジンによらず一致する
+    counters = extract_text_from_pptx(path)["metrics"]["counters"]
+    assert counters["slides"] == 4 and counters["cells"] > 0
+    assert extract_text_from_pptx(path, engine='xml')["metrics"]["counters"] == counters
+
+
+def test_memory_profile_per_phase(monkeypatch):
+    """入れ子のフェーズのピークは外側にも反映され、確保の多い行は一番外側のフェーズごとに記録される"""
+    was_tracing = tracemalloc.is_tracing()
+    try:
+        monkeypatch.setenv(PROFILE_MEMORY_ENV, '0')
+        assert not isinstance(new_metrics(), MemoryMetrics)
+        assert take_profile_flags(['in.pptx', '--profile-memory', 'out.pptx']) == ['in.pptx', 'out.pptx']
+        metrics = new_metrics()
+        assert isinstance(metrics, MemoryMetrics)
+
+        kept = []
+        with metrics.phase('load'):
+            kept.append(bytearray(1 << 20))
+        with metrics.phase('replace'):
+            with metrics.phase('style'):
+                temporary = bytearray(2 << 20)
+                del temporary
+
+        memory = metrics.as_dict()["memory"]["phases"]
+        assert set(memory) == {'load', 'replace', 'style'}
+        assert memory['load']["traced_end"] - memory['load']["traced_start"] >= 1 << 20
+        assert memory['load']["top"][0]["site"].startswith("test/test_metrics.py:")
+        assert memory['load']["top"][0]["size"] >= 1 << 20
+        assert memory['style']["traced_peak"] - memory['style']["traced_start"] >= 2 << 20
+        assert memory['replace']["traced_peak"] >= memory['style']["traced_peak"]
+        assert 'top' not in memory['style']
+        assert memory['replace']["rss_peak"] is None or memory['replace']["rss_peak"] > 0
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Range リクエストによるリモートPPTX読み込みのテスト
+ローカルの Range 対応HTTPサーバーを相手に、画像を取得せずに翻訳・保存できることを確認する
+"""
+
+import io
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from generate_pptx import generate_translated_pptx
+from remote_zip import RemotePresentation
+from mixed_deck import create_mixed_pptx
+from test_incremental_save import raw_entries
+
+
+def create_media_pptx(path: str):
+    """圧縮の効かない大きな画像を含むテスト用PPTXを作成"""
+    create_mixed_pptx(path)
+    prs = Presentation(path)
+    image = io.BytesIO()
+    Image.frombytes('RGB', (640, 640), os.urandom(640 * 640 * 3)).save(image, format='PNG')
+    image.seek(0)
+    prs.slides[4].shapes.add_picture(image, Inches(1), Inches(1))
+    prs.save(path)
+
+
+# 送信量を数えるときの書き込み単位
+SEND_CHUNK_SIZE = 64 * 1024
+
+
+def serve(body: bytes, ranges: bool, body_delay: float = 0):
+    """
+    body を返すHTTPサーバー（ranges=True なら Range / If-Range に対応）
+    body_delay 秒待ってから本文を書き込み、クライアントが切断するまでに送れたバイト数を数える
+    """
+    stats = {"bytes_sent": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            start, end = 0, len(body) - 1
+            match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range', ''))
+            partial = ranges and match is not None and self.headers.get('If-Range', '"v1"') == '"v1"'
+            if partial:
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2) or end), end)
+                else:
+                    start = max(0, len(body) - int(match.group(2)))
+            data = body[start:end + 1]
+            self.send_response(206 if partial else 200)
+            self.send_header('ETag', '"v1"')
+            if partial:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.flush()
+            time.sleep(body_delay)
+            for offset in range(0, len(data), SEND_CHUNK_SIZE):
+                try:
+                    self.wfile.write(data[offset:offset + SEND_CHUNK_SIZE])
+                except OSError:
+                    self.close_connection = True
+                    return
+                stats["bytes_sent"] += min(SEND_CHUNK_SIZE, len(data) - offset)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+@pytest.fixture
+def media_deck(tmp_path):
+    path = str(tmp_path / 'media.pptx')
+    create_media_pptx(path)
+    with open(path, 'rb') as f:
+        return path, f.read()
+
+
+EDITED = [{"pageNumber": 4, "texts": [{"original": "Grouped", "translated": "グループ"}]}]
+
+
+def test_range_loading_skips_media(media_deck, tmp_path):
+    """画像は読み込み時に取得せず、出力には元のバイト列のまま転送される"""
+    path, body = media_deck
+    server, stats = serve(body, ranges=True)
+    output_path = str(tmp_path / 'out.pptx')
+    full_path = str(tmp_path / 'full.pptx')
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/media.pptx"
+
+        # 読み込みで取得するのは中央ディレクトリとXMLパートだけ
+        remote = RemotePresentation(url)
+        assert remote.stats()["bytes_fetched"] < len(body) // 4
+        assert any(name.startswith('ppt/media/') for name in remote.lazy_members)
+
+        # 通常保存にフォールバックする場合は画像を取得してから保存する
+        remote.hydrate()
+        remote.presentation.save(full_path)
+        remote.close()
+
+        stats["bytes_sent"] = 0
+        result = generate_translated_pptx(url, EDITED, output_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result["success"] and result["download"] == "range"
+    assert result["save_mode"] == "incremental"
+    # 変更していないエントリはまとめて転送されるので、全体の転送量はファイル1つ分程度
+    assert stats["bytes_sent"] == result["remote"]["bytes_fetched"]
+    assert stats["bytes_sent"] < len(body) * 1.2
+
+    before = raw_entries(path)
+    after = raw_entries(output_path)
+    assert [name for name in before if before[name] != after[name]] == ['ppt/slides/slide4.xml']
+    with zipfile.ZipFile(output_path) as zf:
+        assert zf.testzip() is None
+    assert Presentation(output_path).slides[3].shapes[0].shapes[0].text_frame.text == "グループ"
+
+    with zipfile.ZipFile(path) as original, zipfile.ZipFile(full_path) as full:
+        media = [name for name in original.namelist() if name.startswith('ppt/media/')]
+        assert all(original.read(name) == full.read(name) for name in media)
+
+
+def test_falls_back_to_full_download_without_range_support(media_deck, tmp_path):
+    """Range に対応していないサーバーでは全体を1回だけダウンロードする（200の本文は読まずに切断する）"""
+    path, body = media_deck
+    server, stats = serve(body, ranges=False, body_delay=0.2)
+    output_path = str(tmp_path / 'out.pptx')
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/media.pptx"
+        result = generate_translated_pptx(url, EDITED, output_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result["success"] and result["download"] == "downloaded"
+    # Range 要求への200の本文は切断後の数チャンクまでしか送られない
+    assert stats["bytes_sent"] < len(body) + 4 * SEND_CHUNK_SIZE
+    assert Presentation(output_path).slides[3].shapes[0].shapes[0].text_frame.text == "グループ"
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+文字体系の判定とフォントのフォールバックのテスト
+"""
+
+import os
+import sys
+
+from pptx import Presentation
+from pptx.oxml.ns import qn
+from pptx.util import Inches
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from generate_pptx import generate_translated_pptx, generate_translated_pptx_multi
+from script_fonts import (
+    ARABIC, CHINESE, CYRILLIC, JAPANESE, KOREAN, LATIN, THAI,
+    detect_script, ensure_script_font, han_script_for_language
+)
+
+
+def test_detect_script():
+    """文字体系の判定（混在時は東アジアの文字を優先、漢字だけなら指定に従う）"""
+    assert detect_script("Quarterly Report") == LATIN
+    assert detect_script("") == LATIN
+    assert detect_script("2024年 Q3 レポート") == JAPANESE
+    assert detect_script("季度报告") == JAPANESE
+    assert detect_script("季度报告", CHINESE) == CHINESE
+    assert detect_script("분기 보고서") == KOREAN
+    assert detect_script("รายงาน") == THAI
+    assert detect_script("تقرير ربع سنوي") == ARABIC
+    assert detect_script("Квартальный отчёт") == CYRILLIC
+
+
+def test_ensure_script_font_sets_slot_in_schema_order():
+    """a:ea / a:cs は未指定のときだけ、スキーマの順序どおりに追加される"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    paragraph = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(3), Inches(1)).text_frame.paragraphs[0]
+
+    run = paragraph.add_run()
+    run.font.name = "Arial"
+    run.hyperlink.address = "https://example.com"
+    ensure_script_font(run, KOREAN)
+    rPr = run._r.rPr
+    assert [child.tag for child in rPr] == [qn('a:latin'), qn('a:ea'), qn('a:hlinkClick')]
+    assert rPr.find(qn('a:ea')).get('typeface') == "Malgun Gothic"
+    assert run.font.name == "Malgun Gothic"
+
+    run = paragraph.add_run()
+    run.font.name = "Arial"
+    ensure_script_font(run, ARABIC)
+    assert run.font.name == "Arial"
+    assert run._r.rPr.find(qn('a:cs')).get('typeface') == "Segoe UI"
+
+    # テーマフォントなど既存の a:ea は尊重する
+    run = paragraph.add_run()
+    ensure_script_font(run, JAPANESE)
+    run._r.rPr.find(qn('a:ea')).set('typeface', '+mn-ea')
+    ensure_script_font(run, JAPANESE)
+    assert run._r.rPr.find(qn('a:ea')).get('typeface') == '+mn-ea'
+
+
+def test_ensure_script_font_replaces_font_for_other_script():
+    """日本語のデッキを韓国語に訳すと、既存の a:ea の Meiryo は韓国語のフォントに置き換える"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    paragraph = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(3), Inches(1)).text_frame.paragraphs[0]
+
+    run = paragraph.add_run()
+    run.font.name = "Meiryo"
+    rPr = run._r.get_or_add_rPr()
+    rPr.append(rPr.makeelement(qn('a:ea'), {'typeface': 'Meiryo'}))
+    ensure_script_font(run, KOREAN)
+    assert run.font.name == "Malgun Gothic"
+    assert rPr.find(qn('a:ea')).get('typeface') == "Malgun Gothic"
+    assert len(rPr.findall(qn('a:ea'))) == 1
+
+    # 対応フォントとテーマフォントの参照はそのまま
+    run = paragraph.add_run()
+    rPr = run._r.get_or_add_rPr()
+    rPr.append(rPr.makeelement(qn('a:ea'), {'typeface': 'Apple SD Gothic Neo'}))
+    rPr.append(rPr.makeelement(qn('a:cs'), {'typeface': '+mn-cs'}))
+    ensure_script_font(run, KOREAN)
+    ensure_script_font(run, THAI)
+    assert rPr.find(qn('a:ea')).get('typeface') == 'Apple SD Gothic Neo'
+    assert rPr.find(qn('a:cs')).get('typeface') == '+mn-cs'
+
+
+def test_generate_uses_korean_font(tmp_path):
+    """日本語以外の訳文にも対応するフォントが設定される"""
+    path = str(tmp_path / 'deck.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = "Quarterly Report"
+    prs.save(path)
+
+    edited = [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": "분기 보고서"}]}]
+    result = generate_translated_pptx(path, edited, output_path)
+    assert result["success"] and result["replacements"] == 1
+
+    run = Presentation(output_path).slides[0].shapes.title.text_frame.paragraphs[0].runs[0]
+    assert run.text == "분기 보고서"
+    assert run.font.name == "Malgun Gothic"
+    assert run._r.rPr.find(qn('a:ea')).get('typeface') == "Malgun Gothic"
+
+
+def test_generate_uses_chinese_font_for_zh_target(tmp_path):
+    """漢字だけの訳文は翻訳先の言語コードで中国語・日本語のフォントを選ぶ"""
+    assert han_script_for_language("zh-CN") == han_script_for_language("zh_Hant") == CHINESE
+    assert han_script_for_language("ja") == han_script_for_language(None) == han_script_for_language("fr") == JAPANESE
+
+    path = str(tmp_path / 'deck.pptx')
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = "Quarterly Report"
+    table = slide.shapes.add_table(1, 1, Inches(1), Inches(3), Inches(4), Inches(1)).table
+    table.cell(0, 0).text = "Total"
+    prs.save(path)
+
+    def edited(title, total):
+        return [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": title},
+                                            {"original": "Total", "translated": total}]}]
+
+    def ea_typefaces(output_path):
+        shapes = Presentation(output_path).slides[0].shapes
+        runs = [shapes.title.text_frame.paragraphs[0].runs[0],
+                shapes[1].table.cell(0, 0).text_frame.paragraphs[0].runs[0]]
+        return [run._r.rPr.find(qn('a:ea')).get('typeface') for run in runs]
+
+    result = generate_translated_pptx_multi(path, {"zh-CN": edited("季度报告", "合计"), "ja": edited("四半期報告", "合計")},
+                                            str(tmp_path / 'out-{lang}.pptx'))
+    assert result["success"]
+    assert ea_typefaces(str(tmp_path / 'out-zh-CN.pptx')) == ["Microsoft YaHei", "Microsoft YaHei"]
+    assert ea_typefaces(str(tmp_path / 'out-ja.pptx')) == ["游ゴシック", "游ゴシック"]
+
+    output_path = str(tmp_path / 'zh.pptx')
+    assert generate_translated_pptx(path, edited("季度报告", "合计"), output_path, language="zh")["success"]
+    assert ea_typefaces(output_path) == ["Microsoft YaHei", "Microsoft YaHei"]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+標準入出力モードのテスト
+一時ファイルを使わずにフレーム経由でPPTXと結果をやり取りできることを確認する
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+from pptx import Presentation
+
+# パスを追加
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx')
+sys.path.insert(0, SCRIPT_DIR)
+
+from stdio_frames import read_frame, read_frame_bytes, write_frame
+from mixed_deck import create_mixed_pptx
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'python_backend')
+
+
+def run_stdio(script: str, args, frames):
+    """スクリプトを標準入出力モードで実行し、出力フレームを返す"""
+    stdin = io.BytesIO()
+    for frame in frames:
+        write_frame(stdin, frame)
+    completed = subprocess.run(
+        [sys.executable, script, *args],
+        input=stdin.getvalue(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+    )
+    stdout = io.BytesIO(completed.stdout)
+    outputs = []
+    while True:
+        frame = read_frame_bytes(stdout)
+        if frame is None:
+            return completed.returncode, outputs
+        outputs.append(frame)
+
+
+def test_frame_round_trip():
+    """フレームの書き込みと読み込みが対応し、終端ではNoneを返す"""
+    stream = io.BytesIO()
+    write_frame(stream, b'deck')
+    write_frame(stream, b'')
+    stream.seek(0)
+    assert read_frame(stream).read() == b'deck'
+    assert read_frame_bytes(stream) == b''
+    assert read_frame(stream) is None
+
+
+def test_apply_translations_stdio(tmp_path):
+    """apply_translations.py --stdio が結果JSONと翻訳後PPTXをフレームで返す"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    with open(path, 'rb') as f:
+        deck = f.read()
+    translations = {"slides": [{"slide_number": 4, "translations": [
+        {"original": "Grouped", "translated": "グループ"}
+    ]}]}
+
+    returncode, frames = run_stdio(
+        os.path.join(SCRIPT_DIR, 'apply_translations.py'), ['--stdio'],
+        [deck, json.dumps(translations).encode('utf-8')]
+    )
+    assert returncode == 0
+    result = json.loads(frames[0])
+    assert result["success"] and result["save_mode"] == "incremental"
+    prs = Presentation(io.BytesIO(frames[1]))
+    assert prs.slides[3].shapes[0].shapes[0].text_frame.text == "グループ"
+
+
+def test_extract_and_generate_stdio(tmp_path):
+    """extract_text.py と generate_pptx.py も標準入出力モードで動作する"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    with open(path, 'rb') as f:
+        deck = f.read()
+
+    returncode, frames = run_stdio(os.path.join(SCRIPT_DIR, 'extract_text.py'), ['--stdio'], [deck])
+    assert returncode == 0
+    extracted = json.loads(frames[0])
+    assert extracted["success"] and extracted["slides"][0]["texts"][0]["text"] == "Quarterly Report"
+
+    edited = [{"pageNumber": 1, "texts": [{"original": "Quarterly Report", "translated": "四半期報告"}]}]
+    returncode, frames = run_stdio(
+        os.path.join(BACKEND_DIR, 'generate_pptx.py'), ['--stdio'],
+        [deck, json.dumps({"slides": edited}).encode('utf-8')]
+    )
+    assert returncode == 0
+    result = json.loads(frames[0])
+    assert result["success"] and result["file_size"] == len(frames[1])
+    assert Presentation(io.BytesIO(frames[1])).slides[0].shapes.title.text_frame.text == "四半期報告"
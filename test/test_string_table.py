@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+文字列テーブル形式の抽出と、番号で指定した翻訳の適用のテスト
+繰り返し出現するテキストが1回だけ出力され、訳文も1回指定すれば全出現箇所に適用されることを確認する
+"""
+
+import json
+import os
+import sys
+
+from pptx import Presentation
+from pptx.util import Inches
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+import apply_translations
+import apply_translations_v2
+from extract_cache import ExtractionCache
+from extract_text import extract_text_from_pptx
+from generate_pptx import generate_translated_pptx
+from update_pptx import update_pptx_with_translations
+
+FOOTER = "Confidential - Internal use only"
+
+
+def _deck(path: str, slides: int = 3):
+    """全スライドに同じフッターと見出し行のテーブルがあるデッキ"""
+    prs = Presentation()
+    for slide_idx in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = f"Topic {slide_idx + 1}"
+        slide.shapes.add_textbox(Inches(1), Inches(6.5), Inches(6), Inches(0.5)).text_frame.text = FOOTER
+        table = slide.shapes.add_table(2, 2, Inches(1), Inches(2), Inches(6), Inches(1)).table
+        table.cell(0, 0).text = "Region"
+        table.cell(0, 1).text = "Revenue"
+        table.cell(1, 0).text = f"Area {slide_idx + 1}"
+    prs.save(path)
+
+
+def _texts(path: str):
+    """各スライドのテキストボックスとセルのテキスト"""
+    result = []
+    for slide in Presentation(path).slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                result.append(shape.text_frame.text)
+            elif shape.has_table:
+                result.extend(cell.text for row in shape.table.rows for cell in row.cells if cell.text)
+    return result
+
+
+def test_strings_table_counts_repeated_texts(tmp_path):
+    """繰り返しのテキストは1つの番号を共有し、キャッシュには元の形式で保存する"""
+    path = str(tmp_path / 'deck.pptx')
+    _deck(path)
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+
+    result = extract_text_from_pptx(path, cache=cache, strings=True)
+    assert result["success"]
+    strings = result["strings"]
+    counts = {entry["text"]: entry["count"] for entry in strings}
+    assert counts[FOOTER] == counts["Region"] == counts["Revenue"] == 3
+    assert counts["Topic 2"] == 1
+    assert len(strings) == 3 + 3 + 3
+
+    footer_index = [entry["text"] for entry in strings].index(FOOTER)
+    footers = [text_data for slide in result["slides"] for text_data in slide["texts"]
+               if text_data.get("string") == footer_index]
+    assert len(footers) == 3 and all("text" not in text_data for text_data in footers)
+
+    cached = extract_text_from_pptx(path, cache=cache, strings=True)
+    assert cached["cache"]["hit"] and cached["strings"] == strings
+    assert "strings" not in extract_text_from_pptx(path, cache=cache)
+
+
+def test_translations_keyed_by_string_index(tmp_path):
+    """番号で指定した訳文をすべての適用スクリプトが全出現箇所に展開する"""
+    path = str(tmp_path / 'deck.pptx')
+    _deck(path)
+    extracted = extract_text_from_pptx(path, strings=True)
+    index = {entry["text"]: idx for idx, entry in enumerate(extracted["strings"])}
+
+    # "strings" に訳文を追加する形式と、"translations" に番号で指定する形式
+    with_strings = {"strings": [dict(entry) for entry in extracted["strings"]], "slides": extracted["slides"]}
+    with_strings["strings"][index[FOOTER]]["translated"] = "社外秘"
+    with_strings["strings"][index["Region"]]["translated"] = "地域"
+    by_index = {"translations": {str(index[FOOTER]): "社外秘", str(index["Region"]): "地域"},
+                "slides": extracted["slides"]}
+
+    outputs = {}
+    outputs["generate"] = str(tmp_path / 'generate.pptx')
+    assert generate_translated_pptx(path, with_strings, outputs["generate"])["success"]
+    outputs["apply"] = str(tmp_path / 'apply.pptx')
+    assert apply_translations.apply_translations_to_pptx(path, outputs["apply"], json.dumps(by_index))["success"]
+    outputs["apply_v2"] = str(tmp_path / 'apply_v2.pptx')
+    assert apply_translations_v2.apply_translations_to_pptx(path, outputs["apply_v2"], json.dumps(with_strings))["success"]
+    outputs["update"] = str(tmp_path / 'update.pptx')
+    assert update_pptx_with_translations(path, outputs["update"], json.loads(json.dumps(by_index)))["success"]
+
+    for name, output in outputs.items():
+        texts = _texts(output)
+        assert texts.count("社外秘") == 3, name
+        assert texts.count("地域") == 3, name
+        assert FOOTER not in texts and "Revenue" in texts and "Topic 3" in texts, name
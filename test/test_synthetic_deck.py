@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+合成デッキ（ベンチマーク用）のテスト
+作成したテキストノードがすべて抽出され、抽出結果から作った翻訳データが各スクリプトで適用できることを確認する
+"""
+
+import json
+import os
+import sys
+
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+import apply_translations_v2
+from extract_text import extract_text_from_pptx
+from generate_pptx import generate_translated_pptx
+from synthetic_deck import DeckSpec, build_deck, fake_translate, translation_payloads
+from update_pptx import update_pptx_with_translations
+
+
+def _extracted_nodes(extracted):
+    return sum(len(text_data.get("cells", [None])) for slide in extracted["slides"] for text_data in slide["texts"])
+
+
+def test_synthetic_deck_round_trip(tmp_path):
+    """全軸を有効にしたデッキでノード数が一致し、3種類の適用がすべて成功する"""
+    path = str(tmp_path / 'deck.pptx')
+    spec = DeckSpec(slides=3, shapes_per_slide=2, runs_per_paragraph=3, table_rows=2, table_cols=2,
+                    group_depth=2, notes=True, media_bytes=2048, script='cjk')
+    info = build_deck(spec, path)
+    extracted = extract_text_from_pptx(path)
+
+    assert extracted["success"]
+    assert info["text_nodes"] == _extracted_nodes(extracted) == 3 * (1 + 2 + 4 + 1)
+
+    payloads = translation_payloads(extracted)
+    title = extracted["slides"][0]["texts"][0]["text"]
+
+    output = str(tmp_path / 'generate.pptx')
+    assert generate_translated_pptx(path, payloads["generate"], output)["success"]
+    assert Presentation(output).slides[0].shapes.title.text_frame.text == fake_translate(title)
+
+    output = str(tmp_path / 'apply.pptx')
+    result = apply_translations_v2.apply_translations_to_pptx(path, output, json.dumps(payloads["apply"]))
+    assert result["success"]
+    assert Presentation(output).slides[0].shapes.title.text_frame.text == fake_translate(title)
+
+    output = str(tmp_path / 'update.pptx')
+    assert update_pptx_with_translations(path, output, payloads["update"])["success"]
+    assert Presentation(output).slides[0].shapes.title.text_frame.text == fake_translate(title)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+テキストフレームへの訳文の収まり調整のテスト
+"""
+
+import io
+import json
+import os
+import sys
+
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from generate_pptx import generate_translated_pptx, run_manifest
+from pipeline import run_manifest_pipeline
+from text_fit import FULL_WIDTH, MIN_FONT_SIZE, fit_text_frame, font_metrics
+
+
+def _text_box(slide, text: str, size: int, width=Inches(3), height=Inches(1), wrap: bool = True):
+    shape = slide.shapes.add_textbox(Inches(1), Inches(1), width, height)
+    shape.text_frame.word_wrap = wrap
+    run = shape.text_frame.paragraphs[0].add_run()
+    run.text = text
+    run.font.size = Pt(size)
+    return shape, run
+
+
+def test_font_metrics():
+    """文字幅表（全角は1em、アクセント付きの文字は基の文字の幅、フォントごとに共有）"""
+    arial = font_metrics('Arial')
+    assert arial.text_width('M') > arial.text_width('i')
+    assert arial.text_width('ä') == arial.text_width('a')
+    assert arial.text_width('四半期') == 3 * FULL_WIDTH
+    assert font_metrics('Calibri').text_width('Report') < arial.text_width('Report')
+    assert font_metrics('+mn-lt') is font_metrics(None)
+    assert font_metrics('Arial') is arial
+
+
+def test_fit_shrinks_overflowing_text():
+    """あふれる訳文は収まる最大のサイズまで縮小し、収まっているものは変更しない"""
+    slide = Presentation().slides.add_slide(Presentation().slide_layouts[6])
+
+    shape, run = _text_box(slide, "Report", 24)
+    assert fit_text_frame(shape.text_frame, shape.width, shape.height) is None
+    assert run.font.size == Pt(24)
+
+    text = "Vierteljährlicher Geschäftsbericht für das laufende Geschäftsjahr mit Ausblick"
+    shape, run = _text_box(slide, text, 24)
+    scale = fit_text_frame(shape.text_frame, shape.width, shape.height)
+    assert scale is not None and scale < 1
+    shrunk = run.font.size
+    assert Pt(24) > shrunk >= MIN_FONT_SIZE * 127
+    # 縮小後は収まっているので2回目は何もしない
+    assert fit_text_frame(shape.text_frame, shape.width, shape.height) is None
+    assert run.font.size == shrunk
+
+    # 1段階大きいサイズでは収まらない（最大のサイズを選んでいる）
+    larger_shape, larger = _text_box(slide, text, 24)
+    larger.font.size = shrunk + Pt(0.5)
+    assert fit_text_frame(larger_shape.text_frame, larger_shape.width, larger_shape.height) is not None
+
+
+def test_fit_without_wrap_uses_line_width():
+    """折り返しなしのテキストは1行の幅で判定する"""
+    slide = Presentation().slides.add_slide(Presentation().slide_layouts[6])
+    shape, run = _text_box(slide, "四半期報告" * 3, 24, height=Inches(3), wrap=False)
+    assert fit_text_frame(shape.text_frame, shape.width, shape.height) is not None
+    # 3インチ - 左右の余白 = 201.6pt に15文字の全角が収まるサイズ
+    assert run.font.size.pt * 15 <= 201.6
+
+
+def test_generate_reports_fitted_frames(tmp_path):
+    """生成時に置換したテキストフレームだけを縮小し、--no-fit 相当では縮小しない"""
+    path = str(tmp_path / 'deck.pptx')
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    _text_box(slide, "Report", 28)
+    _text_box(slide, "Untouched text that is far too long for this box " * 4, 28)
+    prs.save(path)
+
+    translated = "Quartalsbericht über die Geschäftsentwicklung im laufenden Jahr"
+    edited = [{"pageNumber": 1, "texts": [{"original": "Report", "translated": translated}]}]
+
+    result = generate_translated_pptx(path, edited, str(tmp_path / 'fit.pptx'))
+    assert result["success"] and result["fitted"] == 1
+    shapes = Presentation(str(tmp_path / 'fit.pptx')).slides[0].shapes
+    assert shapes[0].text_frame.paragraphs[0].runs[0].font.size < Pt(28)
+    assert shapes[1].text_frame.paragraphs[0].runs[0].font.size == Pt(28)
+
+    result = generate_translated_pptx(path, edited, str(tmp_path / 'nofit.pptx'), fit_text=False)
+    assert result["success"] and result["fitted"] == 0
+    shapes = Presentation(str(tmp_path / 'nofit.pptx')).slides[0].shapes
+    assert shapes[0].text_frame.paragraphs[0].runs[0].font.size == Pt(28)
+
+
+def test_manifest_honours_no_fit(tmp_path):
+    """マニフェストでも --no-fit 相当の指定を守り、ジョブの "fit_text" がそれより優先する"""
+    path = str(tmp_path / 'deck.pptx')
+    prs = Presentation()
+    _text_box(prs.slides.add_slide(prs.slide_layouts[6]), "Report", 28)
+    prs.save(path)
+
+    slides = [{"pageNumber": 1, "texts": [{"original": "Report", "translated":
+               "Quartalsbericht über die Geschäftsentwicklung im laufenden Jahr"}]}]
+    manifest_path = str(tmp_path / 'jobs.jsonl')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"id": "default", "input": path, "output": str(tmp_path / 'a.pptx'), "slides": slides}) + '\n')
+        f.write(json.dumps({"id": "fit", "input": path, "output": str(tmp_path / 'b.pptx'), "slides": slides,
+                            "fit_text": True}) + '\n')
+
+    for run in (run_manifest, run_manifest_pipeline):
+        out = io.StringIO()
+        assert run(manifest_path, workers=1, out=out, fit_text=False)["failed"] == 0
+        fitted = {record["id"]: record["fitted"] for record in map(json.loads, out.getvalue().splitlines())}
+        assert fitted == {"default": 0, "fit": 1}, run.__name__
+        font_size = Presentation(str(tmp_path / 'a.pptx')).slides[0].shapes[0].text_frame.paragraphs[0].runs[0].font.size
+        assert font_size == Pt(28)
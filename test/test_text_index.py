@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+テキストノード索引のテスト
+グループ・テーブル・ノートを含むスライドから文書順にノードを取得できることを確認する
+"""
+
+import json
+import os
+import sys
+
+from pptx import Presentation
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from text_index import KIND_CELL, KIND_NOTES, KIND_SHAPE, TextIndex
+from apply_translations import apply_translations_to_pptx
+from mixed_deck import create_mixed_pptx
+
+
+def test_index_covers_groups_tables_and_notes(tmp_path):
+    """グループ内のシェイプ・テーブルの全セル・ノートが索引に含まれる"""
+    path = str(tmp_path / 'mixed.pptx')
+    create_mixed_pptx(path)
+    index = TextIndex(Presentation(path))
+
+    cells = [node for node in index.slide_nodes(2) if node.kind == KIND_CELL]
+    assert len(cells) == 9
+    assert cells[0].text == "Cell 0-0" and cells[1].text == ""
+    assert cells[4].node_id.endswith(":r1c1")
+
+    nodes = index.slide_nodes(3)
+    assert [(node.kind, node.text) for node in nodes] == [
+        (KIND_SHAPE, "Grouped"),
+        (KIND_NOTES, "Speaker notes"),
+    ]
+    assert len(nodes[0].groups) == 1
+    assert nodes[1].node_id == "s4:notes"
+
+
+def test_apply_translations_reaches_grouped_shapes(tmp_path):
+    """グループ内のシェイプにも翻訳が適用される"""
+    path = str(tmp_path / 'mixed.pptx')
+    output_path = str(tmp_path / 'out.pptx')
+    create_mixed_pptx(path)
+
+    translations = {"slides": [{"slide_number": 4, "translations": [
+        {"original": "Grouped", "translated": "グループ"}
+    ]}]}
+    result = apply_translations_to_pptx(path, output_path, json.dumps(translations))
+    assert result["success"] and result["applied_count"] == 1
+
+    group = Presentation(output_path).slides[3].shapes[0]
+    assert group.shapes[0].text_frame.text == "グループ"
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+スタイル情報（TextStyle / ParagraphStyle）と診断用のスタイルキャッシュのテスト
+同じ内容のスタイルが1つのオブジェクトを共有し、キャッシュは有効にしたときだけ上限件数まで保持することを確認する
+"""
+
+import os
+import sys
+
+import pytest
+from pptx import Presentation
+from pptx.util import Pt
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_backend'))
+
+from generate_pptx import STYLE_CACHE_ENV, PPTXTranslator, TextStyle, generate_translated_pptx
+from metrics import METRICS_ENV
+
+
+def _deck(path: str, titles):
+    prs = Presentation()
+    for title in titles:
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        run = slide.shapes.title.text_frame.paragraphs[0].add_run()
+        run.text = title
+        run.font.size = Pt(28)
+        run.font.bold = True
+    prs.save(path)
+
+
+def test_styles_are_frozen_and_shared(tmp_path):
+    """同じ書式のランからは同じオブジェクトが返り、変更できない"""
+    path = str(tmp_path / 'deck.pptx')
+    _deck(path, ["First", "Second"])
+    prs = Presentation(path)
+    translator = PPTXTranslator(path)
+
+    runs = [slide.shapes.title.text_frame.paragraphs[0].runs[0] for slide in prs.slides]
+    first, second = (translator.extract_text_style(run) for run in runs)
+    assert first is second
+    assert first.font_size == Pt(28) and first.bold is True
+    assert not hasattr(first, '__dict__')
+    with pytest.raises(AttributeError):
+        first.bold = False
+    assert TextStyle(bold=True) is not TextStyle(bold=True)
+
+    # 共有はインスタンス（ジョブ）ごとで、別のトランスレーターとは共有しない
+    other = PPTXTranslator(path)
+    assert other.extract_text_style(runs[0]) == first
+    assert other.extract_text_style(runs[0]) is not first
+    assert len(translator.interned_styles) == 1
+
+    paragraphs = [slide.shapes.title.text_frame.paragraphs[0] for slide in prs.slides]
+    assert translator.extract_paragraph_style(paragraphs[0]) is translator.extract_paragraph_style(paragraphs[1])
+
+
+def test_style_cache_is_opt_in_and_bounded(tmp_path, monkeypatch):
+    """デフォルトではスタイルを保持せず、有効にすると新しい段落から上限件数だけ保持する"""
+    path = str(tmp_path / 'deck.pptx')
+    titles = ["One", "Two", "Three"]
+    _deck(path, titles)
+    edited = [{"pageNumber": idx + 1, "texts": [{"original": title, "translated": f"{title}!"}]}
+              for idx, title in enumerate(titles)]
+
+    monkeypatch.delenv(STYLE_CACHE_ENV, raising=False)
+    monkeypatch.setenv(METRICS_ENV, '1')
+    translator = PPTXTranslator(path)
+    assert translator.load_presentation()
+    assert translator.translate(edited) == (True, 3)
+    assert not translator.style_cache
+    assert 'style' not in translator.metrics.as_dict()["phases"]
+
+    translator = PPTXTranslator(path, style_cache_size=2)
+    assert translator.load_presentation()
+    assert translator.translate(edited) == (True, 3)
+    assert [key[0] for key in translator.style_cache] == [1, 2]
+    original_run = Presentation(path).slides[2].shapes.title.text_frame.paragraphs[0].runs[0]
+    assert translator.style_cache[(2, 0, 0)]["runs"] == [("Three", translator.extract_text_style(original_run))]
+
+    monkeypatch.setenv(STYLE_CACHE_ENV, '5')
+    assert PPTXTranslator(path).style_cache_size == 5
+    result = generate_translated_pptx(path, edited, str(tmp_path / 'env.pptx'))
+    assert result["success"] and result["replacements"] == 3
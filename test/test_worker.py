@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+worker.py のテスト
+リクエスト行のエラー応答、ジョブ数の上限での受付停止、Unixソケット経由の往復を確認する
+"""
+
+import io
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+# パスを追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'pptx'))
+
+from worker import PPTXWorker, serve_stdio, serve_unix_socket
+
+
+def test_handle_line_reports_bad_requests():
+    """不正な行・リクエストはエラーの結果として返し、例外にしない"""
+    worker = PPTXWorker(concurrency=1)
+    try:
+        assert worker.handle_line("   \n") is None
+
+        response = worker.handle_line("{not json")
+        assert response["id"] is None and not response["success"]
+        assert response["error"].startswith("Invalid JSON")
+
+        assert worker.handle_line('["ping"]') == {"id": None, "success": False, "error": "Request must be a JSON object"}
+
+        response = worker.handle_line('{"id": "u", "op": "resize"}')
+        assert response == {"id": "u", "op": "resize", "success": False, "error": "Unknown op: resize"}
+
+        response = worker.handle_line('{"id": "m", "op": "apply", "input_path": "in.pptx"}')
+        assert response["id"] == "m" and response["op"] == "apply"
+        assert response["error"] == "Missing required field: output_path"
+
+        response = worker.handle_line('{"id": 7, "op": "ping"}')
+        assert response["success"] and response["pid"] == os.getpid() and response["id"] == 7
+    finally:
+        worker.shutdown()
+
+
+def test_max_jobs_stops_accepting():
+    """上限のジョブを受け付けたら停止し、残りの行は次のプロセスのために読まずに残す"""
+    worker = PPTXWorker(concurrency=1, max_jobs=2)
+    assert worker._reserve_job() and not worker.stopping.is_set()
+    assert worker._reserve_job() and worker.stopping.is_set()
+    assert not worker._reserve_job()
+    assert worker.accepted_jobs == 2
+    worker.shutdown()
+
+    worker = PPTXWorker(concurrency=2, max_jobs=2)
+    stdin = io.StringIO(''.join(json.dumps({"id": idx, "op": "ping"}) + '\n' for idx in range(3)))
+    stdout = io.StringIO()
+    serve_stdio(worker, stdin, stdout)
+
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert sorted(response["id"] for response in responses) == [0, 1]
+    assert json.loads(stdin.readline())["id"] == 2
+
+    # max_jobs=0 なら上限なし
+    worker = PPTXWorker(concurrency=1, max_jobs=0)
+    assert all(worker._reserve_job() for _ in range(5)) and not worker.stopping.is_set()
+    worker.shutdown()
+
+
+def test_unix_socket_round_trip(tmp_path):
+    """Unixソケットで1行ずつ応答し、上限に達した接続の処理後にサーバーを終了する"""
+    socket_path = str(tmp_path / 'worker.sock')
+    worker = PPTXWorker(concurrency=2, max_jobs=2)
+    server = threading.Thread(target=serve_unix_socket, args=(worker, socket_path), daemon=True)
+    server.start()
+
+    deadline = time.monotonic() + 5
+    while not os.path.exists(socket_path):
+        assert time.monotonic() < deadline, "socket was not created"
+        time.sleep(0.01)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(10)
+        client.connect(socket_path)
+        client.sendall(b'{"id": "p", "op": "ping"}\n\n{"id": "x", "op": "nope"}\n')
+        with client.makefile('r', encoding='utf-8') as reader:
+            responses = {response["id"]: response for response in (json.loads(reader.readline()) for _ in range(2))}
+
+    assert responses["p"]["success"] and responses["p"]["pid"] == os.getpid()
+    assert responses["x"]["error"] == "Unknown op: nope"
+
+    server.join(timeout=10)
+    assert not server.is_alive()
+    assert not os.path.exists(socket_path)